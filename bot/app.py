@@ -1,6 +1,7 @@
 from __future__ import annotations
-import asyncio, time, os
-from typing import Dict, Any
+import asyncio, os, time
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
 from bot.types import TopOfBook, OrderIntent
 from bot.paper.run_manager import RunManager
 from bot.paper.broker import PaperBroker
@@ -11,32 +12,103 @@ from bot.paper.microstructure import MicrostructureTracker
 from bot.paper.advsel import AdvSelConfig, compute_advsel_penalty
 from bot.paper.latency_profiles import RegionLatency, LatencyProfile
 from bot.paper.market_vol_logger import MarketVolLogger
+from bot.paper.market_store import shared_path
+from bot.paper.checkpoint import read_checkpoint, write_checkpoint
+from bot.paper.monte_carlo import run_and_append
+from bot.paper.freshness import FreshnessTracker
+from bot.mailbox import Mailbox
 from bot.live_feed import PolymarketLiveFeed
+from bot.poll_scheduler import PollScheduler
+from bot.dependency_graph import load_dependency_graph, Gap
+from bot.online_fit import RecursiveLeastSquares
+from bot.clock import Clock, WallClock
+from bot.metrics import MetricsRegistry, LoopLagMonitor
 
 class KillSwitch:
     def __init__(self): self.tripped = False; self.reason = ""
     def trip(self, reason: str): self.tripped = True; self.reason = reason
 
 class App:
-    def __init__(self, cfg: Dict[str, Any]):
+    def __init__(self, cfg: Dict[str, Any], clock: Optional[Clock] = None):
         self.cfg = cfg
+        self.clock = clock or WallClock()
         self.ks = KillSwitch()
+        self._closed = False
+        # this App's own registry, so in-process variants never share (or snapshot) each other's metrics
+        self.metrics = MetricsRegistry()
+        self._tick_h = self.metrics.histogram("app_tick_seconds")
+        self._decision_h = self.metrics.histogram("tick_to_decision_seconds")
+        self._ticks = self.metrics.counter("app_ticks_total")
+        self._triggers = self.metrics.counter("app_triggers_total")
+        self._mc_skipped = self.metrics.counter("monte_carlo_skipped_total")
+        self._mark_drift = self.metrics.gauge("equity_mark_drift_usd")
         self.tob: Dict[str, TopOfBook] = {}
+        # the feed callback only overwrites per-token slots; the loop takes the newest TOB per tick
+        self.inbox = Mailbox("tob", self.metrics)
+        self._tob_reader = self.inbox.reader("strategy")
 
         # Get token IDs from config (use live Polymarket markets)
         markets = cfg.get("markets", {})
         self.token_a = str(markets.get("token_a", "MARKET_A"))
         self.token_b = str(markets.get("token_b", "MARKET_B"))
 
-        # Initialize live feed
-        self.live_feed = PolymarketLiveFeed(
-            token_ids=[self.token_a, self.token_b],
-            on_tob_update=self._on_tob_update
-        )
+        # Dependency graph: defaults to the single A -> B linear relation
+        self.graph = load_dependency_graph(cfg.get("dependency", {}), token_a=self.token_a, token_b=self.token_b)
+        token_ids = list(dict.fromkeys([self.token_a, self.token_b, *self.graph.tokens]))
+
+        # Optional online beta/intercept estimation for single-leader relations
+        of = cfg.get("dependency", {}).get("online_fit", {})
+        self.min_abs_z = float(of.get("min_abs_z", 0.0))
+        if self.min_abs_z > 0 and not of.get("enabled", False):
+            raise ValueError("dependency.online_fit.min_abs_z > 0 needs online_fit.enabled: without a fit no gap has a z-score")
+        self._z_skipped: set = set()
+        self.fits: Dict[str, Tuple[str, RecursiveLeastSquares]] = {}
+        self._fit_last: Dict[str, Tuple[float, float]] = {}
+        if of.get("enabled", False):
+            for leader, follower, beta, intercept in self.graph.single_leader_rows():
+                self.fits[follower] = (leader, RecursiveLeastSquares(
+                    beta=beta, intercept=intercept,
+                    forgetting=float(of.get("forgetting", 0.995)),
+                    delta=float(of.get("delta", 100.0)),
+                    warmup_points=int(of.get("warmup_points", 30)),
+                ))
+
+        # Initialize live feed (or attach to books published in shared memory)
+        feed_cfg = cfg.get("feed", {})
+        self.shm_feed = None
+        if feed_cfg.get("shared_memory"):
+            from bot.paper.shm_book import SharedBookFeed
+            self.live_feed = self.shm_feed = SharedBookFeed(str(feed_cfg["shared_memory"]), token_ids, on_tob_update=self._on_tob_update, clock=self.clock, registry=self.metrics)
+        else:
+            sc = feed_cfg.get("scheduler", {})
+            scheduler = None
+            if sc.get("enabled", False):
+                scheduler = PollScheduler(
+                    token_ids, clock=self.clock, registry=self.metrics,
+                    rate_per_sec=float(sc.get("rate_per_sec", 10.0)),
+                    burst=float(sc.get("burst", 5.0)),
+                    min_interval_sec=float(sc.get("min_interval_sec", 0.25)),
+                    base_interval_sec=float(sc.get("base_interval_sec", 1.0)),
+                    max_interval_sec=float(sc.get("max_interval_sec", 5.0)),
+                    backoff=float(sc.get("backoff", 1.5)),
+                )
+            self.live_feed = PolymarketLiveFeed(
+                token_ids=token_ids,
+                on_tob_update=self._on_tob_update,
+                clock=self.clock,
+                host=str(feed_cfg.get("host", "https://clob.polymarket.com")),
+                scheduler=scheduler,
+                registry=self.metrics,
+                ws_url=str(feed_cfg.get("ws_url") or "") or None,
+            )
+        self.hot_ttl_sec = float(feed_cfg.get("scheduler", {}).get("hot_ttl_sec", 5.0))
 
         pruns = cfg.get("paper", {}).get("runs", {})
         self.run_paths = None
-        if pruns.get("enabled", True):
+        resume_dir = pruns.get("resume_dir")
+        if resume_dir:
+            self.run_paths = RunManager(base_dir=os.path.dirname(str(resume_dir).rstrip("/")) or ".").resume_run(str(resume_dir))
+        elif pruns.get("enabled", True):
             rm = RunManager(base_dir=str(pruns.get("base_dir", "./runs")))
             self.run_paths = rm.start_run(
                 tag=str(pruns.get("tag", "paper")),
@@ -57,11 +129,21 @@ class App:
             mark_method=str(pcfg.get("mark_method", "mid")),
             save_fills_csv=True,
             fills_csv_path=fills_path,
+            fills_tail_size=int(pcfg.get("fills_tail_size", 10_000)),
+            clock=self.clock,
+            registry=self.metrics,
         )
-        self.attempts = AttemptLogger(attempts_path)
+        self.reconcile_interval = float(pcfg.get("mark_reconcile_sec", 60))
+        self._last_reconcile = self.clock.time()
+        self.attempts = AttemptLogger(attempts_path, clock=self.clock, registry=self.metrics)
+
+        self.freshness = FreshnessTracker(self.metrics)
+        self._book_tob: Dict[str, TopOfBook] = {}  # the TOB whose poll the loop's book view reflects
 
         perf_cfg = pcfg.get("performance", {})
         reg = perf_cfg.get("regime", {})
+        ru = pcfg.get("rollups", {})
+        rollup_res = tuple(int(r) for r in ru.get("resolutions_sec", (10, 60, 300, 3600))) if ru.get("enabled", True) else ()
         self.perf = PerformanceTracker(
             equity_csv_path=equity_path,
             summary_json_path=summary_path,
@@ -72,15 +154,28 @@ class App:
             regime_vol_window_points=int(reg.get("vol_window_points", 60)),
             regime_high_vol_threshold=float(reg.get("high_vol_threshold", 0.0015)),
             regime_min_points_each=int(reg.get("min_points_each", 80)),
+            clock=self.clock,
+            rollup_resolutions=rollup_res,
+            summary_extras=lambda: {"freshness": self.freshness.summary()},
+            registry=self.metrics,
         )
 
-        self.ws_book = WSL2BookStore(max_levels=int(pcfg.get("ws_l2", {}).get("max_levels", 200)))
-        self.micro = MicrostructureTracker()
+        ex = pcfg.get("execution", {})
+        self.execution_mode = str(ex.get("mode", "fok"))
+        self.order_ttl_sec = float(ex.get("order_ttl_sec", 30))
+        self.matching = None
+        self._book_seen: Dict[str, int] = {}
+        if self.execution_mode == "passive":
+            from bot.paper.matching import MatchingEngine
+            self.matching = MatchingEngine(on_fill=self._on_passive_fill, clock_fn=self.clock.time, registry=self.metrics)
+
+        self.ws_book = self.shm_feed.reader if self.shm_feed else WSL2BookStore(max_levels=int(pcfg.get("ws_l2", {}).get("max_levels", 200)), registry=self.metrics)
+        self.micro: Dict[str, MicrostructureTracker] = {t: MicrostructureTracker() for t in self.graph.followers}
 
         micro_cfg = pcfg.get("micro", {})
         profs_raw = micro_cfg.get("latency_profiles", {})
         profs = {k: LatencyProfile(int(v["base_ms"]), int(v["jitter_ms"]), float(v["tail_prob"]), int(v["extra_tail_ms"]), float(v["drop_prob"])) for k, v in profs_raw.items()}
-        self.lat = RegionLatency(profiles=profs, region=str(micro_cfg.get("region", "us-central")))
+        self.lat = RegionLatency(profiles=profs, region=str(micro_cfg.get("region", "us-central")), clock=self.clock)
 
         adv = micro_cfg.get("advsel", {})
         self.advsel_cfg = AdvSelConfig(
@@ -90,130 +185,343 @@ class App:
             max_liquidity_shrink=float(adv.get("max_liquidity_shrink", 0.75)),
         )
 
+        mc = pcfg.get("monte_carlo", {})
+        self.mc_samples = int(mc.get("samples", 4096)) if mc.get("enabled", False) else 0
+        self.mc_max_pending = int(mc.get("max_pending", 2))
+        self.mc_path = os.path.join(self.run_paths.run_dir if self.run_paths else "./data", str(mc.get("file_name", "fill_mc.jsonl")))
+        self._mc_pending: set = set()
+
         mv = pcfg.get("market_vol", {})
         self.market_vol_logger = None
         if mv.get("enabled", True):
             csv_name = str(mv.get("csv_name", "market_mid_timeseries.csv"))
             interval = float(mv.get("log_interval_sec", 1))
             base_dir = self.run_paths.run_dir if self.run_paths else "./data"
-            self.market_vol_logger = MarketVolLogger(path=os.path.join(base_dir, csv_name), log_interval_sec=interval)
+            shared_dir = str(mv.get("shared_dir") or "")
+            mid_path = shared_path(shared_dir, self.token_a, self.token_b, csv_name) if shared_dir else os.path.join(base_dir, csv_name)
+            if shared_dir and self.run_paths:
+                # scoring finds the pair's series here and slices it to this run's time range
+                RunManager.update_meta(self.run_paths, market_mid_csv=mid_path)
+            self.market_vol_logger = MarketVolLogger(path=mid_path, log_interval_sec=interval, clock=self.clock, rollup_resolutions=rollup_res, shared=bool(shared_dir), registry=self.metrics)
+
+        tape = pcfg.get("book_tape", {})
+        self.book_tape = None
+        if tape.get("enabled", False):
+            from bot.paper.book_tape import BookTapeWriter
+            base_dir = self.run_paths.run_dir if self.run_paths else "./data"
+            self.book_tape = BookTapeWriter(
+                os.path.join(base_dir, str(tape.get("file_name", "book_tape.bin"))),
+                keyframe_interval_sec=float(tape.get("keyframe_interval_sec", 60)),
+                compress=str(tape.get("compress", "zlib")),
+            )
+
+        ck = pcfg.get("checkpoint", {})
+        self.checkpoint_interval = float(ck.get("interval_sec", 30)) if ck.get("enabled", False) else 0.0
+        self.checkpoint_path = os.path.join(self.run_paths.run_dir if self.run_paths else "./data", str(ck.get("file_name", "checkpoint.bin")))
+        self._last_checkpoint = self.clock.time()
+        self._checkpoint_write: Optional[asyncio.Future] = None
+        if resume_dir:
+            st = read_checkpoint(self.checkpoint_path)
+            # fresh state on top of the old CSVs would leave a fill log that disagrees with the broker
+            if not st: raise RuntimeError(f"no usable checkpoint at {self.checkpoint_path}; refusing to resume {resume_dir}")
+            self._restore(st)
+
+        mcfg = cfg.get("metrics", {})
+        self.metrics_enabled = bool(mcfg.get("enabled", True))
+        self.metrics_interval = float(mcfg.get("snapshot_interval_sec", 10))
+        self.metrics_path = os.path.join(self.run_paths.run_dir if self.run_paths else "./data", "metrics.json")
+        self._last_metrics = 0.0
+        # loop lag is a wall-time notion; a virtual clock keeps the loop saturated by design
+        self.lag_monitor = LoopLagMonitor(float(mcfg.get("loop_lag_interval_sec", 0.25)), registry=self.metrics, path=os.environ.get("BOT_LOOP_LAG_FILE")) if self.metrics_enabled and isinstance(self.clock, WallClock) else None
 
     def _on_tob_update(self, token_id: str, tob: TopOfBook):
         """Callback for when live feed updates top-of-book."""
         self.tob[token_id] = tob
+        self.paper.mark(token_id, tob.midpoint)
+        self.freshness.on_recv(tob)
+        self.inbox.put(token_id, tob)
+
+    def _age(self, stage: str, tob: Optional[TopOfBook]) -> Optional[float]:
+        return self.freshness.observe(stage, tob, now=self.clock.time(), now_mono=self.clock.monotonic())
+
+    def _on_passive_fill(self, f):
+        fill = self.paper.record_passive_fill(f.token_id, f.side, f.price, f.shares, reason=f"passive(order={f.order_id})")
+        if fill: self._age("fill", self._book_tob.get(f.token_id))
+        self.attempts.log(f.token_id, f.side, f.price, f.price * f.shares, ok=bool(fill), reason=("filled_passive" if fill else "rejected_passive"))
+        if fill: self._perf_tick()
+
+    def _update_fits(self, mids: Dict[str, Optional[float]]):
+        for follower, (leader, fit) in self.fits.items():
+            x = mids.get(leader); y = mids.get(follower)
+            if x is None or y is None: continue
+            if self._fit_last.get(follower) == (x, y): continue
+            self._fit_last[follower] = (x, y)
+            fit.update(x, y)
+            if fit.ready:
+                self.graph.set_relation(leader, follower, beta=fit.beta, intercept=fit.intercept)
+
+    def _gap_z(self, g: Gap) -> Optional[float]:
+        f = self.fits.get(g.token_id)
+        return f[1].zscore(g.fair, g.mid) if f else None
+
+    def _z_ok(self, g: Gap) -> bool:
+        z = self._gap_z(g)
+        if z is None:
+            # no fit for this follower (multi-leader row) or not warm yet: min_gap alone decides
+            if g.token_id not in self._z_skipped:
+                self._z_skipped.add(g.token_id)
+                print(f"[APP] z gate skipped for {g.token_id}: no warm online fit")
+            return True
+        return abs(z) >= self.min_abs_z
+
+    def _maybe_snapshot_metrics(self, force: bool = False):
+        if not self.metrics_enabled: return
+        now = self.clock.time()
+        if not force and now - self._last_metrics < self.metrics_interval: return
+        self._last_metrics = now
+        try: self.metrics.write_snapshot(self.metrics_path)
+        except OSError as e: print(f"[APP] metrics snapshot failed: {e}")
+
+    def _state(self) -> Dict[str, Any]:
+        return {
+            "ts": self.clock.time(),
+            "broker": self.paper.state(),
+            "perf": self.perf.state(),
+            "market_vol": self.market_vol_logger.state() if self.market_vol_logger else None,
+            "micro": {t: m.state() for t, m in self.micro.items()},
+            "freshness": self.freshness.state(),
+            "fits": {t: fit.state() for t, (_, fit) in self.fits.items()},
+            "files": {os.path.relpath(p, self.run_paths.run_dir): os.path.getsize(p) for p in self._run_files() if os.path.exists(p)} if self.run_paths else {},
+        }
+
+    def _run_files(self) -> List[str]:
+        """Append-only CSVs of this run whose rows must line up with the checkpointed state."""
+        out = [self.paper.fills.path, self.attempts.path, self.perf.equity_csv_path]
+        if self.perf.rollup: out += self.perf.rollup.paths.values()
+        mv = self.market_vol_logger
+        if mv and not mv.lease:  # a shared series belongs to the pair, not to this run
+            out.append(mv.path)
+            if mv.rollup: out += mv.rollup.paths.values()
+        return [p for p in out if p]
+
+    def _restore(self, st: Dict[str, Any]):
+        # rows written after this checkpoint describe state the run no longer has
+        if self.run_paths: RunManager.rewind(self.run_paths, st.get("files", {}))
+        self.paper.restore(st["broker"])
+        self.perf.restore(st["perf"])
+        if self.market_vol_logger and st.get("market_vol"): self.market_vol_logger.restore(st["market_vol"])
+        if st.get("freshness"): self.freshness.restore(st["freshness"])
+        for t, ms in st.get("micro", {}).items():
+            if t in self.micro: self.micro[t].restore(ms)
+        for t, fs in st.get("fits", {}).items():
+            if t in self.fits:
+                leader, fit = self.fits[t]
+                fit.restore(fs)
+                if fit.ready: self.graph.set_relation(leader, t, beta=fit.beta, intercept=fit.intercept)
+        print(f"[APP] resumed from checkpoint @ {st['ts']:.0f}: cash={self.paper.cash:.2f} fills={self.paper.fills.count}")
+
+    def _maybe_checkpoint(self):
+        # state is copied on the loop; pickling and the file write run on a worker thread
+        if not self.checkpoint_interval: return
+        if self._checkpoint_write is not None and not self._checkpoint_write.done(): return
+        now = self.clock.time()
+        if now - self._last_checkpoint < self.checkpoint_interval: return
+        self._last_checkpoint = now
+        self._checkpoint_write = asyncio.get_running_loop().run_in_executor(None, write_checkpoint, self.checkpoint_path, self._state())
+
+    async def _close(self):
+        if self._closed: return
+        self._closed = True
+        await self.live_feed.stop()
+        if self.lag_monitor: await self.lag_monitor.stop()
+        if self.book_tape: self.book_tape.close(); self.book_tape = None
+        if self._mc_pending: await asyncio.gather(*self._mc_pending, return_exceptions=True)
+        # open bars are written out; the checkpoint below still carries them for a resume
+        self.perf.close()
+        if self.market_vol_logger: self.market_vol_logger.close()
+        if self.checkpoint_interval:
+            if self._checkpoint_write is not None: await self._checkpoint_write
+            write_checkpoint(self.checkpoint_path, self._state())
+        self._maybe_snapshot_metrics(force=True)
 
     async def shutdown(self):
+        """Ask the loop to stop; run() closes everything out from its finally."""
         self.ks.trip("shutdown")
-        await self.live_feed.stop()
 
     def _perf_tick(self):
-        ts = time.time()
-        eq = self.paper.equity_mark_to_market(self.tob)
-        unrl = self.paper.unrealized_pnl(self.tob)
-        self.perf.update(ts=ts, equity=eq, cash=self.paper.cash, realized_pnl=self.paper.realized_pnl, unrealized_pnl=unrl, fills=len(self.paper.fills))
+        ts = self.clock.time()
+        if ts - self._last_reconcile >= self.reconcile_interval:
+            self._last_reconcile = ts
+            self._mark_drift.set(self.paper.reconcile_marks())
+        eq = self.paper.equity
+        unrl = self.paper.unrealized
+        self.perf.update(ts=ts, equity=eq, cash=self.paper.cash, realized_pnl=self.paper.realized_pnl, unrealized_pnl=unrl, fills=self.paper.fills.count)
 
     async def run(self):
+        # cancellation (e.g. VirtualClock.run reaching `until`) still flushes
+        # the tape, open bars, final checkpoint and metrics snapshot
+        try:
+            await self._main()
+        finally:
+            await self._close()
+        print(f"[APP] stopped: {self.ks.reason}")
+
+    async def _main(self):
         print("[APP] Starting with LIVE Polymarket data feed")
         print(f"[APP] Market A: {self.token_a}")
         print(f"[APP] Market B: {self.token_b}")
+        if len(self.graph.followers) > 1:
+            print(f"[APP] Dependency graph: {len(self.graph.leaders)} leaders -> {len(self.graph.followers)} followers")
 
         # Start live feed
         await self.live_feed.start()
+        if self.lag_monitor: self.lag_monitor.start()
 
         dep_cfg = self.cfg.get("dependency", {})
         trigger_move = float(dep_cfg.get("trigger_move_pct", 0.03))
         min_gap = float(dep_cfg.get("min_gap_pct", 0.02))
-        lin = dep_cfg.get("linear", {})
-        beta = float(lin.get("beta", 1.0))
-        intercept = float(lin.get("intercept", 0.0))
 
-        last_a = None
+        last_mid: Dict[str, float] = {}
 
         while not self.ks.tripped:
-            await asyncio.sleep(0.5)
-            now = time.time()
-
-            # Update TOB from live feed (callback updates self.tob)
-            tob_a = self.tob.get(self.token_a)
-            tob_b = self.tob.get(self.token_b)
+            await self.clock.sleep(0.5)
+            t_tick = time.perf_counter()
+            self._maybe_snapshot_metrics()
+            self._maybe_checkpoint()
 
-            # Wait for both markets to have data
-            if not tob_a or not tob_b:
+            # Wait for the primary pair to have data
+            if not self.tob.get(self.token_a) or not self.tob.get(self.token_b):
                 continue
 
-            # Update microstructure tracker with Market B data
-            self.micro.on_tob(tob_b)
-
-            # Update book from live feed
-            book_data = self.live_feed.get_book_for_ws_store(self.token_b)
-            if book_data:
-                self.ws_book.on_message(book_data)
+            # Update microstructure trackers and books for every follower with a new TOB;
+            # polls that landed since the last tick are coalesced to the newest
+            fresh = self._tob_reader.take_all()
+            for token_id in self.graph.followers:
+                tob = fresh.get(token_id)
+                if not tob: continue
+                self.micro[token_id].on_tob(tob)
+                # the book view below always matches this poll (same version = same content)
+                self._book_tob[token_id] = tob
+                # books are versioned end to end: an unchanged poll skips conversion and rebuilds
+                v = self.live_feed.version(token_id)
+                if v == self._book_seen.get(token_id): continue
+                self._book_seen[token_id] = v
+                book_data = self.live_feed.get_book_for_ws_store(token_id)
+                if book_data:
+                    self.ws_book.on_message(book_data)
+                    if self.book_tape:
+                        p = book_data["payload"]
+                        self.book_tape.record(self.clock.time(), token_id, p["bids"], p["asks"])
+                    if self.matching: self.matching.on_message(book_data)
+                elif self.matching and self.shm_feed and (book := self.ws_book.get_book(token_id)):
+                    self.matching.on_book(token_id, {l.price: l.size for l in book.bids}, {l.price: l.size for l in book.asks})
+            if self.matching: self.matching.expire(self.clock.time())
 
             # Log market volatility
+            tob_b = self.tob[self.token_b]
             if self.market_vol_logger and tob_b.midpoint:
                 self.market_vol_logger.maybe_log(self.token_b, tob_b.midpoint)
 
             self._perf_tick()
-
-            # Check dependency trigger
-            a_mid = tob_a.midpoint
-            if a_mid is None:
+            self._ticks.inc()
+
+            # Propagate mids through the graph (only rows touching changed leaders)
+            mids = {t: self.tob[t].midpoint for t in self.graph.tokens if t in self.tob}
+            if self.fits:
+                self._update_fits(mids)
+            self.graph.update_mids(mids)
+
+            # Track movement in leader markets
+            moved = []
+            for leader in self.graph.leaders:
+                m = mids.get(leader)
+                if m is None: continue
+                prev = last_mid.get(leader)
+                last_mid[leader] = m
+                if prev is None: continue
+                if abs(m - prev) / max(prev, 1e-9) >= trigger_move:
+                    moved.append(leader)
+            if not moved:
+                self._tick_h.observe(time.perf_counter() - t_tick)
                 continue
-
-            # Track movement in Market A
-            if last_a is None:
-                last_a = a_mid
-                continue
-
-            move = abs(a_mid - last_a) / max(last_a, 1e-9)
-            last_a = a_mid
-
-            if move < trigger_move:
+            self._triggers.inc()
+
+            # keep the triggered leaders and their followers fresh while the signal is open
+            touched = self.graph.followers_of(moved)
+            self.live_feed.mark_hot([*moved, *touched], self.hot_ttl_sec)
+            gaps = self.graph.ranked_gaps(min_gap=min_gap, followers=touched)
+            if self.min_abs_z > 0:
+                # gate on the gap in units of the live residual std-dev
+                gaps = [g for g in gaps if self._z_ok(g)]
+            if not gaps:
+                self._tick_h.observe(time.perf_counter() - t_tick)
                 continue
-
-            # Calculate fair value for Market B based on Market A
-            fair_b = max(0.01, min(0.99, intercept + beta * a_mid))
-            b_mid = tob_b.midpoint
-            if b_mid is None:
-                continue
-
-            gap = (fair_b - b_mid) / max(b_mid, 1e-9)
-            if abs(gap) < min_gap:
-                continue
-
-            side = "BUY" if gap > 0 else "SELL"
-            limit_price = b_mid * (1.0 + (0.001 if side == "BUY" else -0.001))
-            size_usd = min(self.paper.cash * 0.02, 25.0)
-
-            intent = OrderIntent(self.token_b, side, float(limit_price), float(size_usd))
-
-            ok, lat_sec = await self.lat.wait()
-            if not ok:
-                self.attempts.log(intent.token_id, intent.side, intent.price, intent.size_usd, ok=False, reason="dropped")
-                continue
-
-            extra_slip = 0.0
-            liq_shrink = 0.0
-            stats = self.micro.stats_over(lat_sec)
-            if stats:
-                pen = compute_advsel_penalty(stats.abs_move_pct, self.advsel_cfg)
-                extra_slip = pen.extra_slippage_bps
-                liq_shrink = pen.liquidity_shrink
-
-            book = self.ws_book.get_book(intent.token_id)
-            if book is None:
-                self.attempts.log(intent.token_id, intent.side, intent.price, intent.size_usd, ok=False, reason="no_book")
-                continue
-
-            self.attempts.log(intent.token_id, intent.side, intent.price, intent.size_usd, ok=False, reason=f"attempt lat={lat_sec*1000:.0f}ms")
-            fill = self.paper.try_fill_fok_with_depth(
-                intent, book,
-                reason=f"dep(lat={lat_sec*1000:.0f}ms extra={extra_slip:.1f} shrink={liq_shrink:.2f})",
-                extra_slippage_bps=extra_slip, liquidity_shrink=liq_shrink
-            )
-            self.attempts.log(intent.token_id, intent.side, intent.price, intent.size_usd, ok=bool(fill), reason=("filled" if fill else "canceled"))
-            if fill:
-                self._perf_tick()
-
-        await self.live_feed.stop()
-        print(f"[APP] stopped: {self.ks.reason}")
+            self._decision_h.observe(time.perf_counter() - t_tick)
+            self._tick_h.observe(time.perf_counter() - t_tick)
+            await self._execute(gaps[0].token_id, gaps[0].gap, gaps[0].mid)
+
+    def _submit_monte_carlo(self, intent: OrderIntent, mid: float):
+        """Replay this trigger against many latency/advsel draws in the default executor."""
+        self._mc_pending = {f for f in self._mc_pending if not f.done()}
+        if len(self._mc_pending) >= self.mc_max_pending:
+            self._mc_skipped.inc(); return
+        book = self.ws_book.get_book(intent.token_id)
+        if book is None: return
+        p = self.lat.profile
+        # only the snapshots the longest possible latency can look back over are copied
+        ts, mids = self.micro[intent.token_id].window((p.base_ms + p.jitter_ms + p.extra_tail_ms) / 1000.0)
+        kw = dict(
+            ts=self.clock.time(), token_id=intent.token_id, side=intent.side, limit=intent.price, size_usd=intent.size_usd, mid=mid,
+            levels=[(l.price, l.size) for l in (book.asks if intent.side == "BUY" else book.bids)],
+            micro_ts=np.frombuffer(ts), micro_mid=np.frombuffer(mids), profile=p, advsel=self.advsel_cfg,
+            fee_bps=self.paper.fee_bps, slippage_bps=self.paper.slippage_bps, samples=self.mc_samples,
+        )
+        self._mc_pending.add(asyncio.get_running_loop().run_in_executor(None, run_and_append, self.mc_path, kw))
+
+    async def _execute(self, token_id: str, gap: float, mid: float):
+        side = "BUY" if gap > 0 else "SELL"
+        limit_price = mid * (1.0 + (0.001 if side == "BUY" else -0.001))
+        size_usd = min(self.paper.cash * 0.02, 25.0)
+
+        intent = OrderIntent(token_id, side, float(limit_price), float(size_usd))
+        age = self._age("decision", self.tob.get(token_id))
+        if self.mc_samples: self._submit_monte_carlo(intent, mid)
+
+        ok, lat_sec = await self.lat.wait()
+        if not ok:
+            self.attempts.log(intent.token_id, intent.side, intent.price, intent.size_usd, ok=False, reason="dropped")
+            return
+
+        extra_slip = 0.0
+        liq_shrink = 0.0
+        stats = self.micro[token_id].stats_over(lat_sec)
+        if stats:
+            pen = compute_advsel_penalty(stats.abs_move_pct, self.advsel_cfg)
+            extra_slip = pen.extra_slippage_bps
+            liq_shrink = pen.liquidity_shrink
+
+        book = self.ws_book.get_book(intent.token_id)
+        if book is None:
+            self.attempts.log(intent.token_id, intent.side, intent.price, intent.size_usd, ok=False, reason="no_book")
+            return
+
+        self.attempts.log(intent.token_id, intent.side, intent.price, intent.size_usd, ok=False, reason=f"attempt lat={lat_sec*1000:.0f}ms age={(age or 0.0)*1000:.0f}ms")
+        if self.matching:
+            # rest at the touch on our side and let the matching engine fill it
+            lvls = book.bids if side == "BUY" else book.asks
+            if not lvls:
+                self.attempts.log(intent.token_id, intent.side, intent.price, intent.size_usd, ok=False, reason="no_touch"); return
+            px = lvls[0].price
+            self.matching.place(token_id, side, px, size_usd / max(px, 1e-9), expires_at=self.clock.time() + self.order_ttl_sec)
+            self.live_feed.mark_hot([token_id], self.order_ttl_sec)
+            self.attempts.log(intent.token_id, intent.side, px, intent.size_usd, ok=False, reason="rested")
+            return
+        fill = self.paper.try_fill_fok_with_depth(
+            intent, book,
+            reason=f"dep(lat={lat_sec*1000:.0f}ms extra={extra_slip:.1f} shrink={liq_shrink:.2f})",
+            extra_slippage_bps=extra_slip, liquidity_shrink=liq_shrink
+        )
+        self.attempts.log(intent.token_id, intent.side, intent.price, intent.size_usd, ok=bool(fill), reason=("filled" if fill else "canceled"))
+        if fill:
+            self._age("fill", self._book_tob.get(token_id))
+            self._perf_tick()
@@ -0,0 +1,92 @@
+from __future__ import annotations
+import asyncio, heapq, itertools, time
+from typing import Any, Awaitable, Callable, List, Optional, Protocol, Tuple
+
+class Clock(Protocol):
+    def time(self) -> float: ...
+    def monotonic(self) -> float: ...
+    async def sleep(self, sec: float) -> None: ...
+    def call_later(self, delay: float, fn: Callable[..., Any], *args: Any) -> None: ...
+
+class WallClock:
+    """Real time: the default for live paper runs."""
+    def time(self) -> float:
+        return time.time()
+    def monotonic(self) -> float:
+        return time.monotonic()
+    async def sleep(self, sec: float) -> None:
+        await asyncio.sleep(sec)
+    def call_later(self, delay: float, fn: Callable[..., Any], *args: Any) -> None:
+        asyncio.get_running_loop().call_later(delay, fn, *args)
+
+def _wake(fut: asyncio.Future) -> None:
+    if not fut.done():
+        fut.set_result(None)
+
+class VirtualClock:
+    """
+    Discrete-event clock. sleep()/call_later() push events onto a heap keyed by
+    virtual time; run() lets every runnable task settle, then jumps straight to
+    the next event instead of waiting for it, so simulation runs at CPU speed.
+    """
+
+    def __init__(self, start: Optional[float] = None, *, settle_yields: int = 8):
+        self._now = time.time() if start is None else float(start)
+        self._t0 = self._now
+        self._heap: List[Tuple[float, int, Callable[..., Any], tuple]] = []
+        self._seq = itertools.count()
+        self.settle_yields = int(settle_yields)
+        self.events = 0
+
+    def time(self) -> float:
+        return self._now
+
+    def monotonic(self) -> float:
+        return self._now - self._t0
+
+    def call_later(self, delay: float, fn: Callable[..., Any], *args: Any) -> None:
+        heapq.heappush(self._heap, (self._now + max(0.0, float(delay)), next(self._seq), fn, args))
+
+    async def sleep(self, sec: float) -> None:
+        fut = asyncio.get_running_loop().create_future()
+        self.call_later(sec, _wake, fut)
+        await fut
+
+    @property
+    def pending(self) -> int:
+        return len(self._heap)
+
+    async def _settle(self) -> None:
+        # Yield until the loop has no ready callbacks left, i.e. every task is
+        # parked on a virtual sleep (or real I/O). _ready is CPython's run queue;
+        # other loops (uvloop) fall back to a fixed number of yields.
+        ready = getattr(asyncio.get_running_loop(), "_ready", None)
+        if ready is None:
+            for _ in range(self.settle_yields): await asyncio.sleep(0)
+            return
+        await asyncio.sleep(0)
+        while ready:
+            await asyncio.sleep(0)
+
+    async def run(self, main: Awaitable[Any], *, until: Optional[float] = None) -> Any:
+        """Drive virtual time until `main` completes or the clock reaches `until`."""
+        task = asyncio.ensure_future(main)
+        while not task.done():
+            await self._settle()
+            if task.done(): break
+            if not self._heap:
+                # nothing scheduled in virtual time: the workload is waiting on real I/O
+                await asyncio.wait({task}, timeout=0.01)
+                continue
+            if until is not None and self._heap[0][0] > until:
+                self._now = max(self._now, until)
+                task.cancel()
+                break
+            t, _, fn, args = heapq.heappop(self._heap)
+            self._now = max(self._now, t)
+            self.events += 1
+            fn(*args)
+        try:
+            return await task
+        except asyncio.CancelledError:
+            return None
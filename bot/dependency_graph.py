@@ -0,0 +1,161 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+@dataclass(frozen=True)
+class Relation:
+    leader: str
+    follower: str
+    beta: float = 1.0
+    intercept: float = 0.0
+    kind: str = "linear"  # "linear" | "clamped"
+    lo: float = 0.01
+    hi: float = 0.99
+
+@dataclass(frozen=True)
+class Gap:
+    token_id: str
+    fair: float
+    mid: float
+    gap: float
+
+class DependencyGraph:
+    """
+    Fair values for every follower market as a sparse matrix-vector product
+    over leader mids: fair = intercept + W @ mids, with optional per-row clamps.
+    Rows are stored CSR-style; a leader -> rows index lets a mid change
+    recompute only the rows that reference it.
+    """
+
+    def __init__(self, relations: Iterable[Relation]):
+        rels = list(relations)
+        self.tokens: List[str] = []
+        self._col: Dict[str, int] = {}
+        self.followers: List[str] = []
+        self._row: Dict[str, int] = {}
+        by_row: Dict[int, Dict[int, float]] = {}
+        self._intercept: List[float] = []
+        self._lo: List[Optional[float]] = []
+        self._hi: List[Optional[float]] = []
+        for r in rels:
+            c = self._col_of(r.leader)
+            self._col_of(r.follower)
+            if r.follower not in self._row:
+                self._row[r.follower] = len(self.followers)
+                self.followers.append(r.follower)
+                self._intercept.append(0.0); self._lo.append(None); self._hi.append(None)
+            i = self._row[r.follower]
+            self._intercept[i] += float(r.intercept)
+            if r.kind == "clamped":
+                self._lo[i] = float(r.lo); self._hi[i] = float(r.hi)
+            row = by_row.setdefault(i, {})
+            row[c] = row.get(c, 0.0) + float(r.beta)
+
+        self._indptr: List[int] = [0]
+        self._indices: List[int] = []
+        self._data: List[float] = []
+        self._leader_rows: List[List[int]] = [[] for _ in self.tokens]
+        for i in range(len(self.followers)):
+            for c, w in by_row.get(i, {}).items():
+                self._indices.append(c); self._data.append(w)
+                self._leader_rows[c].append(i)
+            self._indptr.append(len(self._indices))
+        self.leaders: List[str] = [t for c, t in enumerate(self.tokens) if self._leader_rows[c]]
+
+        self._mids: List[Optional[float]] = [None] * len(self.tokens)
+        self._fair: List[Optional[float]] = [None] * len(self.followers)
+
+    def _col_of(self, token_id: str) -> int:
+        c = self._col.get(token_id)
+        if c is None:
+            c = self._col[token_id] = len(self.tokens)
+            self.tokens.append(token_id)
+        return c
+
+    def _recompute_row(self, i: int) -> None:
+        s = self._intercept[i]
+        mids = self._mids
+        for k in range(self._indptr[i], self._indptr[i + 1]):
+            m = mids[self._indices[k]]
+            if m is None:
+                self._fair[i] = None; return
+            s += self._data[k] * m
+        lo, hi = self._lo[i], self._hi[i]
+        if lo is not None: s = max(lo, min(hi, s))
+        self._fair[i] = s
+
+    def update_mids(self, mids: Dict[str, Optional[float]]) -> int:
+        """Apply a batch of mid changes; returns the number of rows recomputed."""
+        dirty = set()
+        for token_id, mid in mids.items():
+            c = self._col.get(token_id)
+            if c is None or mid is None or self._mids[c] == mid: continue
+            self._mids[c] = float(mid)
+            dirty.update(self._leader_rows[c])
+        for i in dirty:
+            self._recompute_row(i)
+        return len(dirty)
+
+    def set_relation(self, leader: str, follower: str, *, beta: float, intercept: float) -> None:
+        """Replace the coefficients of a single-leader row in place and recompute it."""
+        i = self._row[follower]
+        c = self._col[leader]
+        for k in range(self._indptr[i], self._indptr[i + 1]):
+            if self._indices[k] == c:
+                self._data[k] = float(beta)
+        self._intercept[i] = float(intercept)
+        self._recompute_row(i)
+
+    def single_leader_rows(self) -> List[Tuple[str, str, float, float]]:
+        """(leader, follower, beta, intercept) for every row driven by exactly one leader."""
+        out = []
+        for i, follower in enumerate(self.followers):
+            k = self._indptr[i]
+            if self._indptr[i + 1] - k == 1:
+                out.append((self.tokens[self._indices[k]], follower, self._data[k], self._intercept[i]))
+        return out
+
+    def fair(self, follower: str) -> Optional[float]:
+        i = self._row.get(follower)
+        return None if i is None else self._fair[i]
+
+    def followers_of(self, leaders: Iterable[str]) -> List[str]:
+        rows = set()
+        for t in leaders:
+            c = self._col.get(t)
+            if c is not None: rows.update(self._leader_rows[c])
+        return [self.followers[i] for i in sorted(rows)]
+
+    def ranked_gaps(self, *, min_gap: float = 0.0, followers: Optional[Iterable[str]] = None) -> List[Gap]:
+        rows = range(len(self.followers)) if followers is None else [self._row[f] for f in followers if f in self._row]
+        out: List[Gap] = []
+        for i in rows:
+            fair = self._fair[i]
+            token_id = self.followers[i]
+            mid = self._mids[self._col[token_id]]
+            if fair is None or mid is None: continue
+            gap = (fair - mid) / max(mid, 1e-9)
+            if abs(gap) < min_gap: continue
+            out.append(Gap(token_id, fair, mid, gap))
+        out.sort(key=lambda g: abs(g.gap), reverse=True)
+        return out
+
+def load_dependency_graph(dep_cfg: Dict[str, Any], *, token_a: str, token_b: str) -> DependencyGraph:
+    gcfg = dep_cfg.get("graph", {})
+    rels_raw = gcfg.get("relations", []) if gcfg.get("enabled", False) else []
+    if not rels_raw:
+        # the classic single pair: fair_b = clamp(intercept + beta * a_mid)
+        lin = dep_cfg.get("linear", {})
+        return DependencyGraph([Relation(token_a, token_b, float(lin.get("beta", 1.0)), float(lin.get("intercept", 0.0)), "clamped")])
+    rels = []
+    for r in rels_raw:
+        rels.append(Relation(
+            leader=str(r["leader"]),
+            follower=str(r["follower"]),
+            beta=float(r.get("beta", 1.0)),
+            intercept=float(r.get("intercept", 0.0)),
+            kind=str(r.get("kind", "linear")),
+            lo=float(r.get("lo", 0.01)),
+            hi=float(r.get("hi", 0.99)),
+        ))
+    return DependencyGraph(rels)
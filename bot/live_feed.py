@@ -1,10 +1,32 @@
 from __future__ import annotations
 import asyncio
+import json
 import time
 from typing import Dict, Optional, Callable, Any
 from py_clob_client.client import ClobClient
-from py_clob_client.clob_types import OrderBookSummary
+from py_clob_client.clob_types import OrderBookSummary, OrderSummary
 from bot.types import TopOfBook
+from bot.clock import Clock, WallClock
+from bot.poll_scheduler import PollScheduler
+from bot.metrics import REGISTRY, MetricsRegistry
+
+
+def _px(level) -> str:
+    return level.price if hasattr(level, 'price') else level['price']
+
+def _sz(level) -> str:
+    return level.size if hasattr(level, 'size') else level['size']
+
+def exchange_ts(book: Any) -> Optional[float]:
+    """The book's exchange timestamp (epoch ms string on the wire) in seconds."""
+    ts = getattr(book, 'timestamp', None)
+    try: return float(ts) / 1000.0 if ts else None
+    except (TypeError, ValueError): return None
+
+def book_digest(book: Any) -> int:
+    """Cheap digest of the raw (string) levels, no float parsing."""
+    return hash((tuple((_px(l), _sz(l)) for l in (getattr(book, 'bids', None) or ())),
+                 tuple((_px(l), _sz(l)) for l in (getattr(book, 'asks', None) or ()))))
 
 class PolymarketLiveFeed:
     """
@@ -12,25 +34,51 @@ class PolymarketLiveFeed:
     Provides top-of-book updates and L2 order book data.
     """
 
-    def __init__(self, token_ids: list[str], on_tob_update: Optional[Callable] = None):
+    def __init__(self, token_ids: list[str], on_tob_update: Optional[Callable] = None, clock: Optional[Clock] = None, host: str = "https://clob.polymarket.com", scheduler: Optional[PollScheduler] = None, registry: MetricsRegistry = REGISTRY, ws_url: Optional[str] = None):
         """
         Args:
             token_ids: List of Polymarket token IDs to track
             on_tob_update: Optional callback for top-of-book updates
+            clock: Time source for TOB stamps and poll sleeps (wall clock by default)
+            host: CLOB REST host (point at a local stand-in exchange for load tests)
+            scheduler: Adaptive rate-limited poll scheduler; None polls every token once a second
+            registry: Metrics registry the feed's timings and counters go to
+            ws_url: Market-channel WebSocket; when set, pushed books replace polling
         """
+        self.clock = clock or WallClock()
         self.token_ids = token_ids
         self.on_tob_update = on_tob_update
-        self.client = ClobClient(host="https://clob.polymarket.com", key="")
+        self.client = ClobClient(host=host, key="")
         self.tob: Dict[str, TopOfBook] = {}
         self.books: Dict[str, Any] = {}
+        # per-token book version: bumped only when the content digest changes
+        self.versions: Dict[str, int] = {}
+        self._digests: Dict[str, tuple] = {}  # token -> (exchange hash, content digest)
+        self._converted: Dict[str, tuple] = {}
+        self.scheduler = scheduler
+        self.ws_url = ws_url
+        self._ws_levels: Dict[str, tuple] = {}  # token -> ({bid px: size}, {ask px: size})
         self._running = False
         self._tasks: list[asyncio.Task] = []
+        self._fetch = registry.histogram("feed_fetch_seconds")
+        self._parse = registry.histogram("feed_parse_seconds")
+        self._convert = registry.histogram("feed_book_convert_seconds")
+        self._errors = registry.counter("feed_errors_total")
+        self._unchanged = registry.counter("feed_unchanged_books_total")
 
     async def start(self):
         """Start fetching live data for all token IDs."""
         self._running = True
         print(f"[LIVE FEED] Starting live feed for {len(self.token_ids)} markets")
 
+        if self.ws_url:
+            self._tasks.append(asyncio.create_task(self._run_ws()))
+            return
+
+        if self.scheduler:
+            self._tasks.append(asyncio.create_task(self._run_scheduler()))
+            return
+
         # Create polling tasks for each token
         for token_id in self.token_ids:
             task = asyncio.create_task(self._poll_market(token_id))
@@ -51,45 +99,168 @@ class PolymarketLiveFeed:
         """
         poll_interval = 1.0  # Poll every second
 
+        while self._running:
+            self._poll_once(token_id)
+            await self.clock.sleep(poll_interval)
+
+    async def _run_scheduler(self):
+        """One poller for every token, paced by the adaptive PollScheduler."""
+        sched = self.scheduler
+        last_pub = 0.0
+        while self._running:
+            token_id, wait = sched.next()
+            if wait > 0:
+                await self.clock.sleep(wait)
+                continue
+            sched.take(token_id)
+            sched.on_result(token_id, self._poll_once(token_id))
+            now = self.clock.monotonic()
+            if now - last_pub >= 1.0:
+                last_pub = now
+                sched.publish_metrics()
+            await asyncio.sleep(0)
+
+    async def _run_ws(self):
+        """Subscribe to the market channel and treat every pushed book as a new version; reconnect on errors."""
+        import aiohttp
         while self._running:
             try:
-                # Fetch order book
-                book_response: OrderBookSummary = self.client.get_order_book(token_id)
+                async with aiohttp.ClientSession() as session:
+                    async with session.ws_connect(self.ws_url, heartbeat=30) as ws:
+                        await ws.send_json({"type": "market", "assets_ids": list(self.token_ids)})
+                        async for msg in ws:
+                            if msg.type == aiohttp.WSMsgType.TEXT: self._on_ws_message(msg.data)
+                            elif msg.type == aiohttp.WSMsgType.ERROR: break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._errors.inc()
+                print(f"[LIVE FEED] WebSocket error: {e}")
+            if self._running: await self.clock.sleep(1.0)
+
+    def _on_ws_message(self, data: str) -> None:
+        """
+        Apply market-channel events (one or a list): "book" replaces a token's
+        levels, "price_change" sets one level's size (0 removes it). Deltas
+        before a token's first snapshot and other event types are ignored.
+        """
+        recv = self.clock.monotonic()
+        try: events = json.loads(data)
+        except ValueError:
+            self._errors.inc(); return
+        for ev in (events if isinstance(events, list) else [events]):
+            t0 = time.perf_counter()
+            kind = ev.get("event_type")
+            touched: Dict[str, None] = {}
+            if kind == "book":
+                token_id = str(ev.get("asset_id", ""))
+                if token_id not in self.token_ids: continue
+                self._ws_levels[token_id] = ({float(l["price"]): float(l["size"]) for l in ev.get("bids") or ()},
+                                             {float(l["price"]): float(l["size"]) for l in ev.get("asks") or ()})
+                touched[token_id] = None
+            elif kind == "price_change":
+                # price_changes[] carry their own asset_id; the older schema has changes[] under one
+                changes = ev.get("price_changes") or [{**c, "asset_id": ev.get("asset_id")} for c in ev.get("changes") or ()]
+                for c in changes:
+                    token_id = str(c.get("asset_id", ""))
+                    levels = self._ws_levels.get(token_id)
+                    if levels is None: continue
+                    side = levels[0] if str(c.get("side", "")).upper() == "BUY" else levels[1]
+                    px, sz = float(c["price"]), float(c["size"])
+                    if sz > 0: side[px] = sz
+                    else: side.pop(px, None)
+                    touched[token_id] = None
+            tobs = [self._ws_book(token_id, ev.get("timestamp"), recv) for token_id in touched]
+            if tobs: self._parse.observe(time.perf_counter() - t0)
+            for tob in tobs:
+                if self.on_tob_update: self.on_tob_update(tob.token_id, tob)
+
+    def _ws_book(self, token_id: str, ts_ms: Optional[str], recv: float) -> TopOfBook:
+        """Rebuild a token's book (best level first, like REST) from its WebSocket levels."""
+        bids, asks = self._ws_levels[token_id]
+        book = OrderBookSummary(
+            asset_id=token_id, timestamp=ts_ms,
+            bids=[OrderSummary(price=p, size=bids[p]) for p in sorted(bids, reverse=True)],
+            asks=[OrderSummary(price=p, size=asks[p]) for p in sorted(asks)],
+        )
+        self.versions[token_id] = self.versions.get(token_id, 0) + 1
+        self.books[token_id] = book
+        tob = self.tob[token_id] = TopOfBook(
+            token_id=token_id,
+            ts=self.clock.time(),
+            bid=float(_px(book.bids[0])) if book.bids else None,
+            ask=float(_px(book.asks[0])) if book.asks else None,
+            exchange_ts=exchange_ts(book),
+            recv_mono=recv,
+        )
+        return tob
+
+    def mark_hot(self, token_ids, ttl_sec: float = 5.0) -> None:
+        """Strategy hint: these tokens have an open trigger, keep them fresh."""
+        if self.scheduler: self.scheduler.mark_hot(token_ids, ttl_sec)
+
+    def _poll_once(self, token_id: str) -> Optional[bool]:
+        """Fetch one book; returns whether it changed, or None on error."""
+        try:
+            # Fetch order book
+            sent = self.clock.monotonic()
+            t0 = time.perf_counter()
+            book_response: OrderBookSummary = self.client.get_order_book(token_id)
+            t1 = time.perf_counter()
+            self._fetch.observe(t1 - t0)
+
+            now = self.clock.time()
+            stamps = dict(exchange_ts=exchange_ts(book_response), sent_mono=sent, recv_mono=self.clock.monotonic())
+            # an equal exchange hash is enough; a new one (it may cover the
+            # timestamp) falls back to comparing the level contents
+            h = getattr(book_response, 'hash', None)
+            last = self._digests.get(token_id)
+            digest = last[1] if last and h and h == last[0] else book_digest(book_response)
+            prev = self.tob.get(token_id)
+            unchanged = prev is not None and last is not None and digest == last[1]
+            self._digests[token_id] = (h, digest)
+            if unchanged:
+                # unchanged book: keep the parsed levels, only restamp the TOB
+                self._unchanged.inc()
+                tob = TopOfBook(token_id=token_id, ts=now, bid=prev.bid, ask=prev.ask, **stamps)
+            else:
+                self.versions[token_id] = self.versions.get(token_id, 0) + 1
 
                 # Store book for depth-based fills
                 self.books[token_id] = book_response
 
                 # Extract top of book
-                now = time.time()
                 bid = None
                 ask = None
 
                 if hasattr(book_response, 'bids') and book_response.bids and len(book_response.bids) > 0:
-                    b = book_response.bids[0]
-                    bid = float(b.price if hasattr(b, 'price') else b['price'])
+                    bid = float(_px(book_response.bids[0]))
 
                 if hasattr(book_response, 'asks') and book_response.asks and len(book_response.asks) > 0:
-                    a = book_response.asks[0]
-                    ask = float(a.price if hasattr(a, 'price') else a['price'])
+                    ask = float(_px(book_response.asks[0]))
 
                 # Create TopOfBook
                 tob = TopOfBook(
                     token_id=token_id,
                     ts=now,
                     bid=bid,
-                    ask=ask
+                    ask=ask,
+                    **stamps
                 )
+                self._parse.observe(time.perf_counter() - t1)
 
-                self.tob[token_id] = tob
+            self.tob[token_id] = tob
 
-                # Callback if provided
-                if self.on_tob_update:
-                    self.on_tob_update(token_id, tob)
+            # Callback if provided
+            if self.on_tob_update:
+                self.on_tob_update(token_id, tob)
 
-            except Exception as e:
-                print(f"[LIVE FEED] Error polling {token_id}: {e}")
+            return not unchanged
 
-            await asyncio.sleep(poll_interval)
+        except Exception as e:
+            self._errors.inc()
+            print(f"[LIVE FEED] Error polling {token_id}: {e}")
+            return None
 
     def get_tob(self, token_id: str) -> Optional[TopOfBook]:
         """Get latest top-of-book for a token."""
@@ -99,30 +270,42 @@ class PolymarketLiveFeed:
         """Get latest order book for a token."""
         return self.books.get(token_id)
 
+    def version(self, token_id: str) -> int:
+        """Monotonic per-token book version; unchanged polls keep it."""
+        return self.versions.get(token_id, 0)
+
     def get_book_for_ws_store(self, token_id: str) -> Optional[Dict]:
         """
         Convert Polymarket book format to WSL2BookStore format.
         Returns dict with bids/asks as list of [price, size] pairs.
+        The result is cached per book version: treat it as read-only.
         """
         book = self.books.get(token_id)
         if not book:
             return None
+        v = self.versions.get(token_id, 0)
+        hit = self._converted.get(token_id)
+        if hit is not None and hit[0] == v:
+            return hit[1]
 
+        t0 = time.perf_counter()
         bids = []
         asks = []
 
         if hasattr(book, 'bids') and book.bids:
-            bids = [[float(level.price if hasattr(level, 'price') else level['price']),
-                      float(level.size if hasattr(level, 'size') else level['size'])] for level in book.bids]
+            bids = [[float(_px(level)), float(_sz(level))] for level in book.bids]
 
         if hasattr(book, 'asks') and book.asks:
-            asks = [[float(level.price if hasattr(level, 'price') else level['price']),
-                      float(level.size if hasattr(level, 'size') else level['size'])] for level in book.asks]
+            asks = [[float(_px(level)), float(_sz(level))] for level in book.asks]
 
-        return {
+        self._convert.observe(time.perf_counter() - t0)
+        out = {
             "token_id": token_id,
+            "version": v,
             "payload": {
                 "bids": bids,
                 "asks": asks
             }
         }
+        self._converted[token_id] = (v, out)
+        return out
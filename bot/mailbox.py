@@ -0,0 +1,76 @@
+from __future__ import annotations
+import asyncio
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+from bot.metrics import REGISTRY, MetricsRegistry
+
+class Mailbox:
+    """
+    Latest-value-wins slots, one per key (token). A put overwrites the slot,
+    so memory stays at one value per key however bursty the producer is;
+    each reader sees only the newest value and counts what it skipped.
+    """
+
+    def __init__(self, name: str = "feed", registry: MetricsRegistry = REGISTRY):
+        self.name = name
+        self.registry = registry
+        self._slots: Dict[Hashable, Tuple[int, Any]] = {}  # key -> (seq, value)
+        self._readers: List[MailboxReader] = []
+        self._puts = registry.counter("mailbox_puts_total", mailbox=name)
+
+    def put(self, key: Hashable, value: Any) -> None:
+        prev = self._slots.get(key)
+        self._slots[key] = ((prev[0] + 1) if prev else 1, value)
+        self._puts.inc()
+        for r in self._readers: r._notify(key)
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        s = self._slots.get(key)
+        return s[1] if s else None
+
+    def reader(self, consumer: str) -> "MailboxReader":
+        r = MailboxReader(self, consumer)
+        # a late reader starts with every current value pending and nothing dropped
+        for key, (seq, _) in self._slots.items():
+            r._seen[key] = seq - 1; r._dirty[key] = None
+        self._readers.append(r)
+        return r
+
+class MailboxReader:
+    """One consumer's cursor: per-key last seen seq plus the set of keys with news."""
+
+    def __init__(self, box: Mailbox, consumer: str):
+        self.box = box
+        self._seen: Dict[Hashable, int] = {}
+        self._dirty: Dict[Hashable, None] = {}  # insertion-ordered set
+        self._event: Optional[asyncio.Event] = None
+        self.dropped = 0
+        self._dropped = box.registry.counter("mailbox_dropped_total", mailbox=box.name, consumer=consumer)
+
+    def _notify(self, key: Hashable) -> None:
+        self._dirty[key] = None
+        if self._event is not None: self._event.set()
+
+    def pending(self) -> int:
+        return len(self._dirty)
+
+    def take(self, key: Hashable) -> Optional[Any]:
+        """The newest value for key if it changed since the last take, else None."""
+        if key not in self._dirty: return None
+        del self._dirty[key]
+        seq, value = self.box._slots[key]
+        skipped = seq - self._seen.get(key, 0) - 1
+        if skipped > 0:
+            self.dropped += skipped; self._dropped.inc(skipped)
+        self._seen[key] = seq
+        return value
+
+    def take_all(self) -> Dict[Hashable, Any]:
+        """Newest value of every key that changed, in first-changed order."""
+        return {k: v for k in list(self._dirty) if (v := self.take(k)) is not None}
+
+    async def wait(self) -> None:
+        """Block until some key has a value this reader has not taken."""
+        if self._event is None: self._event = asyncio.Event()
+        while not self._dirty:
+            self._event.clear()
+            await self._event.wait()
@@ -0,0 +1,186 @@
+from __future__ import annotations
+import asyncio, json, os, time
+from typing import Dict, Any, Optional, Tuple
+
+_Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+class Histogram:
+    """
+    HDR-style log-linear histogram. Values are stored as integer multiples of
+    `unit`; below 2**sub_bits they are exact, above that each power of two is
+    split into 2**(sub_bits-1) linear sub-buckets (~3% relative error at 5 bits).
+    """
+    __slots__ = ("unit", "sub_bits", "_half", "counts", "count", "sum", "min", "max")
+
+    def __init__(self, *, unit: float = 1e-6, sub_bits: int = 5):
+        self.unit = float(unit)
+        self.sub_bits = int(sub_bits)
+        self._half = 1 << (self.sub_bits - 1)
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def _index(self, n: int) -> int:
+        shift = n.bit_length() - self.sub_bits
+        if shift <= 0: return n
+        return shift * self._half + (n >> shift)
+
+    def _bounds(self, idx: int) -> Tuple[int, int]:
+        if idx < 2 * self._half: return idx, idx
+        shift = idx // self._half - 1
+        mant = idx - shift * self._half
+        return mant << shift, ((mant + 1) << shift) - 1
+
+    def reset(self) -> None:
+        self.counts.clear()
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def copy(self) -> "Histogram":
+        h = Histogram(unit=self.unit, sub_bits=self.sub_bits)
+        h.merge(self)
+        return h
+
+    def merge(self, other: "Histogram") -> None:
+        """Add another histogram's samples (same unit and sub_bits) into this one."""
+        for idx, n in other.counts.items(): self.counts[idx] = self.counts.get(idx, 0) + n
+        self.count += other.count
+        self.sum += other.sum
+        if other.min < self.min: self.min = other.min
+        if other.max > self.max: self.max = other.max
+
+    def observe(self, v: float) -> None:
+        if v < 0: v = 0.0
+        idx = self._index(int(v / self.unit))
+        self.counts[idx] = self.counts.get(idx, 0) + 1
+        self.count += 1
+        self.sum += v
+        if v < self.min: self.min = v
+        if v > self.max: self.max = v
+
+    def percentile(self, q: float) -> float:
+        if self.count == 0: return 0.0
+        target = q * self.count
+        seen = 0
+        for idx in sorted(self.counts):
+            seen += self.counts[idx]
+            if seen >= target:
+                lo, hi = self._bounds(idx)
+                return min(self.max, (lo + hi) / 2.0 * self.unit)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+            "p50": self.percentile(0.50),
+            "p90": self.percentile(0.90),
+            "p99": self.percentile(0.99),
+            "p999": self.percentile(0.999),
+        }
+
+class Counter:
+    __slots__ = ("value",)
+    def __init__(self): self.value = 0.0
+    def inc(self, n: float = 1.0) -> None: self.value += n
+
+class Gauge:
+    __slots__ = ("value",)
+    def __init__(self): self.value = 0.0
+    def set(self, v: float) -> None: self.value = float(v)
+
+def _key(name: str, labels: Dict[str, Any]) -> _Key:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+class MetricsRegistry:
+    def __init__(self):
+        self.histograms: Dict[_Key, Histogram] = {}
+        self.counters: Dict[_Key, Counter] = {}
+        self.gauges: Dict[_Key, Gauge] = {}
+
+    def histogram(self, name: str, **labels: Any) -> Histogram:
+        k = _key(name, labels)
+        h = self.histograms.get(k)
+        if h is None: h = self.histograms[k] = Histogram()
+        return h
+
+    def counter(self, name: str, **labels: Any) -> Counter:
+        k = _key(name, labels)
+        c = self.counters.get(k)
+        if c is None: c = self.counters[k] = Counter()
+        return c
+
+    def gauge(self, name: str, **labels: Any) -> Gauge:
+        k = _key(name, labels)
+        g = self.gauges.get(k)
+        if g is None: g = self.gauges[k] = Gauge()
+        return g
+
+    def reset(self) -> None:
+        for h in self.histograms.values(): h.reset()
+        for c in self.counters.values(): c.value = 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        def flat(items):
+            return [{"name": n, "labels": dict(l), **v} for (n, l), v in items]
+        return {
+            "ts": time.time(),
+            "counters": flat(((k, {"value": c.value}) for k, c in self.counters.items())),
+            "gauges": flat(((k, {"value": g.value}) for k, g in self.gauges.items())),
+            "histograms": flat(((k, h.summary()) for k, h in self.histograms.items())),
+        }
+
+    def write_snapshot(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(tmp, path)
+
+REGISTRY = MetricsRegistry()
+
+class LoopLagMonitor:
+    """
+    Watchdog task: how late the event loop wakes a periodic real-time sleep.
+    With `path` set, the latest lag is also written there ("<ts> <lag>", at
+    most once a second) for an external supervisor to read.
+    """
+
+    def __init__(self, interval_sec: float = 0.25, registry: MetricsRegistry = REGISTRY, path: Optional[str] = None):
+        self.interval_sec = float(interval_sec)
+        self.hist = registry.histogram("event_loop_lag_seconds")
+        self.last = registry.gauge("event_loop_lag_last_seconds")
+        self.path = path
+        self._written = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None: return
+        self._task.cancel()
+        try: await self._task
+        except asyncio.CancelledError: pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            t0 = time.perf_counter()
+            await asyncio.sleep(self.interval_sec)
+            lag = max(0.0, time.perf_counter() - t0 - self.interval_sec)
+            self.hist.observe(lag)
+            self.last.set(lag)
+            if self.path and time.time() - self._written >= 1.0:
+                self._written = time.time()
+                try:
+                    with open(self.path + ".tmp", "w", encoding="utf-8") as f: f.write(f"{self._written:.3f} {lag:.6f}\n")
+                    os.replace(self.path + ".tmp", self.path)
+                except OSError: pass
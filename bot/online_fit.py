@@ -0,0 +1,57 @@
+from __future__ import annotations
+import math
+from typing import Optional
+
+class RecursiveLeastSquares:
+    """
+    Online fit of y = intercept + beta * x with exponential forgetting.
+    Two-parameter RLS with an explicit 2x2 covariance, so each update is O(1).
+    Residual variance is an exponentially weighted mean of the a-priori errors.
+    """
+
+    def __init__(self, *, beta: float = 1.0, intercept: float = 0.0, forgetting: float = 0.995, delta: float = 100.0, warmup_points: int = 30):
+        self.beta = float(beta)
+        self.intercept = float(intercept)
+        self.lam = float(forgetting)
+        self.warmup_points = int(warmup_points)
+        # P = [[p00, p01], [p01, p11]] for theta = [beta, intercept]
+        self._p00 = float(delta); self._p01 = 0.0; self._p11 = float(delta)
+        self.resid_var = 0.0
+        self.n = 0
+
+    @property
+    def ready(self) -> bool:
+        return self.n >= self.warmup_points
+
+    def update(self, x: float, y: float) -> float:
+        """Feed one paired observation; returns the a-priori residual."""
+        lam = self.lam
+        p00, p01, p11 = self._p00, self._p01, self._p11
+        px0 = p00 * x + p01
+        px1 = p01 * x + p11
+        denom = lam + x * px0 + px1
+        k0 = px0 / denom; k1 = px1 / denom
+        err = y - (self.intercept + self.beta * x)
+        self.beta += k0 * err
+        self.intercept += k1 * err
+        self._p00 = (p00 - k0 * px0) / lam
+        self._p01 = (p01 - k0 * px1) / lam
+        self._p11 = (p11 - k1 * px1) / lam
+        self.resid_var = err * err if self.n == 0 else lam * self.resid_var + (1.0 - lam) * err * err
+        self.n += 1
+        return err
+
+    def state(self) -> dict:
+        return {"beta": self.beta, "intercept": self.intercept, "p": (self._p00, self._p01, self._p11), "resid_var": self.resid_var, "n": self.n}
+
+    def restore(self, st: dict) -> None:
+        self.beta = float(st["beta"]); self.intercept = float(st["intercept"])
+        self._p00, self._p01, self._p11 = st["p"]
+        self.resid_var = float(st["resid_var"]); self.n = int(st["n"])
+
+    def predict(self, x: float) -> float:
+        return self.intercept + self.beta * x
+
+    def zscore(self, fair: float, mid: float) -> Optional[float]:
+        if not self.ready or self.resid_var <= 0: return None
+        return (fair - mid) / math.sqrt(self.resid_var)
@@ -1,14 +1,21 @@
 from __future__ import annotations
 import csv, os, time
+from typing import Optional
+from bot.clock import Clock, WallClock
+from bot.metrics import REGISTRY, MetricsRegistry
 
 class AttemptLogger:
-    def __init__(self, path: str):
+    def __init__(self, path: str, clock: Optional[Clock] = None, registry: MetricsRegistry = REGISTRY):
         self.path = path
+        self._csv = registry.histogram("csv_write_seconds", file="attempts")
+        self.clock = clock or WallClock()
         os.makedirs(os.path.dirname(self.path), exist_ok=True)
         if not os.path.exists(self.path):
             with open(self.path, "w", newline="", encoding="utf-8") as f:
                 csv.writer(f).writerow(["ts","token_id","side","limit_price","size_usd","ok","reason"])
 
     def log(self, token_id: str, side: str, limit_price: float, size_usd: float, ok: bool, reason: str):
+        t0 = time.perf_counter()
         with open(self.path, "a", newline="", encoding="utf-8") as f:
-            csv.writer(f).writerow([time.time(), token_id, side, limit_price, size_usd, int(ok), reason])
+            csv.writer(f).writerow([self.clock.time(), token_id, side, limit_price, size_usd, int(ok), reason])
+        self._csv.observe(time.perf_counter() - t0)
@@ -0,0 +1,134 @@
+from __future__ import annotations
+import bisect, json, lzma, os, struct, zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Tape = <path> (framed blocks) + <path>.idx (one "start_ts,offset,length" line per block).
+# Every block opens with a keyframe of every known token's book, followed by
+# level diffs ("D" records, size 0 = level removed), so seeking to any
+# timestamp decodes exactly one block.
+_FRAME = struct.Struct("<IB")
+_CODECS = {"none": 0, "zlib": 1, "lzma": 2}
+
+def _encode(raw: bytes, codec: int) -> bytes:
+    if codec == 1: return zlib.compress(raw, 6)
+    if codec == 2: return lzma.compress(raw, preset=1)
+    return raw
+
+def _decode(data: bytes, codec: int) -> bytes:
+    if codec == 1: return zlib.decompress(data)
+    if codec == 2: return lzma.decompress(data)
+    return data
+
+Side = Dict[float, float]
+
+def _diff(old: Side, new: Side) -> List[List[float]]:
+    out = [[px, sz] for px, sz in new.items() if old.get(px) != sz]
+    out += [[px, 0.0] for px in old if px not in new]
+    return out
+
+def _levels(side: Side, bids: bool) -> List[List[float]]:
+    return [[px, side[px]] for px in sorted(side, reverse=bids)]
+
+class BookTapeWriter:
+    def __init__(self, path: str, *, keyframe_interval_sec: float = 60.0, compress: str = "zlib"):
+        self.path = path
+        self.keyframe_interval_sec = float(keyframe_interval_sec)
+        self.codec = _CODECS[compress or "none"]
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._f = open(path, "ab")
+        self._idx = open(path + ".idx", "a", encoding="utf-8")
+        self._state: Dict[str, Tuple[Side, Side]] = {}
+        self._block: List[list] = []
+        self._block_ts: Optional[float] = None
+        self.records = 0
+        self.bytes_written = 0
+
+    def record(self, ts: float, token_id: str, bids: List[List[float]], asks: List[List[float]]) -> None:
+        nb: Side = {float(p): float(s) for p, s in bids if float(s) > 0}
+        na: Side = {float(p): float(s) for p, s in asks if float(s) > 0}
+        if self._block_ts is None or ts - self._block_ts >= self.keyframe_interval_sec:
+            self._start_block(ts)
+        prev = self._state.get(token_id)
+        if prev is None:
+            self._block.append(["K", ts, token_id, _levels(nb, True), _levels(na, False)])
+        else:
+            db, da = _diff(prev[0], nb), _diff(prev[1], na)
+            if not db and not da:
+                self._state[token_id] = (nb, na); return
+            self._block.append(["D", ts, token_id, db, da])
+        self._state[token_id] = (nb, na)
+        self.records += 1
+
+    def _start_block(self, ts: float) -> None:
+        self._flush_block()
+        self._block_ts = ts
+        self._block = [["K", ts, t, _levels(b, True), _levels(a, False)] for t, (b, a) in self._state.items()]
+
+    def _flush_block(self) -> None:
+        if self._block_ts is None or not self._block: return
+        payload = _encode(json.dumps(self._block, separators=(",", ":")).encode(), self.codec)
+        off = self._f.tell()
+        self._f.write(_FRAME.pack(len(payload), self.codec)); self._f.write(payload); self._f.flush()
+        self._idx.write(f"{self._block_ts!r},{off},{_FRAME.size + len(payload)}\n"); self._idx.flush()
+        self.bytes_written += _FRAME.size + len(payload)
+        self._block = []
+
+    def close(self) -> None:
+        self._flush_block()
+        self._f.close(); self._idx.close()
+
+class BookTapeReader:
+    def __init__(self, path: str):
+        self.path = path
+        self.index: List[Tuple[float, int, int]] = []
+        with open(path + ".idx", "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    ts, off, n = line.strip().split(",")
+                    self.index.append((float(ts), int(off), int(n)))
+                except ValueError:
+                    continue
+        self._starts = [e[0] for e in self.index]
+
+    def _block(self, i: int) -> list:
+        _, off, n = self.index[i]
+        with open(self.path, "rb") as f:
+            f.seek(off); buf = f.read(n)
+        length, codec = _FRAME.unpack_from(buf)
+        return json.loads(_decode(buf[_FRAME.size:_FRAME.size + length], codec))
+
+    def seek(self, ts: float) -> Dict[str, Tuple[List[List[float]], List[List[float]]]]:
+        """Book state of every token as of `ts`, decoding only the block that covers it."""
+        i = bisect.bisect_right(self._starts, ts) - 1
+        if i < 0: return {}
+        state: Dict[str, Tuple[Side, Side]] = {}
+        for rec in self._block(i):
+            if rec[1] > ts: break
+            _apply(state, rec)
+        return {t: (_levels(b, True), _levels(a, False)) for t, (b, a) in state.items()}
+
+    def replay(self, start_ts: Optional[float] = None, end_ts: Optional[float] = None) -> Iterator[dict]:
+        """Yield full-book messages (WSL2BookStore.on_message format) from start_ts on."""
+        i = 0 if start_ts is None else max(0, bisect.bisect_right(self._starts, start_ts) - 1)
+        state: Dict[str, Tuple[Side, Side]] = {}
+        for j in range(i, len(self.index)):
+            for rec in self._block(j):
+                ts, token_id = rec[1], rec[2]
+                if end_ts is not None and ts > end_ts: return
+                _apply(state, rec)
+                if start_ts is not None and ts < start_ts: continue
+                b, a = state[token_id]
+                yield {"token_id": token_id, "ts": ts, "payload": {"bids": _levels(b, True), "asks": _levels(a, False)}}
+
+def _apply(state: Dict[str, Tuple[Side, Side]], rec: list) -> None:
+    kind, _, token_id, bids, asks = rec
+    if kind == "K" or token_id not in state:
+        state[token_id] = ({p: s for p, s in bids}, {p: s for p, s in asks})
+        return
+    b, a = state[token_id]
+    for p, s in bids:
+        if s > 0: b[p] = s
+        else: b.pop(p, None)
+    for p, s in asks:
+        if s > 0: a[p] = s
+        else: a.pop(p, None)
@@ -1,22 +1,16 @@
 from __future__ import annotations
-import csv, os, time
-from dataclasses import dataclass
-from typing import Dict, List, Optional
+import time
+from typing import Dict, Optional
 from bot.types import OrderIntent, OrderBook, TopOfBook
 from bot.paper.depth_fill import fok_fill_vwap_against_depth
-
-@dataclass
-class Fill:
-    ts: float
-    token_id: str
-    side: str
-    price: float
-    size_usd: float
-    shares: float
-    reason: str
+from bot.paper.fill_ledger import Fill, FillLedger
+from bot.clock import Clock, WallClock
+from bot.metrics import REGISTRY, MetricsRegistry
 
 class PaperBroker:
-    def __init__(self, *, starting_cash_usd: float, fee_bps: float, slippage_bps: float, mark_method: str = "mid", save_fills_csv: bool = True, fills_csv_path: str = "./data/paper_fills.csv"):
+    def __init__(self, *, starting_cash_usd: float, fee_bps: float, slippage_bps: float, mark_method: str = "mid", save_fills_csv: bool = True, fills_csv_path: str = "./data/paper_fills.csv", fills_tail_size: int = 10_000, clock: Optional[Clock] = None, registry: MetricsRegistry = REGISTRY):
+        self.clock = clock or WallClock()
+        self._depth_fill = registry.histogram("depth_fill_seconds")
         self.cash = float(starting_cash_usd)
         self.fee_bps = float(fee_bps)
         self.slippage_bps = float(slippage_bps)
@@ -25,32 +19,65 @@ class PaperBroker:
         self.fills_csv_path = fills_csv_path
         self.pos_shares: Dict[str, float] = {}
         self.realized_pnl: float = 0.0
-        self.fills: List[Fill] = []
-        if self.save_fills_csv:
-            os.makedirs(os.path.dirname(self.fills_csv_path), exist_ok=True)
-            if not os.path.exists(self.fills_csv_path):
-                with open(self.fills_csv_path, "w", newline="", encoding="utf-8") as f:
-                    csv.writer(f).writerow(["ts","token_id","side","price","size_usd","shares","reason"])
+        self.fills = FillLedger(self.fills_csv_path if self.save_fills_csv else None, tail_size=fills_tail_size, registry=registry)
+        # incremental mark-to-market: last mid per token and sum(pos * mid) over marked tokens
+        self._marks: Dict[str, float] = {}
+        self._pos_value = 0.0
     def try_fill_fok_with_depth(self, intent: OrderIntent, book: OrderBook, reason: str = "", *, extra_slippage_bps: float = 0.0, liquidity_shrink: float = 0.0) -> Optional[Fill]:
+        t0 = time.perf_counter()
         res = fok_fill_vwap_against_depth(intent, book, fee_bps=self.fee_bps, slippage_bps=self.slippage_bps, extra_slippage_bps=extra_slippage_bps, liquidity_shrink=liquidity_shrink)
+        self._depth_fill.observe(time.perf_counter() - t0)
         if not res.ok: return None
-        ts = time.time()
-        side = intent.side.upper()
+        return self._book_fill(intent.token_id, intent.side.upper(), res.avg_price, res.filled_usd, res.filled_shares, reason)
+    def record_passive_fill(self, token_id: str, side: str, price: float, shares: float, reason: str = "") -> Optional[Fill]:
+        """Book a resting-order fill from the matching engine (maker: fee, no slippage)."""
+        fee = self.fee_bps / 10_000.0
+        side = side.upper()
+        eff_px = price * (1.0 + fee) if side == "BUY" else price * (1.0 - fee)
+        return self._book_fill(token_id, side, eff_px, eff_px * shares, shares, reason)
+    def _book_fill(self, token_id: str, side: str, price: float, usd: float, shares: float, reason: str) -> Optional[Fill]:
         if side == "BUY":
-            if self.cash < res.filled_usd: return None
-            self.cash -= res.filled_usd
-            self.pos_shares[intent.token_id] = self.pos_shares.get(intent.token_id, 0.0) + res.filled_shares
+            if self.cash < usd: return None
+            self.cash -= usd
+            self.pos_shares[token_id] = self.pos_shares.get(token_id, 0.0) + shares
+            self._pos_value += shares * self._marks.get(token_id, 0.0)
         else:
-            have = self.pos_shares.get(intent.token_id, 0.0)
-            if have + 1e-9 < res.filled_shares: return None
-            self.pos_shares[intent.token_id] = have - res.filled_shares
-            self.cash += res.filled_usd
-        fill = Fill(ts, intent.token_id, side, res.avg_price, res.filled_usd, res.filled_shares, reason)
+            have = self.pos_shares.get(token_id, 0.0)
+            if have + 1e-9 < shares: return None
+            self.pos_shares[token_id] = have - shares
+            self._pos_value -= shares * self._marks.get(token_id, 0.0)
+            self.cash += usd
+        fill = Fill(self.clock.time(), token_id, side, price, usd, shares, reason)
         self.fills.append(fill)
-        if self.save_fills_csv:
-            with open(self.fills_csv_path, "a", newline="", encoding="utf-8") as f:
-                csv.writer(f).writerow([fill.ts, fill.token_id, fill.side, fill.price, fill.size_usd, fill.shares, fill.reason])
         return fill
+    def state(self) -> dict:
+        return {"cash": self.cash, "realized_pnl": self.realized_pnl, "pos_shares": dict(self.pos_shares), "fills": self.fills.state()}
+    def restore(self, st: dict) -> None:
+        self.cash = float(st["cash"])
+        self.realized_pnl = float(st["realized_pnl"])
+        self.pos_shares = dict(st["pos_shares"])
+        self.fills.restore(st["fills"])
+        self.reconcile_marks()
+    def mark(self, token_id: str, mid: Optional[float]) -> None:
+        """Apply a mid change: O(1) update of the position value."""
+        if mid is None: return
+        old = self._marks.get(token_id)
+        if old == mid: return
+        self._marks[token_id] = mid
+        sh = self.pos_shares.get(token_id)
+        if sh: self._pos_value += sh * (mid - (old or 0.0))
+    @property
+    def equity(self) -> float:
+        return self.cash + self._pos_value
+    @property
+    def unrealized(self) -> float:
+        return self._pos_value - self.realized_pnl
+    def reconcile_marks(self) -> float:
+        """Full recompute of the position value from the marks; returns the drift it removed."""
+        exact = sum(sh * self._marks[t] for t, sh in self.pos_shares.items() if abs(sh) >= 1e-9 and t in self._marks)
+        drift = self._pos_value - exact
+        self._pos_value = exact
+        return drift
     def equity_mark_to_market(self, tob: Dict[str, TopOfBook]) -> float:
         eq = self.cash
         for token, sh in self.pos_shares.items():
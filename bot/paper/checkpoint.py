@@ -0,0 +1,33 @@
+from __future__ import annotations
+import os, pickle, struct, zlib
+from typing import Any, Dict, Optional
+
+# <magic 4s><version H><crc32 I><payload> where payload is a pickled dict of
+# plain values and array('d') windows. Written to a temp file and renamed, so
+# a crash mid-write leaves the previous checkpoint intact.
+_MAGIC = b"PMCK"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHI")
+
+def write_checkpoint(path: str, state: Dict[str, Any]) -> int:
+    payload = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, zlib.crc32(payload)))
+        f.write(payload)
+    os.replace(tmp, path)
+    return _HEADER.size + len(payload)
+
+def read_checkpoint(path: str) -> Optional[Dict[str, Any]]:
+    """The stored state, or None when the file is missing, foreign or corrupt."""
+    try:
+        with open(path, "rb") as f:
+            buf = f.read()
+    except OSError:
+        return None
+    if len(buf) < _HEADER.size: return None
+    magic, version, crc = _HEADER.unpack_from(buf)
+    payload = buf[_HEADER.size:]
+    if magic != _MAGIC or version != _VERSION or zlib.crc32(payload) != crc: return None
+    return pickle.loads(payload)
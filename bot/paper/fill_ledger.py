@@ -0,0 +1,132 @@
+from __future__ import annotations
+import csv, os, time
+from array import array
+from dataclasses import dataclass
+from itertools import islice
+from typing import Dict, Iterator, List, Optional
+from bot.metrics import REGISTRY, MetricsRegistry
+
+_SIDES = ("BUY", "SELL")
+
+@dataclass
+class Fill:
+    ts: float
+    token_id: str
+    side: str
+    price: float
+    size_usd: float
+    shares: float
+    reason: str
+
+class FillLedger:
+    """
+    Struct-of-arrays fill store. Every fill is appended to the run's CSV (the
+    on-disk store); only the newest `tail_size` fills stay in memory, with
+    token ids and reasons interned. Counters cover the whole run and are O(1).
+    """
+
+    def __init__(self, path: Optional[str] = None, *, tail_size: int = 10_000, registry: MetricsRegistry = REGISTRY):
+        self.path = path
+        self._csv = registry.histogram("csv_write_seconds", file="fills")
+        self.tail_size = max(2, int(tail_size))
+        self.tokens: List[str] = []
+        self._token_idx: Dict[str, int] = {}
+        self._reasons: List[str] = []
+        self._reason_idx: Dict[str, int] = {}
+        self._ts = array("d"); self._price = array("d"); self._usd = array("d"); self._shares = array("d")
+        self._side = array("B"); self._token = array("I"); self._reason = array("I")
+        self.count = 0
+        self.spilled = 0
+        self.buys = 0
+        self.buy_usd = 0.0
+        self.sell_usd = 0.0
+        self.per_token = array("Q")
+        if self.path:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            if not os.path.exists(self.path):
+                with open(self.path, "w", newline="", encoding="utf-8") as f:
+                    csv.writer(f).writerow(["ts","token_id","side","price","size_usd","shares","reason"])
+
+    @property
+    def sells(self) -> int:
+        return self.count - self.buys
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _intern_token(self, token_id: str) -> int:
+        i = self._token_idx.get(token_id)
+        if i is None:
+            i = self._token_idx[token_id] = len(self.tokens)
+            self.tokens.append(token_id); self.per_token.append(0)
+        return i
+
+    def _intern_reason(self, reason: str) -> int:
+        i = self._reason_idx.get(reason)
+        if i is None:
+            i = self._reason_idx[reason] = len(self._reasons)
+            self._reasons.append(reason)
+        return i
+
+    def append(self, fill: Fill) -> None:
+        if self.path:
+            t0 = time.perf_counter()
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerow([fill.ts, fill.token_id, fill.side, fill.price, fill.size_usd, fill.shares, fill.reason])
+            self._csv.observe(time.perf_counter() - t0)
+        if len(self._ts) >= self.tail_size:
+            self._spill(self.tail_size // 2)
+        t = self._intern_token(fill.token_id)
+        self._ts.append(fill.ts); self._price.append(fill.price); self._usd.append(fill.size_usd); self._shares.append(fill.shares)
+        self._side.append(0 if fill.side == "BUY" else 1); self._token.append(t); self._reason.append(self._intern_reason(fill.reason))
+        self.count += 1
+        self.per_token[t] += 1
+        if fill.side == "BUY":
+            self.buys += 1; self.buy_usd += fill.size_usd
+        else:
+            self.sell_usd += fill.size_usd
+
+    def _spill(self, n: int) -> None:
+        # the CSV already holds these rows; drop them from memory and re-intern
+        # the surviving reasons so the reason table stays bounded too
+        for col in (self._ts, self._price, self._usd, self._shares, self._side, self._token, self._reason):
+            del col[:n]
+        old = self._reasons
+        self._reasons = []; self._reason_idx = {}
+        for i, r in enumerate(self._reason):
+            self._reason[i] = self._intern_reason(old[r])
+        self.spilled += n
+
+    def _row(self, i: int) -> Fill:
+        return Fill(self._ts[i], self.tokens[self._token[i]], _SIDES[self._side[i]], self._price[i], self._usd[i], self._shares[i], self._reasons[self._reason[i]])
+
+    def tail(self, n: Optional[int] = None) -> List[Fill]:
+        """The newest n in-memory fills (all of them when n is None), oldest first."""
+        k = len(self._ts)
+        return [self._row(i) for i in range(k - min(k, n if n is not None else k), k)]
+
+    def __iter__(self) -> Iterator[Fill]:
+        """Every fill of the run: spilled ones are streamed back from the CSV."""
+        if self.spilled and self.path:
+            with open(self.path, "r", newline="", encoding="utf-8") as f:
+                rd = csv.reader(f); next(rd, None)
+                for r in islice(rd, self.spilled):
+                    yield Fill(float(r[0]), r[1], r[2], float(r[3]), float(r[4]), float(r[5]), r[6])
+        for i in range(len(self._ts)):
+            yield self._row(i)
+
+    def state(self) -> dict:
+        return {
+            "tokens": list(self.tokens), "reasons": list(self._reasons),
+            "cols": [array(c.typecode, c) for c in (self._ts, self._price, self._usd, self._shares, self._side, self._token, self._reason)],
+            "count": self.count, "spilled": self.spilled, "buys": self.buys, "buy_usd": self.buy_usd, "sell_usd": self.sell_usd,
+            "per_token": array("Q", self.per_token),
+        }
+
+    def restore(self, st: dict) -> None:
+        self.tokens = list(st["tokens"]); self._token_idx = {t: i for i, t in enumerate(self.tokens)}
+        self._reasons = list(st["reasons"]); self._reason_idx = {r: i for i, r in enumerate(self._reasons)}
+        self._ts, self._price, self._usd, self._shares, self._side, self._token, self._reason = (array(c.typecode, c) for c in st["cols"])
+        self.count = int(st["count"]); self.spilled = int(st["spilled"]); self.buys = int(st["buys"])
+        self.buy_usd = float(st["buy_usd"]); self.sell_usd = float(st["sell_usd"])
+        self.per_token = array("Q", st["per_token"])
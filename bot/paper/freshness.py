@@ -0,0 +1,51 @@
+from __future__ import annotations
+from typing import Any, Dict, Optional, Tuple
+from bot.metrics import REGISTRY, Histogram, MetricsRegistry
+from bot.types import TopOfBook
+
+# stages: "recv" when a poll lands, "decision" when a trigger picks the token,
+# "fill" when a simulated fill is booked off the book the loop last saw.
+# kinds: "local" = clock.monotonic() - recv_mono, "exchange" = clock.time() -
+# exchange_ts (includes clock skew), "rtt" = recv_mono - sent_mono.
+_STAGES = ("decision", "fill")
+
+class FreshnessTracker:
+    """Per-token data age histograms for the run summary."""
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY):
+        self._age = {s: registry.histogram("data_age_seconds", stage=s) for s in _STAGES}
+        self._h: Dict[Tuple[str, str, str], Histogram] = {}
+
+    def _obs(self, token_id: str, stage: str, kind: str, v: float) -> None:
+        h = self._h.get((token_id, stage, kind))
+        if h is None: h = self._h[(token_id, stage, kind)] = Histogram()
+        h.observe(v)
+
+    def on_recv(self, tob: TopOfBook) -> None:
+        if tob.exchange_ts is not None: self._obs(tob.token_id, "recv", "exchange", tob.ts - tob.exchange_ts)
+        if tob.sent_mono is not None and tob.recv_mono is not None: self._obs(tob.token_id, "recv", "rtt", tob.recv_mono - tob.sent_mono)
+
+    def observe(self, stage: str, tob: Optional[TopOfBook], *, now: float, now_mono: float) -> Optional[float]:
+        """Record the age of the data behind `stage`; returns the local age in seconds."""
+        if tob is None: return None
+        age = None
+        if tob.recv_mono is not None:
+            age = max(0.0, now_mono - tob.recv_mono)
+            self._obs(tob.token_id, stage, "local", age)
+            if stage in self._age: self._age[stage].observe(age)
+        if tob.exchange_ts is not None: self._obs(tob.token_id, stage, "exchange", now - tob.exchange_ts)
+        return age
+
+    def summary(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        for (token, stage, kind), h in sorted(self._h.items()):
+            s = h.summary()
+            out.setdefault(token, {}).setdefault(stage, {})[kind] = {k: s[k] for k in ("count", "p50", "p90", "p99", "max")}
+        return out
+
+    def state(self) -> dict:
+        # copies: the checkpoint is pickled off the loop while observe() keeps mutating the live ones
+        return {"h": {k: h.copy() for k, h in self._h.items()}}
+
+    def restore(self, st: dict) -> None:
+        self._h = dict(st.get("h", {}))
@@ -1,6 +1,8 @@
 from __future__ import annotations
 from dataclasses import dataclass
-import asyncio, random
+import random
+from typing import Optional
+from bot.clock import Clock, WallClock
 
 @dataclass(frozen=True)
 class LatencyProfile:
@@ -11,11 +13,14 @@ class LatencyProfile:
     drop_prob: float
 
 class RegionLatency:
-    def __init__(self, profiles: dict[str, LatencyProfile], region: str):
+    def __init__(self, profiles: dict[str, LatencyProfile], region: str, clock: Optional[Clock] = None):
         self.profiles = profiles
         self.region = region
+        self.clock = clock or WallClock()
     def _p(self) -> LatencyProfile:
         return self.profiles.get(self.region) or LatencyProfile(150,45,0.08,250,0.01)
+    @property
+    def profile(self) -> LatencyProfile: return self._p()
     async def wait(self) -> tuple[bool, float]:
         p = self._p()
         if random.random() < p.drop_prob:
@@ -25,5 +30,5 @@ class RegionLatency:
         if random.random() < p.tail_prob:
             ms += p.extra_tail_ms
         sec = ms / 1000.0
-        await asyncio.sleep(sec)
+        await self.clock.sleep(sec)
         return (True, sec)
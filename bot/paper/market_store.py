@@ -0,0 +1,57 @@
+from __future__ import annotations
+import hashlib, json, os
+from typing import Any, Dict, Optional
+try:
+    import fcntl
+except ImportError:  # no flock: every holder writes, as with per-run logs
+    fcntl = None
+
+# Market-level series that every variant trading a pair would log identically
+# live once per pair under <shared_dir>/<pair key>/. Concurrent runs (threads,
+# tasks or worker processes) share it through a WriterLease: whoever holds the
+# lease appends, the others skip, and the lease moves on when its holder stops.
+
+def pair_key(token_a: str, token_b: str) -> str:
+    return hashlib.sha1(f"{token_a}:{token_b}".encode()).hexdigest()[:12]
+
+def shared_path(shared_dir: str, token_a: str, token_b: str, name: str) -> str:
+    return os.path.abspath(os.path.join(shared_dir, pair_key(token_a, token_b), name))
+
+class WriterLease:
+    """Non-blocking exclusive flock on <path>.lock; the OS drops it if the holder dies."""
+
+    def __init__(self, path: str):
+        self.path = path + ".lock"
+        self.state_path = path + ".handover.json"
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._f = None
+        self.held = False
+
+    def acquire(self) -> bool:
+        """True if this lease is held after the call; True on the call that acquires it too."""
+        if self.held: return True
+        if self._f is None: self._f = open(self.path, "a+")
+        if fcntl is not None:
+            try: fcntl.flock(self._f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError: return False
+        self.held = True
+        return True
+
+    def take_handover(self) -> Optional[Dict[str, Any]]:
+        """State the previous holder left on release; consumed so a crashed holder's stale copy is never reused."""
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f: st = json.load(f)
+            os.remove(self.state_path)
+            return st
+        except (OSError, ValueError):
+            return None
+
+    def release(self, handover: Optional[Dict[str, Any]] = None) -> None:
+        if self.held and handover is not None:
+            tmp = self.state_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f: json.dump(handover, f)
+            os.replace(tmp, self.state_path)
+        if self._f is not None:
+            if self.held and fcntl is not None: fcntl.flock(self._f.fileno(), fcntl.LOCK_UN)
+            self._f.close(); self._f = None
+        self.held = False
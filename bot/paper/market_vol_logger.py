@@ -1,22 +1,52 @@
 from __future__ import annotations
 import csv, os, time
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Optional, Sequence
+from bot.clock import Clock, WallClock
+from bot.metrics import REGISTRY, MetricsRegistry
+from bot.paper.rollup import Rollup
+from bot.paper.market_store import WriterLease
 
 @dataclass
 class MarketVolLogger:
     path: str
     log_interval_sec: float = 1.0
+    clock: Clock = field(default_factory=WallClock)
+    rollup_resolutions: Sequence[int] = ()  # seconds; bars go to <path>.<res>s.csv
+    shared: bool = False  # path is a per-pair shared series: log only while holding its writer lease
+    registry: MetricsRegistry = field(default=REGISTRY, repr=False)
     def __post_init__(self):
         os.makedirs(os.path.dirname(self.path), exist_ok=True)
         if not os.path.exists(self.path):
             with open(self.path, "w", newline="", encoding="utf-8") as f:
                 csv.writer(f).writerow(["ts","token_id","mid"])
         self._last = 0.0
+        self._csv = self.registry.histogram("csv_write_seconds", file="market_mid")
+        self.rollup = Rollup(self.path, self.rollup_resolutions, self.registry) if self.rollup_resolutions else None
+        self.lease = WriterLease(self.path) if self.shared else None
     def maybe_log(self, token_id: str, mid: Optional[float]):
         if mid is None: return
-        now = time.time()
+        if self.lease and not self.lease.held:
+            if not self.lease.acquire(): return
+            # continue the open bars of the writer we took over from
+            st = self.lease.take_handover()
+            if self.rollup and st: self.rollup.restore(st)
+        now = self.clock.time()
+        if self.rollup: self.rollup.add(now, mid, token_id)
         if now - self._last < self.log_interval_sec: return
         self._last = now
+        t0 = time.perf_counter()
         with open(self.path, "a", newline="", encoding="utf-8") as f:
             csv.writer(f).writerow([now, token_id, float(mid)])
+        self._csv.observe(time.perf_counter() - t0)
+    def close(self):
+        if self.lease and not self.lease.held:
+            self.lease.release(); return
+        if self.rollup: self.rollup.close()
+        # the next holder rewrites these bars with the rest of their buckets; readers keep the last row
+        if self.lease: self.lease.release(self.rollup.state() if self.rollup else None)
+    def state(self) -> dict:
+        return {"last": self._last, "rollup": self.rollup.state() if self.rollup and not self.lease else None}
+    def restore(self, st: dict) -> None:
+        self._last = float(st["last"])
+        if self.rollup and st.get("rollup"): self.rollup.restore(st["rollup"])
@@ -0,0 +1,190 @@
+from __future__ import annotations
+import bisect, heapq, itertools, time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+from bot.paper.ws_l2_book import _iter_levels
+from bot.metrics import REGISTRY, MetricsRegistry
+
+@dataclass(frozen=True)
+class PassiveFill:
+    order_id: int
+    token_id: str
+    side: str
+    price: float
+    shares: float
+    ts: float
+    done: bool
+
+class _Order:
+    __slots__ = ("oid", "token_id", "buy", "price", "shares", "filled", "threshold")
+    def __init__(self, oid: int, token_id: str, buy: bool, price: float, shares: float, threshold: float):
+        self.oid = oid; self.token_id = token_id; self.buy = buy; self.price = price
+        self.shares = shares; self.filled = 0.0; self.threshold = threshold
+
+class _Level:
+    # depleted: cumulative displayed-size decrease seen at this price. An order
+    # fills once depleted passes its threshold (displayed size + our own resting
+    # shares ahead of it at placement), i.e. once its queue position is reached.
+    __slots__ = ("orders", "depleted", "resting")
+    def __init__(self):
+        self.orders: "OrderedDict[int, _Order]" = OrderedDict()
+        self.depleted = 0.0
+        self.resting = 0.0
+
+class _Side:
+    __slots__ = ("prices", "levels", "book")
+    def __init__(self):
+        self.prices: List[float] = []  # ascending; one entry per level holding our orders
+        self.levels: Dict[float, _Level] = {}
+        self.book: Dict[float, float] = {}  # last displayed exchange size per price
+
+class _Token:
+    __slots__ = ("bids", "asks", "best_bid", "best_ask")
+    def __init__(self):
+        self.bids = _Side(); self.asks = _Side()
+        self.best_bid: Optional[float] = None; self.best_ask: Optional[float] = None
+
+class MatchingEngine:
+    """
+    Resting simulated limit orders in price-time priority against an external
+    L2 feed. Sim orders never appear in the feed; they queue behind the size
+    displayed at their price when placed and advance as that size shrinks.
+    A level is filled outright when the opposite side trades through it
+    (ask <= our bid) or the same-side best price falls through it.
+    Insert and cancel are O(log levels); a book update touches only levels
+    that changed or were traded through.
+    """
+
+    def __init__(self, *, on_fill: Optional[Callable[[PassiveFill], None]] = None, clock_fn: Callable[[], float] = time.time, registry: MetricsRegistry = REGISTRY):
+        self._on_book_h = registry.histogram("matching_on_book_seconds")
+        self._resting = registry.gauge("matching_resting_orders")
+        self.on_fill = on_fill
+        self.clock_fn = clock_fn
+        self._tokens: Dict[str, _Token] = {}
+        self.orders: Dict[int, _Order] = {}
+        self._ids = itertools.count(1)
+        self._expiry: List[Tuple[float, int]] = []
+        self.fills = 0
+
+    def _token(self, token_id: str) -> _Token:
+        t = self._tokens.get(token_id)
+        if t is None: t = self._tokens[token_id] = _Token()
+        return t
+
+    def place(self, token_id: str, side: str, price: float, shares: float, *, expires_at: Optional[float] = None) -> int:
+        t = self._token(token_id)
+        buy = side.upper() == "BUY"
+        s = t.bids if buy else t.asks
+        price = float(price)
+        lvl = s.levels.get(price)
+        if lvl is None:
+            lvl = s.levels[price] = _Level()
+            bisect.insort(s.prices, price)
+        o = _Order(next(self._ids), token_id, buy, price, float(shares), lvl.depleted + s.book.get(price, 0.0) + lvl.resting)
+        lvl.orders[o.oid] = o
+        lvl.resting += o.shares
+        self.orders[o.oid] = o
+        if expires_at is not None: heapq.heappush(self._expiry, (float(expires_at), o.oid))
+        # marketable on arrival: cross immediately at our limit
+        if (buy and t.best_ask is not None and price >= t.best_ask) or (not buy and t.best_bid is not None and price <= t.best_bid):
+            self._fill_level(s, price, [])
+        self._resting.set(len(self.orders))
+        return o.oid
+
+    def cancel(self, order_id: int) -> bool:
+        o = self.orders.pop(order_id, None)
+        if o is None: return False
+        s = self._tokens[o.token_id].bids if o.buy else self._tokens[o.token_id].asks
+        lvl = s.levels[o.price]
+        del lvl.orders[order_id]
+        # later orders keep their thresholds: slightly pessimistic, but O(1)
+        lvl.resting -= o.shares - o.filled
+        if not lvl.orders: self._drop_level(s, o.price)
+        self._resting.set(len(self.orders))
+        return True
+
+    def expire(self, now: float) -> int:
+        n = 0
+        while self._expiry and self._expiry[0][0] <= now:
+            _, oid = heapq.heappop(self._expiry)
+            n += self.cancel(oid)
+        return n
+
+    def _drop_level(self, s: _Side, price: float) -> None:
+        del s.levels[price]
+        i = bisect.bisect_left(s.prices, price)
+        if i < len(s.prices) and s.prices[i] == price: del s.prices[i]
+
+    def on_message(self, msg: dict) -> List[PassiveFill]:
+        """Feed the same full-book message WSL2BookStore.on_message takes; returns fills."""
+        t0 = time.perf_counter()
+        token_id = msg.get("token_id") or msg.get("asset_id")
+        payload = msg.get("payload") or msg
+        bids, asks = payload.get("bids"), payload.get("asks")
+        if not token_id or not isinstance(bids, list) or not isinstance(asks, list): return []
+        out = self.on_book(str(token_id), dict(_iter_levels(bids)), dict(_iter_levels(asks)))
+        self._on_book_h.observe(time.perf_counter() - t0)
+        return out
+
+    def on_book(self, token_id: str, bids: Dict[float, float], asks: Dict[float, float]) -> List[PassiveFill]:
+        t = self._token(token_id)
+        prev_bid, prev_ask = t.best_bid, t.best_ask
+        t.best_bid = max(bids) if bids else None
+        t.best_ask = min(asks) if asks else None
+        out: List[PassiveFill] = []
+        for s, new in ((t.bids, bids), (t.asks, asks)):
+            old = s.book
+            s.book = new
+            if not s.levels: continue
+            for px in list(s.levels) if len(s.levels) <= len(old) else [p for p in old if p in s.levels]:
+                d = old.get(px, 0.0) - new.get(px, 0.0)
+                if d > 0:
+                    lvl = s.levels[px]
+                    lvl.depleted += d
+                    self._match_level(s, px, lvl, out)
+        # trade-throughs: whole levels fill at their limit
+        if t.bids.prices:
+            p = t.bids.prices
+            if t.best_ask is not None:
+                for px in p[bisect.bisect_left(p, t.best_ask):]: self._fill_level(t.bids, px, out)
+            if prev_bid is not None and (t.best_bid is None or t.best_bid < prev_bid):
+                lo = t.best_bid if t.best_bid is not None else float("-inf")
+                for px in p[bisect.bisect_right(p, lo):bisect.bisect_right(p, prev_bid)]: self._fill_level(t.bids, px, out)
+        if t.asks.prices:
+            p = t.asks.prices
+            if t.best_bid is not None:
+                for px in p[:bisect.bisect_right(p, t.best_bid)]: self._fill_level(t.asks, px, out)
+            if prev_ask is not None and (t.best_ask is None or t.best_ask > prev_ask):
+                hi = t.best_ask if t.best_ask is not None else float("inf")
+                for px in p[bisect.bisect_left(p, prev_ask):bisect.bisect_left(p, hi)]: self._fill_level(t.asks, px, out)
+        if out: self._resting.set(len(self.orders))
+        return out
+
+    def _emit(self, o: _Order, shares: float, out: List[PassiveFill]) -> None:
+        o.filled += shares
+        done = o.filled >= o.shares - 1e-12
+        f = PassiveFill(o.oid, o.token_id, "BUY" if o.buy else "SELL", o.price, shares, self.clock_fn(), done)
+        self.fills += 1
+        out.append(f)
+        if self.on_fill: self.on_fill(f)
+
+    def _match_level(self, s: _Side, px: float, lvl: _Level, out: List[PassiveFill]) -> None:
+        for oid in list(lvl.orders):
+            o = lvl.orders[oid]
+            reached = min(o.shares, lvl.depleted - o.threshold)
+            if reached <= o.filled: break
+            take = reached - o.filled
+            lvl.resting -= take
+            self._emit(o, take, out)
+            if o.filled < o.shares - 1e-12: break
+            del lvl.orders[oid]; self.orders.pop(oid, None)
+        if not lvl.orders: self._drop_level(s, px)
+
+    def _fill_level(self, s: _Side, px: float, out: List[PassiveFill]) -> None:
+        lvl = s.levels.get(px)
+        if lvl is None: return
+        for o in lvl.orders.values():
+            self._emit(o, o.shares - o.filled, out)
+            self.orders.pop(o.oid, None)
+        self._drop_level(s, px)
@@ -1,6 +1,7 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from collections import deque
+from array import array
 from typing import Deque, Optional
 from bot.types import TopOfBook
 
@@ -25,6 +26,21 @@ class MicrostructureTracker:
         mid = tob.midpoint
         if mid is None: return
         self._buf.append(MicroSnapshot(ts=tob.ts, mid=mid))
+    def state(self) -> dict:
+        return {"ts": array("d", (s.ts for s in self._buf)), "mid": array("d", (s.mid for s in self._buf))}
+    def restore(self, st: dict) -> None:
+        self._buf.clear()
+        self._buf.extend(MicroSnapshot(t, m) for t, m in zip(st["ts"], st["mid"]))
+    def window(self, lookback_sec: float) -> tuple[array, array]:
+        """(ts, mid) of every snapshot stats_over(<= lookback_sec) can start from, oldest first."""
+        if len(self._buf) < 3: return array("d"), array("d")
+        cutoff = self._buf[-1].ts - lookback_sec
+        tail = []
+        for s in reversed(self._buf):
+            if s.ts < cutoff: break
+            tail.append(s)
+        tail.reverse()
+        return array("d", (s.ts for s in tail)), array("d", (s.mid for s in tail))
     def stats_over(self, lookback_sec: float) -> Optional[MicroStats]:
         if len(self._buf) < 3: return None
         now = self._buf[-1].ts
@@ -0,0 +1,113 @@
+from __future__ import annotations
+import json, os
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional, Sequence, Tuple
+import numpy as np
+from bot.paper.advsel import AdvSelConfig
+from bot.paper.latency_profiles import LatencyProfile
+
+# Vectorized counterparts of RegionLatency.wait, MicrostructureTracker.stats_over,
+# compute_advsel_penalty and fok_fill_vwap_against_depth: one trigger is
+# replayed against thousands of latency/drop draws at once.
+
+def sample_latency(p: LatencyProfile, n: int, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """(sent mask, latency seconds) for n draws from the profile."""
+    sent = rng.random(n) >= p.drop_prob
+    jitter = rng.integers(-p.jitter_ms, p.jitter_ms, size=n, endpoint=True) if p.jitter_ms else np.zeros(n, dtype=np.int64)
+    ms = np.maximum(0, p.base_ms + jitter) + np.where(rng.random(n) < p.tail_prob, p.extra_tail_ms, 0)
+    return sent, np.where(sent, ms / 1000.0, 0.0)
+
+def abs_moves_over(ts: np.ndarray, mids: np.ndarray, lookback_sec: np.ndarray) -> np.ndarray:
+    """stats_over(lb).abs_move_pct for every lookback; NaN with fewer than 3 points."""
+    if len(ts) < 3: return np.full(len(lookback_sec), np.nan)
+    i = np.minimum(np.searchsorted(ts, ts[-1] - lookback_sec, side="left"), len(ts) - 1)
+    start = mids[i]
+    return np.abs(mids[-1] - start) / np.maximum(start, 1e-9)
+
+def advsel_penalty(abs_move_pct: np.ndarray, cfg: AdvSelConfig) -> Tuple[np.ndarray, np.ndarray]:
+    vol_pct = np.nan_to_num(abs_move_pct, nan=0.0) * 100.0
+    return np.minimum(cfg.max_extra_bps, cfg.k_bps_per_vol * vol_pct), np.minimum(cfg.max_liquidity_shrink, cfg.liquidity_shrink_per_vol * vol_pct)
+
+def fok_fill_vec(side: str, limit: float, size_usd: float, prices: np.ndarray, sizes: np.ndarray, *,
+                 fee_bps: float, slippage_bps: float, extra_slippage_bps: np.ndarray, liquidity_shrink: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (filled mask, avg price) per draw. Slippage and shrink scale every level
+    of a draw by the same factor, so one cumsum over the book serves all
+    draws and each walk is a searchsorted.
+    """
+    n = len(extra_slippage_bps)
+    buy = side.upper() == "BUY"
+    keep = prices <= limit if buy else prices >= limit
+    # levels beyond the limit end the walk
+    cut = int(np.argmin(keep)) if not keep.all() else len(keep)
+    p, s = prices[:cut], sizes[:cut]
+    if not len(p): return np.zeros(n, dtype=bool), np.full(n, np.nan)
+    slip = (slippage_bps + extra_slippage_bps) / 10_000.0
+    fee = fee_bps / 10_000.0
+    a = (1.0 + slip) * (1.0 + fee) if buy else (1.0 - slip) * (1.0 - fee)
+    live = 1.0 - liquidity_shrink
+    cum_ps, cum_s = np.cumsum(p * s), np.cumsum(s)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        need = size_usd / (a * live)  # notional at raw prices and full size
+        filled = (live > 0) & (cum_ps[-1] * a * live + 1e-9 >= size_usd)
+        k = np.minimum(np.searchsorted(cum_ps, need, side="left"), len(p) - 1)
+        before_ps = np.where(k > 0, cum_ps[k - 1], 0.0)
+        before_s = np.where(k > 0, cum_s[k - 1], 0.0)
+        shares = live * before_s + (need - before_ps) * live / p[k]
+        avg = size_usd / shares
+    return filled, np.where(filled, avg, np.nan)
+
+@dataclass(frozen=True)
+class TriggerMC:
+    ts: float
+    token_id: str
+    side: str
+    mid: float
+    size_usd: float
+    samples: int
+    sent_prob: float
+    fill_prob: float
+    latency_ms_p50: float
+    latency_ms_p99: float
+    slippage_bps_mean: Optional[float]
+    slippage_bps_p05: Optional[float]
+    slippage_bps_p50: Optional[float]
+    slippage_bps_p95: Optional[float]
+    extra_bps_mean: float
+    shrink_mean: float
+
+def simulate_trigger(*, ts: float, token_id: str, side: str, limit: float, size_usd: float, mid: float,
+                     levels: Sequence[Tuple[float, float]], micro_ts: np.ndarray, micro_mid: np.ndarray,
+                     profile: LatencyProfile, advsel: AdvSelConfig, fee_bps: float, slippage_bps: float,
+                     samples: int = 4096, seed: Optional[int] = None) -> TriggerMC:
+    """
+    Fill probability and slippage distribution (bps vs the decision mid,
+    positive = worse) for one trigger against the book seen at decision time.
+    """
+    rng = np.random.default_rng(seed)
+    sent, lat = sample_latency(profile, samples, rng)
+    extra, shrink = advsel_penalty(abs_moves_over(micro_ts, micro_mid, lat), advsel)
+    lv = np.asarray(levels, dtype=float).reshape(-1, 2)
+    filled, avg = fok_fill_vec(side, limit, size_usd, lv[:, 0], lv[:, 1], fee_bps=fee_bps, slippage_bps=slippage_bps,
+                               extra_slippage_bps=extra, liquidity_shrink=shrink)
+    ok = sent & filled
+    sgn = 1.0 if side.upper() == "BUY" else -1.0
+    slip = sgn * (avg[ok] - mid) / max(mid, 1e-9) * 10_000.0
+    q = np.percentile(slip, [5, 50, 95]) if len(slip) else [None] * 3
+    f = lambda x: None if x is None else float(x)
+    ms = lat[sent] * 1000.0
+    return TriggerMC(
+        ts=ts, token_id=token_id, side=side, mid=mid, size_usd=size_usd, samples=samples,
+        sent_prob=float(sent.mean()), fill_prob=float(ok.mean()),
+        latency_ms_p50=float(np.percentile(ms, 50)) if len(ms) else 0.0, latency_ms_p99=float(np.percentile(ms, 99)) if len(ms) else 0.0,
+        slippage_bps_mean=f(slip.mean()) if len(slip) else None, slippage_bps_p05=f(q[0]), slippage_bps_p50=f(q[1]), slippage_bps_p95=f(q[2]),
+        extra_bps_mean=float(extra[sent].mean()) if sent.any() else 0.0, shrink_mean=float(shrink[sent].mean()) if sent.any() else 0.0,
+    )
+
+def run_and_append(path: str, kw: Dict[str, Any]) -> TriggerMC:
+    """Executor entry point: simulate one trigger and append it as a JSON line."""
+    res = simulate_trigger(**kw)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(asdict(res)) + "\n")
+    return res
@@ -1,7 +1,11 @@
 from __future__ import annotations
-import csv, os, time, json, math
-from dataclasses import dataclass
-from typing import List, Optional, Tuple
+import csv, os, json, math, time
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from bot.clock import Clock, WallClock
+from bot.metrics import REGISTRY, MetricsRegistry
+from bot.paper.rollup import Rollup
 
 def _mean_std(xs: List[float]) -> Tuple[float, float]:
     n = len(xs)
@@ -47,6 +51,10 @@ class PerformanceTracker:
     regime_vol_window_points: int = 60
     regime_high_vol_threshold: float = 0.0015
     regime_min_points_each: int = 80
+    clock: Clock = field(default_factory=WallClock)
+    rollup_resolutions: Sequence[int] = ()  # seconds; equity bars go to <equity csv>.<res>s.csv
+    summary_extras: Optional[Callable[[], Dict[str, Any]]] = None  # merged into the written summary
+    registry: MetricsRegistry = field(default=REGISTRY, repr=False)
 
     def __post_init__(self):
         os.makedirs(os.path.dirname(self.equity_csv_path), exist_ok=True)
@@ -57,26 +65,45 @@ class PerformanceTracker:
         self._last_print = 0.0
         self._equity: List[float] = []
         self._ts: List[float] = []
+        self._csv = self.registry.histogram("csv_write_seconds", file="equity")
+        self._summary = self.registry.histogram("perf_summary_seconds")
+        self.rollup = Rollup(self.equity_csv_path, self.rollup_resolutions, self.registry) if self.rollup_resolutions else None
 
     def update(self, *, ts: float, equity: float, cash: float, realized_pnl: float, unrealized_pnl: float, fills: int):
         self._equity.append(float(equity))
         self._ts.append(float(ts))
+        if self.rollup: self.rollup.add(float(ts), float(equity), "equity")
         if len(self._equity) > self.returns_window_points * 3:
             self._equity = self._equity[-self.returns_window_points * 3 :]
             self._ts = self._ts[-self.returns_window_points * 3 :]
 
-        now = time.time()
+        now = self.clock.time()
         if now - self._last_log >= self.log_interval_sec:
             self._last_log = now
+            t0 = time.perf_counter()
             with open(self.equity_csv_path, "a", newline="", encoding="utf-8") as f:
                 csv.writer(f).writerow([ts, equity, cash, realized_pnl, unrealized_pnl, fills])
+            t1 = time.perf_counter()
+            self._csv.observe(t1 - t0)
             self._write_summary(ts, equity, cash, realized_pnl, unrealized_pnl, fills)
+            self._summary.observe(time.perf_counter() - t1)
 
         if now - self._last_print >= self.print_interval_sec:
             self._last_print = now
             s = self._compute_summary(ts, equity, cash, realized_pnl, unrealized_pnl, fills)
             print("[PERF]", {k: s[k] for k in ["equity","fills","max_drawdown_pct","sharpe_like","points_low","points_high","regime_ok"]})
 
+    def state(self) -> dict:
+        return {"equity": array("d", self._equity), "ts": array("d", self._ts), "last_log": self._last_log, "last_print": self._last_print,
+                "rollup": self.rollup.state() if self.rollup else None}
+
+    def restore(self, st: dict) -> None:
+        self._equity = list(st["equity"])
+        self._ts = list(st["ts"])
+        self._last_log = float(st["last_log"])
+        self._last_print = float(st["last_print"])
+        if self.rollup and st.get("rollup"): self.rollup.restore(st["rollup"])
+
     def _compute_summary(self, ts, equity, cash, realized_pnl, unrealized_pnl, fills):
         eq = self._equity[-self.returns_window_points :] if len(self._equity) > 10 else self._equity
         if len(eq) < 3:
@@ -116,10 +143,14 @@ class PerformanceTracker:
 
     def _write_summary(self, ts, equity, cash, realized_pnl, unrealized_pnl, fills):
         s = self._compute_summary(ts, equity, cash, realized_pnl, unrealized_pnl, fills)
+        if self.summary_extras: s.update(self.summary_extras())
         os.makedirs(os.path.dirname(self.summary_json_path), exist_ok=True)
         with open(self.summary_json_path, "w", encoding="utf-8") as f:
             json.dump(s, f, indent=2)
 
+    def close(self):
+        if self.rollup: self.rollup.close()
+
     def finalize(self):
         if self._ts:
             ts = self._ts[-1]
@@ -0,0 +1,105 @@
+from __future__ import annotations
+import csv, math, os, time
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Sequence, Tuple
+from bot.metrics import REGISTRY, MetricsRegistry
+
+DEFAULT_RESOLUTIONS = (10, 60, 300, 3600)
+FIELDS = ["start", "key", "open", "high", "low", "close", "mean", "vol", "count"]
+
+@dataclass
+class _Bar:
+    start: float
+    open: float
+    high: float
+    low: float
+    close: float
+    count: int = 1
+    total: float = 0.0
+    # point-to-point returns inside the bar, for vol
+    n_ret: int = 0
+    sum_ret: float = 0.0
+    sum_ret2: float = 0.0
+
+    def add(self, v: float) -> None:
+        if self.close > 0:
+            r = v / self.close - 1.0
+            self.n_ret += 1; self.sum_ret += r; self.sum_ret2 += r * r
+        self.close = v
+        if v > self.high: self.high = v
+        if v < self.low: self.low = v
+        self.count += 1
+        self.total += v
+
+    def row(self, key: str) -> list:
+        vol = 0.0
+        if self.n_ret > 1:
+            m = self.sum_ret / self.n_ret
+            vol = math.sqrt(max(0.0, (self.sum_ret2 - self.n_ret * m * m) / (self.n_ret - 1)))
+        return [self.start, key, self.open, self.high, self.low, self.close, self.total / self.count, vol, self.count]
+
+def rollup_path(raw_path: str, res: int) -> str:
+    """equity_timeseries.csv -> equity_timeseries.60s.csv"""
+    root, ext = os.path.splitext(raw_path)
+    return f"{root}.{int(res)}s{ext or '.csv'}"
+
+class Rollup:
+    """
+    Write-time OHLC/mean/vol bars of one or more keyed series at several
+    resolutions. A bar is appended to <raw>.<res>s.csv when the first
+    point of the next bucket arrives; open bars ride along in checkpoints
+    and are written by close().
+    """
+
+    def __init__(self, raw_path: str, resolutions: Sequence[int] = DEFAULT_RESOLUTIONS, registry: MetricsRegistry = REGISTRY):
+        self._csv = registry.histogram("csv_write_seconds", file="rollup")
+        self.resolutions = tuple(sorted(int(r) for r in resolutions))
+        self.paths = {r: rollup_path(raw_path, r) for r in self.resolutions}
+        for p in self.paths.values():
+            os.makedirs(os.path.dirname(p) or ".", exist_ok=True)
+            if not os.path.exists(p):
+                with open(p, "w", newline="", encoding="utf-8") as f:
+                    csv.writer(f).writerow(FIELDS)
+        self._open: Dict[Tuple[int, str], _Bar] = {}
+
+    def add(self, ts: float, value: float, key: str = "") -> None:
+        v = float(value)
+        for res in self.resolutions:
+            start = ts - ts % res
+            bar = self._open.get((res, key))
+            if bar is not None and bar.start == start:
+                bar.add(v); continue
+            if bar is not None and start > bar.start:
+                self._write(res, [bar.row(key)])
+            elif bar is not None:
+                continue  # clock went backwards: keep the current bar
+            self._open[(res, key)] = _Bar(start, v, v, v, v, 1, v)
+
+    def _write(self, res: int, rows: List[list]) -> None:
+        t0 = time.perf_counter()
+        with open(self.paths[res], "a", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerows(rows)
+        self._csv.observe(time.perf_counter() - t0)
+
+    def close(self) -> None:
+        """Write every open bar (a resumed run may later rewrite the same bucket; readers keep the last)."""
+        for res in self.resolutions:
+            rows = [bar.row(key) for (r, key), bar in self._open.items() if r == res]
+            if rows: self._write(res, rows)
+
+    def state(self) -> dict:
+        return {"open": [(res, key, asdict(bar)) for (res, key), bar in self._open.items()]}
+
+    def restore(self, st: dict) -> None:
+        self._open = {(int(res), key): _Bar(**bar) for res, key, bar in st.get("open", ()) if int(res) in self.paths}
+
+def read_bars(path: str, key: Optional[str] = None) -> List[dict]:
+    """Bars in start order, the last row winning for a repeated (key, start)."""
+    if not os.path.exists(path): return []
+    out: Dict[Tuple[str, float], dict] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if key is not None and row["key"] != key: continue
+            b = {k: (row[k] if k == "key" else int(row[k]) if k == "count" else float(row[k])) for k in FIELDS}
+            out[(b["key"], b["start"])] = b
+    return sorted(out.values(), key=lambda b: (b["start"], b["key"]))
@@ -1,7 +1,7 @@
 from __future__ import annotations
 from dataclasses import dataclass
 import os, time, json
-from typing import Optional
+from typing import Dict, Optional
 
 @dataclass(frozen=True)
 class RunPaths:
@@ -18,13 +18,9 @@ class RunManager:
         self.base_dir = base_dir
         os.makedirs(self.base_dir, exist_ok=True)
 
-    def start_run(self, tag: str = "paper", *, pair: Optional[dict] = None, cfg: Optional[dict] = None) -> RunPaths:
-        ts = time.strftime("%Y%m%d-%H%M%S")
-        run_id = f"{tag}-{ts}"
-        run_dir = os.path.join(self.base_dir, run_id)
-        os.makedirs(run_dir, exist_ok=True)
-
-        paths = RunPaths(
+    @staticmethod
+    def _paths(run_id: str, run_dir: str) -> RunPaths:
+        return RunPaths(
             run_id=run_id,
             run_dir=run_dir,
             equity_csv=os.path.join(run_dir, "equity_timeseries.csv"),
@@ -34,6 +30,14 @@ class RunManager:
             meta_json=os.path.join(run_dir, "run_meta.json"),
         )
 
+    def start_run(self, tag: str = "paper", *, pair: Optional[dict] = None, cfg: Optional[dict] = None) -> RunPaths:
+        ts = time.strftime("%Y%m%d-%H%M%S")
+        run_id = f"{tag}-{ts}"
+        run_dir = os.path.join(self.base_dir, run_id)
+        os.makedirs(run_dir, exist_ok=True)
+
+        paths = self._paths(run_id, run_dir)
+
         meta = {
             "run_id": run_id,
             "created_at_ts": time.time(),
@@ -45,3 +49,37 @@ class RunManager:
             json.dump(meta, f, indent=2)
 
         return paths
+
+    @staticmethod
+    def update_meta(paths: RunPaths, **fields) -> None:
+        with open(paths.meta_json, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        meta.update(fields)
+        with open(paths.meta_json, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+
+    def resume_run(self, run_dir: str) -> RunPaths:
+        """Reattach to an existing run directory; the checkpoint restore rewinds its CSVs (see rewind)."""
+        run_dir = run_dir.rstrip("/\\")
+        if not os.path.isdir(run_dir):
+            raise FileNotFoundError(f"run dir not found: {run_dir}")
+        paths = self._paths(os.path.basename(run_dir), run_dir)
+        try:
+            with open(paths.meta_json, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = {"run_id": paths.run_id}
+        meta.setdefault("resumed_at_ts", []).append(time.time())
+        with open(paths.meta_json, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        return paths
+
+    @staticmethod
+    def rewind(paths: RunPaths, offsets: Dict[str, int]) -> None:
+        """Cut the run's append-only files back to the sizes recorded with a checkpoint."""
+        for rel, size in offsets.items():
+            p = os.path.join(paths.run_dir, rel)
+            try:
+                if os.path.getsize(p) > size: os.truncate(p, size)
+            except OSError:
+                pass
@@ -0,0 +1,247 @@
+from __future__ import annotations
+import asyncio, math, multiprocessing as mp, os, signal, time
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from bot.types import OrderBook, BookLevel, TopOfBook
+from bot.clock import Clock, WallClock
+from bot.metrics import REGISTRY, MetricsRegistry
+
+# Layout: 64-byte header (magic, capacity, levels) followed by `capacity` fixed-size
+# slots. Each slot carries a seqlock counter: odd while the publisher is writing.
+# exchange_ts / recv_ts (epoch sec, NaN when unknown) let variants age the data
+# from the exchange and from the publisher's receive, not from when they noticed it.
+_MAGIC = 0x504D4231  # "PMB1"
+_HEADER = 64
+_ID_BYTES = 96
+# a slot still odd after this many looks belongs to a publisher that died mid-write
+_MAX_READ_RETRIES = 10_000
+
+def _slot_dtype(levels: int) -> np.dtype:
+    return np.dtype([
+        ("id", f"S{_ID_BYTES}"), ("seq", "<u8"), ("ts", "<f8"), ("exchange_ts", "<f8"), ("recv_ts", "<f8"), ("nb", "<i4"), ("na", "<i4"),
+        ("bid_px", "<f8", (levels,)), ("bid_sz", "<f8", (levels,)),
+        ("ask_px", "<f8", (levels,)), ("ask_sz", "<f8", (levels,)),
+    ])
+
+def _views(buf, capacity: int, levels: int):
+    return np.ndarray((capacity,), dtype=_slot_dtype(levels), buffer=buf, offset=_HEADER)
+
+class SharedBookWriter:
+    """Single publisher: owns the segment and writes the latest book per token."""
+
+    def __init__(self, token_ids: List[str], *, max_levels: int = 200, name: Optional[str] = None):
+        self.levels = int(max_levels)
+        self.capacity = len(token_ids)
+        size = _HEADER + _slot_dtype(self.levels).itemsize * self.capacity
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.name = self.shm.name
+        np.ndarray((3,), dtype="<u4", buffer=self.shm.buf)[:] = (_MAGIC, self.capacity, self.levels)
+        self.slots = _views(self.shm.buf, self.capacity, self.levels)
+        self.index: Dict[str, int] = {}
+        for i, t in enumerate(token_ids):
+            raw = str(t).encode()
+            if len(raw) > _ID_BYTES:
+                self.close()
+                raise ValueError(f"token id longer than {_ID_BYTES} bytes: {t!r}")
+            self.slots["id"][i] = raw
+            self.index[str(t)] = i
+
+    def publish(self, token_id: str, bids: List[List[float]], asks: List[List[float]], ts: float,
+                *, exchange_ts: Optional[float] = None, recv_ts: Optional[float] = None) -> None:
+        i = self.index.get(str(token_id))
+        if i is None: return
+        L = self.levels
+        nb, na = min(L, len(bids)), min(L, len(asks))
+        s = self.slots[i]
+        self.slots["seq"][i] += 1  # odd: write in progress
+        s["ts"] = ts; s["nb"] = nb; s["na"] = na
+        s["exchange_ts"] = math.nan if exchange_ts is None else exchange_ts
+        s["recv_ts"] = math.nan if recv_ts is None else recv_ts
+        if nb:
+            b = np.asarray(bids[:nb], dtype="<f8")
+            s["bid_px"][:nb] = b[:, 0]; s["bid_sz"][:nb] = b[:, 1]
+        if na:
+            a = np.asarray(asks[:na], dtype="<f8")
+            s["ask_px"][:na] = a[:, 0]; s["ask_sz"][:na] = a[:, 1]
+        self.slots["seq"][i] += 1  # even: consistent
+
+    def close(self) -> None:
+        self.slots = None
+        self.shm.close()
+        self.shm.unlink()
+
+class SharedBookReader:
+    """
+    WSL2BookStore-compatible read side. get_book() copies one slot under the
+    seqlock (retrying a bounded number of times on a torn read) and caches
+    the OrderBook until the slot's sequence number moves. A slot left odd by
+    a dead publisher serves the cached book (or None) and counts a stall.
+    """
+
+    def __init__(self, name: str, registry: MetricsRegistry = REGISTRY):
+        # readers must never unlink the segment (bpo-39959); before 3.13 attaching
+        # registers with the resource tracker shared by the spawn tree, which is harmless
+        try: self.shm = shared_memory.SharedMemory(name=name, create=False, track=False)
+        except TypeError: self.shm = shared_memory.SharedMemory(name=name, create=False)
+        magic, self.capacity, self.levels = (int(x) for x in np.ndarray((3,), dtype="<u4", buffer=self.shm.buf))
+        if magic != _MAGIC:
+            raise ValueError(f"shared memory {name!r} is not a book segment")
+        self.slots = _views(self.shm.buf, self.capacity, self.levels)
+        self.index: Dict[str, int] = {self.slots["id"][i].decode(): i for i in range(self.capacity)}
+        self._cache: Dict[str, Tuple[int, OrderBook]] = {}
+        self.torn_reads = 0
+        self._stalled = registry.counter("shm_read_stalled_total")
+
+    def on_message(self, msg: dict) -> None:
+        pass  # books arrive through shared memory
+
+    def version(self, token_id: str) -> int:
+        i = self.index.get(str(token_id))
+        return -1 if i is None else int(self.slots["seq"][i])
+
+    def _read(self, i: int):
+        """(seq, record copy), or None when the slot never settles."""
+        seq = self.slots["seq"]
+        for _ in range(_MAX_READ_RETRIES):
+            s1 = int(seq[i])
+            if s1 & 1:
+                self.torn_reads += 1; continue
+            rec = self.slots[i].copy()
+            if int(seq[i]) == s1: return s1, rec
+            self.torn_reads += 1
+        self._stalled.inc()
+        return None
+
+    def get_book(self, token_id: str) -> Optional[OrderBook]:
+        token_id = str(token_id)
+        i = self.index.get(token_id)
+        if i is None: return None
+        cur = int(self.slots["seq"][i])
+        if cur == 0: return None
+        hit = self._cache.get(token_id)
+        if hit and hit[0] == cur: return hit[1]
+        got = self._read(i)
+        if got is None: return hit[1] if hit else None
+        seq, rec = got
+        nb, na = int(rec["nb"]), int(rec["na"])
+        book = OrderBook(
+            token_id=token_id,
+            bids=[BookLevel(p, s) for p, s in zip(rec["bid_px"][:nb].tolist(), rec["bid_sz"][:nb].tolist())],
+            asks=[BookLevel(p, s) for p, s in zip(rec["ask_px"][:na].tolist(), rec["ask_sz"][:na].tolist())],
+        )
+        self._cache[token_id] = (seq, book)
+        return book
+
+    def get_tob(self, token_id: str, clock: Optional[Clock] = None) -> Optional[TopOfBook]:
+        """With `clock`, recv_mono is the publisher's receive time mapped onto that clock."""
+        i = self.index.get(str(token_id))
+        if i is None or int(self.slots["seq"][i]) == 0: return None
+        got = self._read(i)
+        if got is None: return None
+        _, rec = got
+        bid = float(rec["bid_px"][0]) if rec["nb"] > 0 else None
+        ask = float(rec["ask_px"][0]) if rec["na"] > 0 else None
+        xts, rts = float(rec["exchange_ts"]), float(rec["recv_ts"])
+        recv_mono = None
+        if clock is not None and not math.isnan(rts):
+            recv_mono = clock.monotonic() - max(0.0, clock.time() - rts)
+        return TopOfBook(token_id=str(token_id), ts=float(rec["ts"]), bid=bid, ask=ask,
+                         exchange_ts=None if math.isnan(xts) else xts, recv_mono=recv_mono)
+
+    def close(self) -> None:
+        self.slots = None
+        self.shm.close()
+
+class SharedBookFeed:
+    """
+    Drop-in for PolymarketLiveFeed inside variant processes: watches slot
+    sequence numbers and emits TOB updates; books are read in place through
+    `reader`, so get_book_for_ws_store() has nothing to hand over.
+    """
+
+    def __init__(self, name: str, token_ids: List[str], on_tob_update: Optional[Callable] = None, clock: Optional[Clock] = None, poll_sec: float = 0.1, registry: MetricsRegistry = REGISTRY):
+        self.reader = SharedBookReader(name, registry)
+        self.token_ids = token_ids
+        self.on_tob_update = on_tob_update
+        self.clock = clock or WallClock()
+        self.poll_sec = float(poll_sec)
+        self.tob: Dict[str, TopOfBook] = {}
+        self._seen: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        print(f"[SHM FEED] Reading {len(self.token_ids)} markets from shared memory")
+        self._task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try: await self._task
+            except asyncio.CancelledError: pass
+            self._task = None
+
+    async def _watch(self):
+        while True:
+            for token_id in self.token_ids:
+                v = self.reader.version(token_id)
+                if v <= 0 or v == self._seen.get(token_id): continue
+                self._seen[token_id] = v
+                tob = self.reader.get_tob(token_id, self.clock)
+                if tob is None: continue
+                if tob.recv_mono is None: tob.recv_mono = self.clock.monotonic()
+                self.tob[token_id] = tob
+                if self.on_tob_update: self.on_tob_update(token_id, tob)
+            await self.clock.sleep(self.poll_sec)
+
+    def get_tob(self, token_id: str) -> Optional[TopOfBook]:
+        return self.tob.get(token_id)
+
+    def get_book(self, token_id: str) -> Optional[OrderBook]:
+        return self.reader.get_book(token_id)
+
+    def version(self, token_id: str) -> int:
+        return self.reader.version(token_id)
+
+    def mark_hot(self, token_ids, ttl_sec: float = 5.0) -> None:
+        pass  # polling cadence belongs to the publisher process
+
+    def get_book_for_ws_store(self, token_id: str) -> Optional[Dict]:
+        return None
+
+def _publisher_main(name: str, token_ids: List[str], host: str, max_levels: int, ready) -> None:
+    from bot.live_feed import PolymarketLiveFeed
+    signal.signal(signal.SIGTERM, signal.default_int_handler)  # unlink on terminate()
+    writer = SharedBookWriter(token_ids, max_levels=max_levels, name=name)
+    ready.set()
+
+    async def _run():
+        feed = None
+        published: Dict[str, int] = {}
+        def _on_tob(token_id: str, tob: TopOfBook):
+            v = feed.version(token_id)
+            if published.get(token_id) == v: return  # unchanged poll
+            published[token_id] = v
+            data = feed.get_book_for_ws_store(token_id)
+            # tob.ts is the wall time the poll came back
+            if data: writer.publish(token_id, data["payload"]["bids"], data["payload"]["asks"], tob.ts, exchange_ts=tob.exchange_ts, recv_ts=tob.ts)
+        feed = PolymarketLiveFeed(token_ids=token_ids, on_tob_update=_on_tob, host=host)
+        await feed.start()
+        try: await asyncio.Event().wait()
+        finally: await feed.stop()
+
+    try: asyncio.run(_run())
+    except KeyboardInterrupt: pass
+    finally: writer.close()
+
+def start_publisher_process(token_ids: List[str], *, host: str, max_levels: int = 200, name: Optional[str] = None) -> Tuple[str, mp.Process]:
+    """Spawn one process that polls every token and publishes books into shared memory."""
+    name = name or f"pmbooks-{os.getpid()}-{int(time.time())}"
+    ctx = mp.get_context("spawn")
+    ready = ctx.Event()
+    p = ctx.Process(target=_publisher_main, args=(name, list(token_ids), host, int(max_levels), ready), name="book-publisher", daemon=True)
+    p.start()
+    if not ready.wait(60):
+        p.terminate()
+        raise RuntimeError("book publisher did not start")
+    return name, p
@@ -1,8 +1,9 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Tuple
-import bisect
+import bisect, time
 from bot.types import OrderBook, BookLevel
+from bot.metrics import REGISTRY, MetricsRegistry
 
 @dataclass
 class _SideBook:
@@ -37,20 +38,40 @@ class _SideBook:
             self.px_to_sz.pop(px, None)
             try: self.prices.remove(px)
             except ValueError: pass
+    def replace(self, rows) -> None:
+        """Full-snapshot rebuild: one sort instead of one insort per level."""
+        d: Dict[float, float] = {}
+        for px, sz in rows:
+            if sz > 0: d[px] = sz
+            else: d.pop(px, None)
+        self.prices = sorted(d, reverse=self.bids)[:self.max_levels]
+        self.px_to_sz = {p: d[p] for p in self.prices}
     def levels(self) -> List[BookLevel]:
         return [BookLevel(price=float(px), size=float(self.px_to_sz.get(px, 0.0))) for px in self.prices if px in self.px_to_sz]
 
 class WSL2BookStore:
-    def __init__(self, max_levels: int = 200):
+    def __init__(self, max_levels: int = 200, registry: MetricsRegistry = REGISTRY):
         self.max_levels = max_levels
+        self._on_message_h = registry.histogram("ws_book_on_message_seconds")
         self._bids: Dict[str, _SideBook] = {}
         self._asks: Dict[str, _SideBook] = {}
+        # per-token version (bumped on every content change) and the
+        # OrderBook snapshot cached for it; snapshots are shared, never mutate them
+        self._versions: Dict[str, int] = {}
+        self._snap: Dict[str, Tuple[int, OrderBook]] = {}
+        self._raw: Dict[str, Tuple[list, list]] = {}
+    def version(self, token_id: str) -> int:
+        return self._versions.get(str(token_id), 0)
     def _get(self, token_id: str) -> Tuple[_SideBook, _SideBook]:
         if token_id not in self._bids:
             self._bids[token_id] = _SideBook(bids=True, max_levels=self.max_levels)
             self._asks[token_id] = _SideBook(bids=False, max_levels=self.max_levels)
         return self._bids[token_id], self._asks[token_id]
     def on_message(self, msg: dict) -> None:
+        t0 = time.perf_counter()
+        self._on_message(msg)
+        self._on_message_h.observe(time.perf_counter() - t0)
+    def _on_message(self, msg: dict) -> None:
         token_id = msg.get("token_id") or msg.get("tokenId") or msg.get("asset_id") or msg.get("assetId")
         payload = msg.get("payload") or msg.get("data") or msg
         if not token_id and isinstance(payload, dict):
@@ -61,14 +82,22 @@ class WSL2BookStore:
         bids = payload.get("bids") if isinstance(payload, dict) else None
         asks = payload.get("asks") if isinstance(payload, dict) else None
         if isinstance(bids, list) and isinstance(asks, list):
-            bids_side.px_to_sz.clear(); bids_side.prices.clear()
-            asks_side.px_to_sz.clear(); asks_side.prices.clear()
-            for px, sz in _iter_levels(bids): bids_side.upsert(px, sz)
-            for px, sz in _iter_levels(asks): asks_side.upsert(px, sz)
+            raw = self._raw.get(token_id)
+            if raw is not None and raw[0] == bids and raw[1] == asks:
+                return  # identical snapshot: keep the sides and the cached OrderBook
+            self._raw[token_id] = (list(bids), list(asks))
+            bids_side.replace(_iter_levels(bids))
+            asks_side.replace(_iter_levels(asks))
+            self._versions[token_id] = self._versions.get(token_id, 0) + 1
     def get_book(self, token_id: str) -> Optional[OrderBook]:
         token_id = str(token_id)
         if token_id not in self._bids or token_id not in self._asks: return None
-        return OrderBook(token_id=token_id, bids=self._bids[token_id].levels(), asks=self._asks[token_id].levels())
+        v = self._versions.get(token_id, 0)
+        hit = self._snap.get(token_id)
+        if hit is not None and hit[0] == v: return hit[1]
+        book = OrderBook(token_id=token_id, bids=self._bids[token_id].levels(), asks=self._asks[token_id].levels())
+        self._snap[token_id] = (v, book)
+        return book
 
 def _iter_levels(raw: list):
     for row in raw:
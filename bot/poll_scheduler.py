@@ -0,0 +1,124 @@
+from __future__ import annotations
+import heapq, itertools
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+from bot.clock import Clock, WallClock
+from bot.metrics import REGISTRY, MetricsRegistry
+
+class TokenBucket:
+    """Global request budget: `rate` requests/sec with bursts up to `burst`."""
+
+    def __init__(self, rate: float, burst: float, clock: Clock):
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self.clock = clock
+        self.tokens = self.burst
+        self._t = clock.monotonic()
+
+    def _refill(self) -> None:
+        now = self.clock.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._t) * self.rate)
+        self._t = now
+
+    def wait_time(self) -> float:
+        """Seconds until one request may be spent (0 when available now)."""
+        self._refill()
+        return 0.0 if self.tokens >= 1.0 else (1.0 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self._refill()
+        self.tokens -= 1.0
+
+@dataclass
+class _TokenState:
+    interval: float
+    due: float = 0.0
+    gen: int = 0
+    last_poll: Optional[float] = None
+    last_change: Optional[float] = None
+    hot_until: float = 0.0
+
+class PollScheduler:
+    """
+    Decides which token to poll next. Each token has its own interval: it
+    halves when a poll sees a changed book and grows by `backoff` when the
+    book is quiet, within [min_interval, max_interval]. Tokens with an open
+    strategy trigger are pinned to min_interval. All polls share one token
+    bucket, so when demand exceeds the budget the most overdue token goes first.
+    """
+
+    def __init__(self, token_ids: Iterable[str], *, clock: Optional[Clock] = None, rate_per_sec: float = 10.0, burst: float = 5.0,
+                 min_interval_sec: float = 0.25, base_interval_sec: float = 1.0, max_interval_sec: float = 10.0, backoff: float = 1.5, registry: MetricsRegistry = REGISTRY):
+        self.clock = clock or WallClock()
+        self.registry = registry
+        self.bucket = TokenBucket(rate_per_sec, burst, self.clock)
+        self.min_interval = float(min_interval_sec)
+        self.base_interval = float(base_interval_sec)
+        self.max_interval = float(max_interval_sec)
+        self.backoff = float(backoff)
+        self.state: Dict[str, _TokenState] = {}
+        self._heap: List[Tuple[float, int, str, int]] = []
+        self._seq = itertools.count()
+        now = self.clock.monotonic()
+        for t in token_ids: self.add(t, due=now)
+
+    def add(self, token_id: str, *, due: Optional[float] = None) -> None:
+        if token_id in self.state: return
+        st = self.state[token_id] = _TokenState(self.base_interval)
+        self._push(token_id, st, self.clock.monotonic() if due is None else due)
+
+    def _push(self, token_id: str, st: _TokenState, due: float) -> None:
+        st.gen += 1
+        st.due = due
+        heapq.heappush(self._heap, (due, next(self._seq), token_id, st.gen))
+
+    def next(self) -> Tuple[Optional[str], float]:
+        """(token to poll, seconds to wait first). Call take() right before polling it."""
+        while self._heap:
+            due, _, token_id, gen = self._heap[0]
+            if gen != self.state[token_id].gen:
+                heapq.heappop(self._heap); continue
+            return token_id, max(due - self.clock.monotonic(), self.bucket.wait_time(), 0.0)
+        return None, self.base_interval
+
+    def take(self, token_id: str) -> None:
+        """Spend budget on token_id and move it off the head of the queue."""
+        self.bucket.take()
+        st = self.state[token_id]
+        self._push(token_id, st, self.clock.monotonic() + st.interval)
+
+    def on_result(self, token_id: str, changed: Optional[bool]) -> None:
+        """Report a poll outcome: True changed, False unchanged, None failed."""
+        st = self.state[token_id]
+        now = self.clock.monotonic()
+        if changed is None:
+            st.interval = min(self.max_interval, st.interval * self.backoff)
+        else:
+            st.last_poll = now
+            if changed:
+                st.last_change = now
+                st.interval = max(self.min_interval, st.interval * 0.5)
+            else:
+                st.interval = min(self.max_interval, st.interval * self.backoff)
+        if now < st.hot_until: st.interval = self.min_interval
+        self._push(token_id, st, now + st.interval)
+
+    def mark_hot(self, token_ids: Iterable[str], ttl_sec: float = 5.0) -> None:
+        """Poll these at min_interval for ttl_sec (e.g. while a trigger is open)."""
+        now = self.clock.monotonic()
+        for t in token_ids:
+            st = self.state.get(t)
+            if st is None: continue
+            st.hot_until = max(st.hot_until, now + ttl_sec)
+            st.interval = self.min_interval
+            if st.due > now + self.min_interval: self._push(t, st, now + self.min_interval)
+
+    def staleness(self) -> Dict[str, Optional[float]]:
+        """Seconds since each token's last successful poll (None if never polled)."""
+        now = self.clock.monotonic()
+        return {t: (None if st.last_poll is None else now - st.last_poll) for t, st in self.state.items()}
+
+    def publish_metrics(self) -> None:
+        for t, age in self.staleness().items():
+            if age is not None: self.registry.gauge("feed_staleness_seconds", token=t).set(age)
+            self.registry.gauge("feed_poll_interval_seconds", token=t).set(self.state[t].interval)
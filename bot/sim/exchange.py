@@ -0,0 +1,115 @@
+from __future__ import annotations
+import asyncio, json, threading, time
+from typing import Dict, Optional, Set
+from aiohttp import web, WSMsgType
+from bot.sim.synthetic import SyntheticMarket
+
+class StandInExchange:
+    """
+    Local stand-in for the CLOB market-data endpoints, backed by a SyntheticMarket:
+      GET /book?token_id=...   REST book in the shape ClobClient.get_order_book parses
+      GET /ws/market           WebSocket; send {"assets_ids": [...]} to subscribe,
+                               then receive {"event_type": "book", ...} on every update
+    Runs on its own thread + event loop so blocking REST clients in the bot's
+    loop can still reach it.
+    """
+
+    def __init__(self, market: SyntheticMarket, *, host: str = "127.0.0.1", port: int = 0):
+        self.market = market
+        self.msg_rate = float(market.cfg.msg_rate)
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self.ws_sent = 0
+        self._subs: Dict[web.WebSocketResponse, Set[str]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._gen_task: Optional[asyncio.Task] = None
+        self._ready = threading.Event()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def set_rate(self, msg_rate: float) -> None:
+        self.msg_rate = max(0.0, float(msg_rate))
+
+    async def _book(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        book = self.market.book(request.query.get("token_id", ""))
+        if book is None:
+            return web.json_response({"error": "No orderbook exists for the requested token id"}, status=404)
+        return web.json_response(book)
+
+    async def _ws(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        self._subs[ws] = set()
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT: continue
+                try: sub = json.loads(msg.data)
+                except ValueError: continue
+                assets = [str(a) for a in (sub.get("assets_ids") or [])]
+                self._subs[ws].update(assets)
+                for a in assets:
+                    book = self.market.book(a)
+                    if book: await ws.send_str(json.dumps({"event_type": "book", **book}))
+        finally:
+            self._subs.pop(ws, None)
+        return ws
+
+    async def _generate(self) -> None:
+        last = time.perf_counter()
+        owed = 0.0
+        while True:
+            await asyncio.sleep(0.001 if self.msg_rate > 0 else 0.05)
+            now = time.perf_counter()
+            owed += (now - last) * self.msg_rate
+            last = now
+            while owed >= 1.0:
+                owed -= 1.0
+                token_id = self.market.step()
+                if not self._subs: continue
+                payload = None
+                for ws, assets in list(self._subs.items()):
+                    if token_id not in assets or ws.closed: continue
+                    if payload is None: payload = json.dumps({"event_type": "book", **self.market.book(token_id)})
+                    await ws.send_str(payload)
+                    self.ws_sent += 1
+
+    async def _start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/book", self._book)
+        app.router.add_get("/ws/market", self._ws)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        self._gen_task = asyncio.create_task(self._generate())
+
+    async def _stop(self) -> None:
+        if self._gen_task: self._gen_task.cancel()
+        for ws in list(self._subs): await ws.close()
+        if self._runner: await self._runner.cleanup()
+
+    def start(self) -> str:
+        """Start on a background thread; returns the base URL."""
+        def _main():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self._start())
+            self._ready.set()
+            self._loop.run_forever()
+        self._thread = threading.Thread(target=_main, name="standin-exchange", daemon=True)
+        self._thread.start()
+        self._ready.wait(10)
+        return self.url
+
+    def stop(self) -> None:
+        if not self._loop: return
+        asyncio.run_coroutine_threadsafe(self._stop(), self._loop).result(10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread: self._thread.join(10)
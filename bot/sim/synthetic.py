@@ -0,0 +1,99 @@
+from __future__ import annotations
+import hashlib, math, random, time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional
+
+@dataclass(frozen=True)
+class SyntheticConfig:
+    tokens: int = 2
+    msg_rate: float = 10.0          # book updates/sec across all tokens
+    levels: int = 20
+    tick: float = 0.001
+    base_vol: float = 0.004         # per-update logit-space std-dev (low regime)
+    high_vol_mult: float = 4.0
+    regime_switch_prob: float = 0.01
+    lead_lag_steps: int = 3         # followers see the leader this many leader updates late
+    beta: float = 0.9
+    intercept: float = 0.05
+    follower_noise: float = 0.002
+    size_mean: float = 200.0
+    seed: int = 7
+    token_prefix: str = "SYN"
+
+def _logit(p: float) -> float: return math.log(p / (1.0 - p))
+def _sigmoid(x: float) -> float: return 1.0 / (1.0 + math.exp(-x))
+
+class SyntheticMarket:
+    """
+    Token 0 is the leader (a logit-space random walk with two volatility
+    regimes); every other token follows beta * lagged leader mid + intercept
+    with its own noise. Books are emitted in the CLOB REST book shape.
+    """
+
+    def __init__(self, cfg: SyntheticConfig):
+        self.cfg = cfg
+        self.rng = random.Random(cfg.seed)
+        self.token_ids: List[str] = [f"{cfg.token_prefix}-{i}" for i in range(max(2, cfg.tokens))]
+        self.leader = self.token_ids[0]
+        self.high_vol = False
+        self._x = 0.0
+        self._leader_hist: Deque[float] = deque([0.5] * (cfg.lead_lag_steps + 1), maxlen=cfg.lead_lag_steps + 1)
+        self.mids: Dict[str, float] = {t: 0.5 for t in self.token_ids}
+        self.versions: Dict[str, int] = {t: 0 for t in self.token_ids}
+        self._books: Dict[str, dict] = {}
+        self._rr = 0
+        self.updates = 0
+        for t in self.token_ids:
+            self._rebuild(t)
+
+    def _step_leader(self) -> None:
+        if self.rng.random() < self.cfg.regime_switch_prob:
+            self.high_vol = not self.high_vol
+        vol = self.cfg.base_vol * (self.cfg.high_vol_mult if self.high_vol else 1.0)
+        self._x = max(-4.0, min(4.0, self._x + self.rng.gauss(0.0, vol)))
+        mid = _sigmoid(self._x)
+        self._leader_hist.append(mid)
+        self.mids[self.leader] = mid
+
+    def _step_follower(self, token_id: str) -> None:
+        lagged = self._leader_hist[0]
+        mid = self.cfg.intercept + self.cfg.beta * lagged + self.rng.gauss(0.0, self.cfg.follower_noise)
+        self.mids[token_id] = max(0.02, min(0.98, mid))
+
+    def _rebuild(self, token_id: str) -> None:
+        c = self.cfg
+        mid = self.mids[token_id]
+        half = c.tick * (1 + (2 if self.high_vol else 0))
+        best_bid = max(c.tick, round((mid - half) / c.tick) * c.tick)
+        best_ask = min(1.0 - c.tick, max(best_bid + c.tick, round((mid + half) / c.tick) * c.tick))
+        rng = self.rng
+        bids = [{"price": f"{best_bid - i * c.tick:.4f}", "size": f"{rng.expovariate(1.0 / c.size_mean):.2f}"} for i in range(c.levels) if best_bid - i * c.tick > 0]
+        asks = [{"price": f"{best_ask + i * c.tick:.4f}", "size": f"{rng.expovariate(1.0 / c.size_mean):.2f}"} for i in range(c.levels) if best_ask + i * c.tick < 1.0]
+        self.versions[token_id] += 1
+        v = self.versions[token_id]
+        self._books[token_id] = {
+            "market": f"{c.token_prefix}-market",
+            "asset_id": token_id,
+            "timestamp": str(int(time.time() * 1000)),
+            "hash": hashlib.sha1(f"{token_id}:{v}".encode()).hexdigest(),
+            "bids": bids,
+            "asks": asks,
+            "min_order_size": "5",
+            "neg_risk": False,
+            "tick_size": str(c.tick),
+            "last_trade_price": f"{mid:.4f}",
+        }
+
+    def step(self) -> str:
+        """Advance one book update (round-robin over tokens); returns the updated token."""
+        token_id = self.token_ids[self._rr]
+        self._rr = (self._rr + 1) % len(self.token_ids)
+        if token_id == self.leader: self._step_leader()
+        else: self._step_follower(token_id)
+        self._rebuild(token_id)
+        self.updates += 1
+        return token_id
+
+    def book(self, token_id: str) -> Optional[dict]:
+        return self._books.get(token_id)
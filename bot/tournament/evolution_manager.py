@@ -1,19 +1,30 @@
 from __future__ import annotations
-import asyncio, json, os, time, random
-from typing import Dict, Any, List
+import asyncio, json, math, os, time, random
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 from bot.tournament.evolution_genome import Genome, random_genome, crossover, mutate
 from bot.tournament.evolution_variant import apply_genome
 from bot.tournament.evolution_score import compute_score
+from bot.tournament.lineage import LineageStore, rng_state, set_rng_state
+from bot.clock import Clock, WallClock
 
 def _now_id(): return time.strftime("%Y%m%d-%H%M%S")
 def _lerp(a: float, b: float, t: float) -> float: return a + (b-a)*t
-async def _sleep_minutes(m: float): await asyncio.sleep(m*60.0)
+
+# passing results first, then the longer rung (a better-informed score), then score
+def _rank_key(x: Dict[str, Any]): return (bool(x.get("ok")), x.get("rung", 0), x["score"])
 
 class EvolutionManager:
-    def __init__(self, base_cfg: Dict[str, Any]):
+    def __init__(self, base_cfg: Dict[str, Any], clock: Optional[Clock] = None):
         self.base_cfg = base_cfg
+        self.clock = clock or WallClock()
         self.ecfg = base_cfg.get("evolution", {})
         self.space = self.ecfg["space"]
+        dep = base_cfg.get("dependency", {})
+        if dep.get("online_fit", {}).get("enabled", False):
+            # beta/intercept are estimated live by RLS: pin them to the configured prior
+            lin = dep.get("linear", {})
+            b, c = float(lin.get("beta", 1.0)), float(lin.get("intercept", 0.0))
+            self.space = {**self.space, "beta": [b, b], "intercept": [c, c]}
         self.objective = self.ecfg["objective"]
         self.constraints = self.ecfg["constraints"]
         self.wf_cfg = self.ecfg.get("walkforward", {})
@@ -21,6 +32,37 @@ class EvolutionManager:
         self.base_runs_dir = str(base_cfg.get("paper", {}).get("runs", {}).get("base_dir", "./runs"))
         self.evo_dir = os.path.join(self.base_runs_dir, "evolution")
         os.makedirs(self.evo_dir, exist_ok=True)
+        self.market_dir = os.path.join(self.evo_dir, "market") if self.ecfg.get("shared_market_series", True) else ""
+        self.lineage = LineageStore(os.path.join(self.evo_dir, str(self.ecfg.get("lineage_file", "lineage.jsonl"))))
+        self.pool = None
+        self.publisher = None
+        self.scorer = None
+
+    def _mutation(self, t: float):
+        """(rate, strength) at annealing position t in [0, 1]."""
+        anneal = self.ecfg.get("annealing", {})
+        if not bool(anneal.get("enabled", True)): return 0.35, 0.18
+        return (_lerp(float(anneal.get("mutation_rate_start", 0.45)), float(anneal.get("mutation_rate_end", 0.15)), t),
+                _lerp(float(anneal.get("mutation_strength_start", 0.25)), float(anneal.get("mutation_strength_end", 0.08)), t))
+
+    def _new_genome(self, born: Any) -> Tuple[str, Genome]:
+        g = random_genome(self.rng, self.space)
+        return self.lineage.add_genome(g.to_dict(), born=born), g
+
+    def _breed(self, elites: List[Tuple[str, Genome]], t: float, born: Any) -> Tuple[str, Genome]:
+        """Child of two elites drawn with replacement, recorded with its parents."""
+        mut_rate, mut_strength = self._mutation(t)
+        (i1, p1), (i2, p2) = self.rng.choice(elites), self.rng.choice(elites)
+        child = crossover(self.rng, p1, p2)
+        child = mutate(self.rng, child, self.space, rate=mut_rate, strength=mut_strength)
+        return self.lineage.add_genome(child.to_dict(), parents=sorted({i1, i2}), born=born), child
+
+    def _genome(self, gid: str) -> Genome:
+        return Genome(**self.lineage.genomes[gid]["genome"])
+
+    def _write_ranked(self, label: str, ranked: List[Dict[str, Any]]) -> None:
+        with open(os.path.join(self.evo_dir, f"{label}.json"), "w", encoding="utf-8") as f:
+            json.dump(ranked, f, indent=2)
 
     async def run(self):
         G = int(self.ecfg.get("generations", 4))
@@ -29,75 +71,245 @@ class EvolutionManager:
         max_parallel = int(self.ecfg.get("max_parallel", 2))
         eval_minutes = float(self.ecfg.get("eval_minutes", 2))
 
-        anneal = self.ecfg.get("annealing", {})
-        a_on = bool(anneal.get("enabled", True))
-        r0 = float(anneal.get("mutation_rate_start", 0.45))
-        r1 = float(anneal.get("mutation_rate_end", 0.15))
-        s0 = float(anneal.get("mutation_strength_start", 0.25))
-        s1 = float(anneal.get("mutation_strength_end", 0.08))
+        pool_cfg = self.ecfg.get("process_pool", {})
+        if pool_cfg.get("enabled", False):
+            from bot.tournament.worker_pool import VariantWorkerPool, start_shared_books
+            if pool_cfg.get("shared_books", False):
+                self.base_cfg, self.publisher = start_shared_books(self.base_cfg)
+            self.pool = VariantWorkerPool(int(pool_cfg.get("workers", max_parallel)), publisher=self.publisher)
+            self.pool.start()
+
+        score_workers = int(self.wf_cfg.get("process_workers", 0))
+        if score_workers > 0 and self.wf_cfg.get("enabled", True):
+            from bot.tournament.rolling_walkforward_score import make_scoring_executor
+            self.scorer = make_scoring_executor(score_workers)
+
+        mode = str(self.ecfg.get("mode", "generational"))
+        ck = None
+        if bool(self.ecfg.get("resume", False)):
+            ck = self.lineage.last_checkpoint()
+            if not ck or ck.get("mode") != mode:
+                print(f"[EVOLUTION] no {mode} checkpoint in {self.lineage.path}; starting fresh")
+                ck = None
+        session = self.lineage.begin(mode=mode, seed=int(self.ecfg.get("seed", 1337)), resume=ck is not None)
+        if ck:
+            set_rng_state(self.rng, ck["rng"])
+            print(f"[EVOLUTION] resuming session {session} from {self.lineage.path}")
+
+        if mode == "steady_state":
+            await self._run_steady_state(G, N, elite_k, max_parallel, eval_minutes, ck)
+        else:
+            await self._run_generational(G, N, elite_k, max_parallel, eval_minutes, ck)
+        self.lineage.close()
 
-        pop: List[Genome] = [random_genome(self.rng, self.space) for _ in range(N)]
+        if self.pool:
+            # workers are daemonic, so an abnormal exit still takes them down
+            self.pool.shutdown(); self.pool = None
+        if self.publisher:
+            self.publisher.terminate(); self.publisher.join(5); self.publisher = None
+        if self.scorer:
+            self.scorer.shutdown(); self.scorer = None
 
-        for gen in range(1, G+1):
+    def _budgets(self, eval_minutes: float) -> List[float]:
+        """Cumulative eval minutes per successive-halving rung; one rung when halving is off."""
+        h = self.ecfg.get("halving", {})
+        if not bool(h.get("enabled", False)): return [eval_minutes]
+        eta, R = float(h.get("eta", 3)), max(1, int(h.get("rungs", 3)))
+        return [eval_minutes * eta ** (r - (R - 1)) for r in range(R)]
+
+    async def _run_generational(self, G: int, N: int, elite_k: int, max_parallel: int, eval_minutes: float, ck: Optional[Dict[str, Any]] = None):
+        if ck:
+            start = int(ck["gen"])
+            pop = [(gid, self._genome(gid)) for gid in ck["population"]]
+        else:
+            start = 1
+            pop = [self._new_genome(born=1) for _ in range(N)]
+        for gen in range(start, G+1):
             gen_id = f"gen{gen:02d}-{_now_id()}"
             t = 0.0 if G<=1 else (gen-1)/(G-1)
-            mut_rate = _lerp(r0, r1, t) if a_on else 0.35
-            mut_strength = _lerp(s0, s1, t) if a_on else 0.18
-
-            results = await self._eval_population(gen_id, pop, eval_minutes, max_parallel=max_parallel)
-            ranked = sorted(results, key=lambda x: x["score"], reverse=True)
-            out_path = os.path.join(self.evo_dir, f"{gen_id}.json")
-            with open(out_path, "w", encoding="utf-8") as f:
-                json.dump(ranked, f, indent=2)
+            self.lineage.checkpoint(mode="generational", gen=gen, rng=rng_state(self.rng), population=[gid for gid, _ in pop])
+
+            # an interrupted generation reruns with the same population; without halving,
+            # variants that had already finished keep their recorded result
+            reuse = {}
+            if ck and gen == start and not self.ecfg.get("halving", {}).get("enabled", False):
+                reuse = {r["id"]: r for r in self.lineage.query(session=self.lineage.session, gen=gen)}
+            results = await self._eval_population(gen_id, pop, eval_minutes, max_parallel=max_parallel, gen=gen, reuse=reuse)
+            ranked = sorted(results, key=_rank_key, reverse=True)
+            self._write_ranked(gen_id, ranked)
             print(f"[EVOLUTION] gen={gen} best={ranked[0]['score']:.4f} run={ranked[0].get('run_id')} reason={ranked[0].get('reason')}")
 
-            elites = ranked[:elite_k]
-            elite_genomes = [Genome(**e["genome"]) for e in elites]
+            elites = [(e["id"], Genome(**e["genome"])) for e in ranked[:elite_k]]
 
-            next_pop: List[Genome] = []
-            next_pop.extend(elite_genomes)
+            next_pop: List[Tuple[str, Genome]] = []
+            next_pop.extend(elites)
             while len(next_pop) < N:
-                p1 = self.rng.choice(elite_genomes)
-                p2 = self.rng.choice(elite_genomes)
-                child = crossover(self.rng, p1, p2)
-                child = mutate(self.rng, child, self.space, rate=mut_rate, strength=mut_strength)
-                next_pop.append(child)
+                next_pop.append(self._breed(elites, t, born=gen+1))
             pop = next_pop
+        if start <= G:
+            self.lineage.checkpoint(mode="generational", gen=G+1, rng=rng_state(self.rng), population=[gid for gid, _ in pop])
+
+    async def _run_steady_state(self, G: int, N: int, elite_k: int, max_parallel: int, eval_minutes: float, ck: Optional[Dict[str, Any]] = None):
+        """
+        Same evaluation budget (G * N) without generation barriers: whenever an
+        evaluation finishes, its result joins the live population and the worst
+        member is dropped; the freed slot immediately starts a child bred from the
+        current elites. Every N completions a ranked snapshot is written in the
+        per-generation file format.
 
-    async def _eval_population(self, gen_id: str, pop: List[Genome], eval_minutes: float, *, max_parallel: int):
+        With halving enabled, promotion is asynchronous (ASHA): a result in the
+        top 1/eta of everything seen at its rung is resumed to the next rung
+        ahead of any new child.
+
+        The lineage gets a checkpoint whenever a job starts or finishes; on
+        resume, jobs that were in flight are rerun first.
+        """
+        total = G * N
         sem = asyncio.Semaphore(max_parallel)
-        tasks = []
-        for i, g in enumerate(pop):
-            tag = f"evo-{gen_id}-v{i:02d}"
-            tasks.append(asyncio.create_task(self._run_one(sem, g, tag, eval_minutes)))
-        return await asyncio.gather(*tasks)
+        budgets = self._budgets(eval_minutes)
+        eta = float(self.ecfg.get("halving", {}).get("eta", 3))
+        # a job is [genome id, tag, minutes, rung, run id to resume]
+        if ck:
+            run_id, state, pop, rung_scores = ck["run_id"], ck["state"], ck["pop"], ck["rung_scores"]
+            promotions: List[list] = ck["inflight"] + ck["promotions"]
+            state["promoted"] += len(ck["inflight"])
+        else:
+            run_id, pop, rung_scores, promotions = _now_id(), [], [[] for _ in budgets], []
+            state = {"started": 0, "done": 0, "jobs": 0, "promoted": 0, "snap": 0}
+        inflight: Dict[tuple, list] = {}
+
+        def checkpoint():
+            self.lineage.checkpoint(mode="steady_state", run_id=run_id, rng=rng_state(self.rng), state=state,
+                                    pop=[{k: v for k, v in x.items() if k != "rolling_walkforward"} for x in pop],
+                                    rung_scores=rung_scores, promotions=promotions, inflight=list(inflight.values()))
+
+        def next_job() -> tuple:
+            # resolved once a slot is acquired, so children come from the freshest population
+            state["jobs"] += 1
+            if promotions:
+                job = promotions.pop(0)
+            else:
+                i = state["started"]; state["started"] += 1
+                if i < N or not pop:
+                    gid, _ = self._new_genome(born=f"e{i}")
+                else:
+                    elites = [(e["id"], Genome(**e["genome"])) for e in sorted(pop, key=_rank_key, reverse=True)[:elite_k]]
+                    gid, _ = self._breed(elites, state["done"] / max(1, total - 1), born=f"e{i}")
+                job = [gid, f"evo-ss{run_id}-e{i:04d}", budgets[0], 0, None]
+            inflight[(job[1], job[3])] = job
+            checkpoint()
+            return (job[0], self._genome(job[0]), *job[1:])
 
-    async def _run_one(self, sem: asyncio.Semaphore, genome: Genome, tag: str, eval_minutes: float):
+        # every queued task finds a job: there are never more tasks than new children plus promotions
+        queued = state["jobs"]
+        pending = set()
+        while queued < total + state["promoted"] or pending:
+            # keep a few extra tasks queued on the semaphore so slots refill while others are scored
+            while queued < total + state["promoted"] and len(pending) < 2 * max_parallel:
+                pending.add(asyncio.create_task(self._run_one(sem, next_job, None, eval_minutes)))
+                queued += 1
+            finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # a fixed order for simultaneous completions keeps runs (and resumes) reproducible
+            for res in sorted((t.result() for t in finished), key=lambda x: (x["tag"], x["rung"])):
+                r = res["rung"]
+                inflight.pop((res["tag"], r), None)
+                self.lineage.add_result(res)
+                pop[:] = [x for x in pop if x["tag"] != res["tag"]]
+                pop.append(res)
+                if len(pop) > N:
+                    pop.remove(min(pop, key=_rank_key))
+                if r + 1 < len(budgets) and res.get("run_id"):
+                    seen = rung_scores[r]; seen.append(res["score"])
+                    # top 1/eta so far; ties count against, so a run of equal failures isn't promoted wholesale
+                    if sum(1 for x in seen if x >= res["score"]) <= int(len(seen) / eta):
+                        promotions.append([res["id"], res["tag"], budgets[r+1] - budgets[r], r + 1, res["run_id"]])
+                        state["promoted"] += 1
+                if r == 0: state["done"] += 1
+                checkpoint()
+                # promoted results only trigger the final snapshot, once nothing is left to run
+                if r > 0 and (pending or queued < total + state["promoted"]): continue
+                if state["done"] % N == 0 or state["done"] == total:
+                    state["snap"] += 1
+                    ranked = sorted(pop, key=_rank_key, reverse=True)
+                    self._write_ranked(f"gen{state['snap']:02d}-{_now_id()}", ranked)
+                    print(f"[EVOLUTION] steady evals={state['done']}/{total} promoted={state['promoted']} best={ranked[0]['score']:.4f} run={ranked[0].get('run_id')} reason={ranked[0].get('reason')}")
+
+    async def _eval_population(self, gen_id: str, pop: List[Tuple[str, Genome]], eval_minutes: float, *, max_parallel: int,
+                               gen: int = 0, reuse: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        Successive halving when enabled: everyone runs the first rung, the top
+        1/eta by score resume their run (from its checkpoint) up to the next
+        rung's budget, and so on up to eval_minutes. Results keep the highest
+        rung each genome reached.
+        """
+        sem = asyncio.Semaphore(max_parallel)
+        budgets = self._budgets(eval_minutes)
+        eta = float(self.ecfg.get("halving", {}).get("eta", 3))
+        reuse = reuse or {}
+        results: Dict[int, Dict[str, Any]] = {i: reuse[gid] for i, (gid, _) in enumerate(pop) if gid in reuse}
+        live = [(i, gid, g, None) for i, (gid, g) in enumerate(pop) if i not in results]
+        spent = 0.0
+        for r, b in enumerate(budgets):
+            tasks = [asyncio.create_task(self._run_one(sem, g, f"evo-{gen_id}-v{i:02d}", b - spent, gid=gid, rung=r, resume_run_id=rid))
+                     for i, gid, g, rid in live]
+            out = await asyncio.gather(*tasks)
+            for (i, *_), res in zip(live, out):
+                results[i] = res
+                self.lineage.add_result(res, gen=gen)
+            if r + 1 == len(budgets): break
+            k = max(1, math.ceil(len(live) / eta))
+            best = sorted(range(len(live)), key=lambda j: _rank_key(out[j]), reverse=True)[:k]
+            live = [(*live[j][:3], out[j]["run_id"]) for j in best if out[j].get("run_id")]
+            if not live: break
+            spent = b
+            print(f"[EVOLUTION] {gen_id} rung={r} budget={b:.2f}m promoting {len(live)}/{len(out)}")
+        return [results[i] for i in range(len(pop))]
+
+    async def _run_one(self, sem: asyncio.Semaphore, genome: Union[Genome, Callable[[], tuple]], tag: Optional[str], eval_minutes: float,
+                       *, gid: Optional[str] = None, rung: int = 0, resume_run_id: Optional[str] = None):
         async with sem:
+            if callable(genome): gid, genome, tag, eval_minutes, rung, resume_run_id = genome()
             cfg = apply_genome(self.base_cfg, genome, tag=tag)
-            from bot.app import App
-            app = App(cfg)
-            task = asyncio.create_task(app.run())
-            await _sleep_minutes(eval_minutes)
-            try: await app.shutdown()
-            except Exception: pass
-            task.cancel()
-            try: await task
-            except Exception: pass
-
-            run_id = self._find_latest_run_id(prefix=f"{tag}-")
-            summary = self._load_summary(run_id) if run_id else None
-            if not summary:
-                return {"tag": tag, "run_id": run_id, "genome": genome.to_dict(), "score": -1e9, "ok": False, "reason": "no summary"}
-
-            run_dir = os.path.join(self.base_runs_dir, run_id)
-            perf_regime_cfg = self.base_cfg.get("paper", {}).get("performance", {}).get("regime", {})
-            if self.wf_cfg.get("enabled", True):
-                from bot.tournament.rolling_walkforward_score import rolling_walkforward_score
-                rwf = rolling_walkforward_score(run_dir=run_dir, summary=summary, objective=self.objective, constraints=self.constraints, wf_cfg=self.wf_cfg, perf_regime_cfg=perf_regime_cfg)
-                return {"tag": tag, "run_id": run_id, "genome": genome.to_dict(), "score": rwf.score, "ok": rwf.ok, "reason": rwf.reason, "rolling_walkforward": [fr.__dict__ for fr in rwf.folds]}
-            sc = compute_score(summary, self.objective, self.constraints)
-            return {"tag": tag, "run_id": run_id, "genome": genome.to_dict(), "score": sc.value, "ok": sc.ok, "reason": sc.reason}
+            mv = cfg["paper"].setdefault("market_vol", {})
+            if self.market_dir and not mv.get("shared_dir"): mv["shared_dir"] = self.market_dir
+            if self.ecfg.get("halving", {}).get("enabled", False):
+                # a promoted run continues from the checkpoint its shorter rung left behind
+                cfg["paper"].setdefault("checkpoint", {})["enabled"] = True
+            if resume_run_id:
+                cfg["paper"]["runs"]["resume_dir"] = os.path.join(self.base_runs_dir, resume_run_id)
+            run_id = None
+            if self.pool:
+                try: run_id = (await self.pool.submit(cfg, eval_minutes * 60.0)).get("run_id")
+                except Exception as e: print(f"[EVOLUTION] {tag} worker failed: {e}")
+            else:
+                from bot.app import App
+                try: app = App(cfg, clock=self.clock)
+                except Exception as e:  # e.g. a resume whose checkpoint is gone
+                    app = None; print(f"[EVOLUTION] {tag} failed to start: {e}")
+                if app is not None:
+                    task = asyncio.create_task(app.run())
+                    await self.clock.sleep(eval_minutes * 60.0)
+                    await app.shutdown()
+                    try: await task
+                    except BaseException: pass
+
+        # scoring runs after the slot is released, so the next variant starts
+        # evaluating while this one is scored (off-loop when a scorer exists)
+        run_id = run_id or resume_run_id or self._find_latest_run_id(prefix=f"{tag}-")
+        summary = self._load_summary(run_id) if run_id else None
+        base = {"id": gid, "tag": tag, "run_id": run_id, "genome": genome.to_dict(), "rung": rung}
+        if not summary:
+            return {**base, "score": -1e9, "ok": False, "reason": "no summary"}
+
+        run_dir = os.path.join(self.base_runs_dir, run_id)
+        perf_regime_cfg = self.base_cfg.get("paper", {}).get("performance", {}).get("regime", {})
+        if self.wf_cfg.get("enabled", True):
+            from bot.tournament.rolling_walkforward_score import rolling_walkforward_score, rolling_walkforward_score_async
+            kw = dict(run_dir=run_dir, summary=summary, objective=self.objective, constraints=self.constraints, wf_cfg=self.wf_cfg, perf_regime_cfg=perf_regime_cfg)
+            rwf = await rolling_walkforward_score_async(self.scorer, **kw) if self.scorer else rolling_walkforward_score(**kw)
+            return {**base, "score": rwf.score, "ok": rwf.ok, "reason": rwf.reason, "rolling_walkforward": [fr.__dict__ for fr in rwf.folds]}
+        sc = compute_score(summary, self.objective, self.constraints)
+        return {**base, "score": sc.value, "ok": sc.ok, "reason": sc.reason}
 
     def _find_latest_run_id(self, prefix: str):
         if not os.path.exists(self.base_runs_dir): return None
@@ -0,0 +1,124 @@
+from __future__ import annotations
+import json, os, random, time
+from typing import Any, Dict, Iterator, List, Optional
+
+# Append-only JSONL, one record per line, each with a "kind":
+#   session     a run of EvolutionManager starts (mode, seed)
+#   genome      id, genome, parents, born (generation or eval index)
+#   result      id, tag, gen, rung, run_id, score, ok, reason
+#   checkpoint  everything resume needs: rng state, counters, population
+# A crash can only tear the last line: readers skip it and LineageStore cuts
+# it off before its first append, so the next record starts on its own line.
+
+def read_lineage(path: str) -> Iterator[Dict[str, Any]]:
+    if not os.path.exists(path): return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try: yield json.loads(line)
+            except ValueError: continue
+
+def _drop_torn_tail(path: str) -> None:
+    """Truncate the file back to just after its last newline."""
+    if not os.path.exists(path): return
+    with open(path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+        while pos > 0:
+            step = min(4096, pos)
+            f.seek(pos - step)
+            i = f.read(step).rfind(b"\n")
+            if i >= 0:
+                pos = pos - step + i + 1; break
+            pos -= step
+        if pos != end: f.truncate(pos)
+
+def rng_state(rng: random.Random) -> list:
+    v, internal, gauss = rng.getstate()
+    return [v, list(internal), gauss]
+
+def set_rng_state(rng: random.Random, st: list) -> None:
+    rng.setstate((st[0], tuple(st[1]), st[2]))
+
+class LineageStore:
+    """Writer plus in-memory index of one lineage file; reopening replays it."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.genomes: Dict[str, Dict[str, Any]] = {}
+        self.results: List[Dict[str, Any]] = []
+        self.checkpoints: Dict[int, Dict[str, Any]] = {}  # session -> latest
+        self.session = 0
+        self._next_id = 0
+        for rec in read_lineage(path):
+            self._index(rec)
+        self._f = None
+
+    def _index(self, rec: Dict[str, Any]) -> None:
+        kind = rec.get("kind")
+        if kind == "session":
+            self.session = max(self.session, int(rec["session"]))
+        elif kind == "genome":
+            self.genomes[rec["id"]] = rec
+            self._next_id = max(self._next_id, int(rec["id"][1:]) + 1)
+        elif kind == "result":
+            self.results.append(rec)
+        elif kind == "checkpoint":
+            self.checkpoints[int(rec["session"])] = rec
+
+    def _append(self, rec: Dict[str, Any]) -> Dict[str, Any]:
+        rec.setdefault("ts", time.time())
+        if self._f is None:
+            # only a writer repairs: a reader (tools/lineage.py) may race a live append
+            _drop_torn_tail(self.path)
+            self._f = open(self.path, "a", encoding="utf-8")
+        self._f.write(json.dumps(rec, separators=(",", ":")) + "\n")
+        self._f.flush()
+        self._index(rec)
+        return rec
+
+    def begin(self, *, mode: str, seed: int, resume: bool = False) -> int:
+        """Open a new session, or keep the last one when resuming it."""
+        if not (resume and self.session):
+            self._append({"kind": "session", "session": self.session + 1, "mode": mode, "seed": seed})
+        return self.session
+
+    def add_genome(self, genome: Dict[str, Any], parents: Optional[List[str]] = None, born: Any = None) -> str:
+        gid = f"g{self._next_id:06d}"
+        self._append({"kind": "genome", "id": gid, "session": self.session, "genome": genome, "parents": list(parents or []), "born": born})
+        return gid
+
+    def add_result(self, res: Dict[str, Any], **extra) -> None:
+        keep = ("id", "tag", "rung", "run_id", "score", "ok", "reason")
+        self._append({"kind": "result", "session": self.session, **{k: res.get(k) for k in keep}, **extra})
+
+    def checkpoint(self, **state) -> None:
+        self._append({"kind": "checkpoint", "session": self.session, **state})
+
+    def last_checkpoint(self, session: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        return self.checkpoints.get(self.session if session is None else session)
+
+    def query(self, *, session: Optional[int] = None, gen: Optional[int] = None, min_rung: int = 0, ok: Optional[bool] = None) -> List[Dict[str, Any]]:
+        return [r for r in self.results
+                if (session is None or r.get("session") == session) and (gen is None or r.get("gen") == gen)
+                and int(r.get("rung") or 0) >= min_rung and (ok is None or bool(r.get("ok")) == ok)]
+
+    def best(self, n: int = 10, **filters) -> List[Dict[str, Any]]:
+        """Top results, each joined with its genome."""
+        rows = sorted(self.query(**filters), key=lambda r: (bool(r.get("ok")), int(r.get("rung") or 0), r["score"]), reverse=True)
+        return [{**r, "genome": self.genomes.get(r.get("id"), {}).get("genome")} for r in rows[:n]]
+
+    def ancestry(self, gid: str) -> List[Dict[str, Any]]:
+        """The genome record and all its ancestors, breadth first."""
+        out, seen, todo = [], set(), [gid]
+        while todo:
+            g = todo.pop(0)
+            if g in seen or g not in self.genomes: continue
+            seen.add(g)
+            out.append(self.genomes[g])
+            todo.extend(self.genomes[g].get("parents") or [])
+        return out
+
+    def close(self) -> None:
+        if self._f is not None:
+            self._f.close(); self._f = None
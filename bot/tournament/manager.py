@@ -1,17 +1,38 @@
 from __future__ import annotations
 import asyncio
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from bot.tournament.variant import StrategyVariant
+from bot.clock import Clock
 
 class TournamentManager:
-    def __init__(self, base_cfg: Dict[str, Any]):
+    def __init__(self, base_cfg: Dict[str, Any], clock: Optional[Clock] = None):
         self.base_cfg = base_cfg
+        self.clock = clock
+        self.variants = []
     async def run(self):
         tcfg = self.base_cfg.get("tournament", {})
         variants_cfg = tcfg.get("variants", [])
         max_parallel = int(tcfg.get("max_parallel", len(variants_cfg) or 1))
         sem = asyncio.Semaphore(max_parallel)
-        variants = [StrategyVariant(self.base_cfg, v) for v in variants_cfg]
+        pool_cfg = tcfg.get("process_pool", {})
+        if pool_cfg.get("enabled", False):
+            # one pre-warmed process per slot; variants run until the pool is shut down
+            from bot.tournament.worker_pool import VariantWorkerPool, start_shared_books
+            base_cfg, publisher = self.base_cfg, None
+            if pool_cfg.get("shared_books", False):
+                base_cfg, publisher = start_shared_books(self.base_cfg)
+            variants = [StrategyVariant(base_cfg, v) for v in variants_cfg]
+            pool = VariantWorkerPool(int(pool_cfg.get("workers", max_parallel)), publisher=publisher)
+            pool.start()
+            try:
+                for res in asyncio.as_completed([pool.submit(v.cfg) for v in variants]):
+                    try: print("[TOURNAMENT] variant finished:", await res)
+                    except Exception as e: print("[TOURNAMENT] variant failed:", e)
+            finally:
+                pool.shutdown()
+                if publisher: publisher.terminate(); publisher.join(5)
+            return
+        variants = self.variants = [StrategyVariant(self.base_cfg, v, clock=self.clock) for v in variants_cfg]
         async def _run(v):
             async with sem:
                 await v.start()
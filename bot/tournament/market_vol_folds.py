@@ -1,7 +1,7 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import List, Optional, Tuple
-import csv, os, math
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional, Tuple
+import csv, os, math, json, hashlib
 
 @dataclass(frozen=True)
 class FoldWindow:
@@ -10,6 +10,9 @@ class FoldWindow:
     points: int
     high_frac: float
     vol_mean: float
+    # time range of the window in the mid series; scoring slices equity by it when set
+    start_ts: Optional[float] = None
+    end_ts: Optional[float] = None
 
 def _rolling_vol(xs: List[float], window: int) -> List[float]:
     out = [0.0]*len(xs)
@@ -26,15 +29,19 @@ def _rolling_vol(xs: List[float], window: int) -> List[float]:
         out[i] = math.sqrt(var)
     return out
 
-def select_market_vol_balanced_folds(market_mid_csv: str, *, folds: int, min_fold_points: int, min_high_frac: float, max_overlap_frac: float, candidate_stride_points: int, candidates_per_fold: int, vol_window_points: int, high_vol_threshold: float) -> List[FoldWindow]:
+def select_market_vol_balanced_folds(market_mid_csv: str, *, folds: int, min_fold_points: int, min_high_frac: float, max_overlap_frac: float, candidate_stride_points: int, candidates_per_fold: int, vol_window_points: int, high_vol_threshold: float,
+                                     start_ts: Optional[float] = None, end_ts: Optional[float] = None) -> List[FoldWindow]:
+    """Indices count from the first row inside [start_ts, end_ts] (the whole file by default)."""
     if not os.path.exists(market_mid_csv):
         return []
-    mids = []
+    mids, ts = [], []
     with open(market_mid_csv, "r", encoding="utf-8") as f:
         r = csv.DictReader(f)
         for row in r:
-            try: mids.append(float(row["mid"]))
-            except Exception: pass
+            try: t, m = float(row["ts"]), float(row["mid"])
+            except Exception: continue
+            if (start_ts is not None and t < start_ts) or (end_ts is not None and t > end_ts): continue
+            ts.append(t); mids.append(m)
     if len(mids) < min_fold_points*2:
         return []
     rets = [(mids[i]/mids[i-1]-1.0) for i in range(1,len(mids)) if mids[i-1] > 0]
@@ -64,7 +71,7 @@ def select_market_vol_balanced_folds(market_mid_csv: str, *, folds: int, min_fol
             if high_frac < min_high_frac:
                 continue
             vmean = sum(vol_slice)/max(1,len(vol_slice))
-            cand = FoldWindow(start, end, end-start, high_frac, vmean)
+            cand = FoldWindow(start, end, end-start, high_frac, vmean, ts[start], ts[end-1])
             if any(overlap((start,end), u) > max_overlap_frac for u in used):
                 continue
             if best is None or (cand.high_frac > best.high_frac) or (cand.high_frac == best.high_frac and cand.vol_mean > best.vol_mean):
@@ -74,3 +81,26 @@ def select_market_vol_balanced_folds(market_mid_csv: str, *, folds: int, min_fol
         windows.append(best)
         used.append((best.start_idx, best.end_idx))
     return windows
+
+_MEMO: Dict[str, List[FoldWindow]] = {}
+
+def cached_market_vol_folds(market_mid_csv: str, *, start_ts: float, end_ts: float, **params: Any) -> List[FoldWindow]:
+    """
+    select_market_vol_balanced_folds over a shared per-pair series, memoized by
+    (series, time range, fold params) in-process and in <series dir>/folds/ so
+    every variant over the same span (and every scoring worker) reuses one search.
+    """
+    key = hashlib.sha1(json.dumps([os.path.abspath(market_mid_csv), start_ts, end_ts, params], sort_keys=True).encode()).hexdigest()[:16]
+    hit = _MEMO.get(key)
+    if hit is not None: return hit
+    path = os.path.join(os.path.dirname(market_mid_csv), "folds", f"{key}.json")
+    try:
+        with open(path, "r", encoding="utf-8") as f: windows = [FoldWindow(**w) for w in json.load(f)]
+    except (OSError, ValueError, TypeError):
+        windows = select_market_vol_balanced_folds(market_mid_csv, start_ts=start_ts, end_ts=end_ts, **params)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f: json.dump([asdict(w) for w in windows], f)
+        os.replace(tmp, path)
+    _MEMO[key] = windows
+    return windows
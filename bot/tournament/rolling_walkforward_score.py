@@ -1,9 +1,11 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Dict, Any, List
-import os, json
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio, csv, math, os, json
+import multiprocessing as mp
+from concurrent.futures import Executor, ProcessPoolExecutor
 from bot.tournament.walkforward_stats import compute_slice_stats
-from bot.tournament.market_vol_folds import select_market_vol_balanced_folds, FoldWindow
+from bot.tournament.market_vol_folds import select_market_vol_balanced_folds, cached_market_vol_folds, FoldWindow
 from bot.tournament.evolution_score import compute_score, Score
 
 @dataclass
@@ -14,6 +16,8 @@ class FoldResult:
     ok: bool
     score: float
     reason: str
+    start_ts: Optional[float] = None
+    end_ts: Optional[float] = None
 
 @dataclass
 class RollingWFResult:
@@ -22,9 +26,33 @@ class RollingWFResult:
     reason: str
     folds: List[FoldResult]
 
-def rolling_walkforward_score(*, run_dir: str, summary: Dict[str, Any], objective: Dict[str, float], constraints: Dict[str, Any], wf_cfg: Dict[str, Any], perf_regime_cfg: Dict[str, Any]) -> RollingWFResult:
-    equity_csv = os.path.join(run_dir, "equity_timeseries.csv")
-    market_mid_csv = os.path.join(run_dir, wf_cfg.get("market_mid_csv_name", "market_mid_timeseries.csv"))
+def _shared_mid_csv(run_dir: str) -> Optional[str]:
+    """The per-pair shared mid series this run logged into (run_meta.json), if any."""
+    try:
+        with open(os.path.join(run_dir, "run_meta.json"), "r", encoding="utf-8") as f:
+            return json.load(f).get("market_mid_csv")
+    except (OSError, ValueError):
+        return None
+
+def _run_span(run_dir: str, quantum_sec: float) -> Optional[Tuple[float, float]]:
+    """First/last equity timestamp, shrunk to multiples of quantum_sec so runs over the same span share a key."""
+    first = last = None
+    try:
+        with open(os.path.join(run_dir, "equity_timeseries.csv"), "r", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                try: t = float(row["ts"])
+                except Exception: continue
+                if first is None: first = t
+                last = t
+    except OSError:
+        return None
+    if first is None: return None
+    q = max(quantum_sec, 1e-9)
+    return math.ceil(first / q) * q, math.floor(last / q) * q
+
+def select_fold_windows(run_dir: str, wf_cfg: Dict[str, Any]) -> List[FoldWindow]:
+    shared = _shared_mid_csv(run_dir)
+    market_mid_csv = shared or os.path.join(run_dir, wf_cfg.get("market_mid_csv_name", "market_mid_timeseries.csv"))
     folds = int(wf_cfg.get("folds", 4))
     min_fold_minutes = float(wf_cfg.get("min_fold_minutes", 1))
     # rough: 5 logs/sec in mock, but we keep it simple and require 30 points per minute
@@ -33,8 +61,7 @@ def rolling_walkforward_score(*, run_dir: str, summary: Dict[str, Any], objectiv
     use_vol_balanced = bool(wf_cfg.get("market_vol_balanced_folds", True))
     windows: List[FoldWindow] = []
     if use_vol_balanced:
-        windows = select_market_vol_balanced_folds(
-            market_mid_csv,
+        params = dict(
             folds=folds,
             min_fold_points=min_fold_points,
             min_high_frac=float(wf_cfg.get("min_high_frac", 0.2)),
@@ -44,37 +71,45 @@ def rolling_walkforward_score(*, run_dir: str, summary: Dict[str, Any], objectiv
             vol_window_points=int(wf_cfg.get("market_vol_window_points", 60)),
             high_vol_threshold=float(wf_cfg.get("market_high_vol_threshold", 0.0015)),
         )
+        span = _run_span(run_dir, float(wf_cfg.get("fold_span_quantum_sec", 10))) if shared else None
+        if span:
+            # one search per (pair, span, params), shared by every variant that ran over that span
+            windows = cached_market_vol_folds(shared, start_ts=span[0], end_ts=span[1], **params)
+        elif not shared:
+            windows = select_market_vol_balanced_folds(market_mid_csv, **params)
     if not windows:
         # fallback single window: last min_fold_points
         windows = [FoldWindow(max(0, 0), max(0, min_fold_points), min_fold_points, 0.0, 0.0)]
+    return windows
 
-    fold_results: List[FoldResult] = []
-    for i, win in enumerate(windows):
-        st = compute_slice_stats(
-            equity_csv,
-            start_idx=win.start_idx,
-            end_idx=win.end_idx,
-            vol_window_points=int(perf_regime_cfg.get("vol_window_points", 60)),
-            high_vol_threshold=float(perf_regime_cfg.get("high_vol_threshold", 0.0015)),
-            min_points_each=int(perf_regime_cfg.get("min_points_each", 60)),
-        )
-        if not st:
-            fold_results.append(FoldResult(i, win.start_idx, win.end_idx, False, -1e9, "no_stats"))
-            continue
-        fold_summary = {
-            "equity": st.equity_end,
-            "fills": summary.get("fills", 0),
-            "max_drawdown_pct": st.max_drawdown,
-            "sharpe_like": st.sharpe_like,
-            "sharpe_low": st.sharpe_low,
-            "sharpe_high": st.sharpe_high,
-            "points_low": st.points_low,
-            "points_high": st.points_high,
-            "regime_ok": st.regime_ok,
-        }
-        sc: Score = compute_score(fold_summary, objective, constraints)
-        fold_results.append(FoldResult(i, win.start_idx, win.end_idx, sc.ok, sc.value, sc.reason))
+def score_fold(run_dir: str, i: int, win: FoldWindow, summary: Dict[str, Any], objective: Dict[str, float], constraints: Dict[str, Any], perf_regime_cfg: Dict[str, Any]) -> FoldResult:
+    st = compute_slice_stats(
+        os.path.join(run_dir, "equity_timeseries.csv"),
+        start_idx=win.start_idx,
+        end_idx=win.end_idx,
+        start_ts=win.start_ts,
+        end_ts=win.end_ts,
+        vol_window_points=int(perf_regime_cfg.get("vol_window_points", 60)),
+        high_vol_threshold=float(perf_regime_cfg.get("high_vol_threshold", 0.0015)),
+        min_points_each=int(perf_regime_cfg.get("min_points_each", 60)),
+    )
+    if not st:
+        return FoldResult(i, win.start_idx, win.end_idx, False, -1e9, "no_stats", win.start_ts, win.end_ts)
+    fold_summary = {
+        "equity": st.equity_end,
+        "fills": summary.get("fills", 0),
+        "max_drawdown_pct": st.max_drawdown,
+        "sharpe_like": st.sharpe_like,
+        "sharpe_low": st.sharpe_low,
+        "sharpe_high": st.sharpe_high,
+        "points_low": st.points_low,
+        "points_high": st.points_high,
+        "regime_ok": st.regime_ok,
+    }
+    sc: Score = compute_score(fold_summary, objective, constraints)
+    return FoldResult(i, win.start_idx, win.end_idx, sc.ok, sc.value, sc.reason, win.start_ts, win.end_ts)
 
+def combine_folds(fold_results: List[FoldResult], wf_cfg: Dict[str, Any]) -> RollingWFResult:
     ok_folds = [f for f in fold_results if f.ok]
     if not ok_folds:
         return RollingWFResult(False, -1e9, "no_ok_folds", fold_results)
@@ -87,3 +122,21 @@ def rolling_walkforward_score(*, run_dir: str, summary: Dict[str, Any], objectiv
         std = var**0.5
         avg_score -= float(wf_cfg.get("instability_penalty", 0.4)) * std
     return RollingWFResult(True, avg_score, "ok", fold_results)
+
+def rolling_walkforward_score(*, run_dir: str, summary: Dict[str, Any], objective: Dict[str, float], constraints: Dict[str, Any], wf_cfg: Dict[str, Any], perf_regime_cfg: Dict[str, Any]) -> RollingWFResult:
+    windows = select_fold_windows(run_dir, wf_cfg)
+    fold_results = [score_fold(run_dir, i, win, summary, objective, constraints, perf_regime_cfg) for i, win in enumerate(windows)]
+    return combine_folds(fold_results, wf_cfg)
+
+async def rolling_walkforward_score_async(executor: Executor, *, run_dir: str, summary: Dict[str, Any], objective: Dict[str, float], constraints: Dict[str, Any], wf_cfg: Dict[str, Any], perf_regime_cfg: Dict[str, Any]) -> RollingWFResult:
+    """Same result as rolling_walkforward_score, with fold selection and every fold run on `executor`."""
+    loop = asyncio.get_running_loop()
+    windows = await loop.run_in_executor(executor, select_fold_windows, run_dir, wf_cfg)
+    fold_results = await asyncio.gather(*(
+        loop.run_in_executor(executor, score_fold, run_dir, i, win, summary, objective, constraints, perf_regime_cfg)
+        for i, win in enumerate(windows)))
+    return combine_folds(list(fold_results), wf_cfg)
+
+def make_scoring_executor(workers: int) -> Executor:
+    # spawn: workers must not inherit the parent's event loop or open feeds
+    return ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"))
@@ -1,10 +1,13 @@
 from __future__ import annotations
 from copy import deepcopy
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from bot.clock import Clock
 
 class StrategyVariant:
-    def __init__(self, base_cfg: Dict[str, Any], variant_cfg: Dict[str, Any]):
+    def __init__(self, base_cfg: Dict[str, Any], variant_cfg: Dict[str, Any], clock: Optional[Clock] = None):
         self.name = variant_cfg["name"]
+        self.clock = clock
+        self.app = None
         self.cfg = deepcopy(base_cfg)
         self.cfg.setdefault("dependency", {})
         self.cfg["dependency"]["trigger_move_pct"] = float(variant_cfg.get("dependency_shift_pct", self.cfg["dependency"].get("trigger_move_pct", 0.03)))
@@ -13,4 +16,5 @@ class StrategyVariant:
         self.cfg.setdefault("paper", {}).setdefault("runs", {})["tag"] = f"paper-{self.name}"
     async def start(self):
         from bot.app import App
-        await App(self.cfg).run()
+        self.app = App(self.cfg, clock=self.clock)
+        await self.app.run()
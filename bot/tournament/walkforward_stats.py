@@ -1,7 +1,7 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from typing import List, Optional, Tuple
-import csv, os, math
+import bisect, csv, os, math
 
 @dataclass
 class SliceStats:
@@ -47,7 +47,9 @@ def _regime_split(returns: List[float], vol_window: int, high_thr: float):
         (high if s >= high_thr else low).append(r)
     return low, high
 
-def compute_slice_stats(equity_csv_path: str, *, start_idx: int, end_idx: int, vol_window_points: int = 60, high_vol_threshold: float = 0.0015, min_points_each: int = 60) -> Optional[SliceStats]:
+def compute_slice_stats(equity_csv_path: str, *, start_idx: int, end_idx: int, vol_window_points: int = 60, high_vol_threshold: float = 0.0015, min_points_each: int = 60,
+                        start_ts: Optional[float] = None, end_ts: Optional[float] = None) -> Optional[SliceStats]:
+    """Stats of rows [start_idx, end_idx), or of the rows inside [start_ts, end_ts] when both are given."""
     if not os.path.exists(equity_csv_path): return None
     rows = []
     with open(equity_csv_path, "r", encoding="utf-8") as f:
@@ -56,6 +58,9 @@ def compute_slice_stats(equity_csv_path: str, *, start_idx: int, end_idx: int, v
             try: rows.append((float(row["ts"]), float(row["equity"])))
             except Exception: pass
     if len(rows) < 10: return None
+    if start_ts is not None and end_ts is not None:
+        tss = [x[0] for x in rows]
+        start_idx, end_idx = bisect.bisect_left(tss, start_ts), bisect.bisect_right(tss, end_ts)
     start_idx = max(0, start_idx); end_idx = min(len(rows), end_idx)
     if end_idx - start_idx < 10: return None
     sl = rows[start_idx:end_idx]
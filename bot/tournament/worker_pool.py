@@ -0,0 +1,193 @@
+from __future__ import annotations
+import asyncio, itertools, multiprocessing as mp, os, queue, threading, time, traceback
+from copy import deepcopy
+from typing import Any, Dict, Optional, Tuple
+
+async def _run_variant(cfg: Dict[str, Any], duration_sec: Optional[float]) -> Dict[str, Any]:
+    from bot.app import App
+    from bot.clock import VirtualClock
+    clock = VirtualClock() if str(cfg.get("clock", {}).get("mode", "wall")) == "virtual" else None
+    app = App(cfg, clock=clock)
+
+    async def _body():
+        task = asyncio.create_task(app.run())
+        if duration_sec is None:
+            await task; return
+        await app.clock.sleep(duration_sec)
+        await app.shutdown()
+        try: await task
+        except BaseException: pass
+
+    if clock is not None:
+        await clock.run(_body())
+    else:
+        await _body()
+    return {
+        "run_id": app.run_paths.run_id if app.run_paths else None,
+        "run_dir": app.run_paths.run_dir if app.run_paths else None,
+        "pid": os.getpid(),
+    }
+
+def _worker_main(jobs, results) -> None:
+    # pay the heavy imports (py_clob_client, web3 deps) once per worker, not per variant
+    import bot.app  # noqa: F401
+    results.put(("ready", os.getpid(), None))
+    while True:
+        job = jobs.get()
+        if job is None: break
+        jid, cfg, duration_sec = job
+        results.put(("started", jid, os.getpid()))
+        try:
+            results.put(("done", jid, asyncio.run(_run_variant(cfg, duration_sec))))
+        except Exception:
+            results.put(("error", jid, traceback.format_exc()))
+
+def _resolve(fut: asyncio.Future, kind: str, payload: Any) -> None:
+    if fut.done(): return
+    if kind == "done": fut.set_result(payload)
+    else: fut.set_exception(RuntimeError(f"variant worker failed:\n{payload}"))
+
+def start_shared_books(base_cfg: Dict[str, Any]) -> Tuple[Dict[str, Any], Any]:
+    """Start one book publisher for every token the variants trade; returns (cfg, process)."""
+    from bot.dependency_graph import load_dependency_graph
+    from bot.paper.shm_book import start_publisher_process
+    markets = base_cfg.get("markets", {})
+    a, b = str(markets.get("token_a", "MARKET_A")), str(markets.get("token_b", "MARKET_B"))
+    graph = load_dependency_graph(base_cfg.get("dependency", {}), token_a=a, token_b=b)
+    tokens = list(dict.fromkeys([a, b, *graph.tokens]))
+    name, proc = start_publisher_process(
+        tokens,
+        host=str(base_cfg.get("feed", {}).get("host", "https://clob.polymarket.com")),
+        max_levels=int(base_cfg.get("paper", {}).get("ws_l2", {}).get("max_levels", 200)),
+    )
+    cfg = deepcopy(base_cfg)
+    cfg.setdefault("feed", {})["shared_memory"] = name
+    print(f"[POOL] book publisher pid={proc.pid} shm={name} tokens={len(tokens)}")
+    return cfg, proc
+
+class VariantWorkerPool:
+    """
+    Persistent pool of pre-imported worker processes. Each worker runs one
+    variant App at a time on its own event loop; results stream back through
+    a queue and resolve the awaiting submit() in the manager's loop.
+    """
+
+    def __init__(self, workers: int, publisher: Optional[Any] = None):
+        self.workers = max(1, int(workers))
+        self.publisher = publisher  # shared-book process the variants read from, if any
+        self.broken: Optional[str] = None
+        self._ctx = mp.get_context("spawn")
+        self._jobs = self._ctx.Queue()
+        self._results = self._ctx.Queue()
+        self._procs = [self._new_worker(i) for i in range(self.workers)]
+        self._stopping = False
+        self._futures: Dict[int, Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = {}
+        self._ids = itertools.count()
+        self._ready = 0
+        self._ready_pids: set = set()
+        self._all_ready = threading.Event()
+        self._reader: Optional[threading.Thread] = None
+        self.running: Dict[int, int] = {}  # job id -> worker pid
+
+    def _new_worker(self, i: int):
+        return self._ctx.Process(target=_worker_main, args=(self._jobs, self._results), name=f"variant-worker-{i}", daemon=True)
+
+    def start(self, timeout: float = 120.0) -> None:
+        for p in self._procs: p.start()
+        self._reader = threading.Thread(target=self._read, name="variant-pool-reader", daemon=True)
+        self._reader.start()
+        self._all_ready.wait(timeout)
+        print(f"[POOL] {self._ready}/{self.workers} workers ready")
+
+    def _check_workers(self) -> None:
+        """Fail the jobs of workers that died (OOM kill, segfault...) and respawn them."""
+        if self._stopping: return
+        if self.publisher is not None and self.publisher.exitcode is not None:
+            # every variant would keep trading on frozen books: fail the pool loudly
+            self.broken = f"book publisher pid={self.publisher.pid} died with exit code {self.publisher.exitcode}"
+            print(f"[POOL] {self.broken}; stopping variants")
+            self._stopping = True
+            for p in self._procs:
+                if p is not None and p.is_alive(): p.terminate()
+            self.running.clear()
+            for jid in list(self._futures): self._finish(jid, "error", self.broken)
+            return
+        for i, p in enumerate(self._procs):
+            if p is None or p.exitcode is None: continue
+            for jid in [j for j, pid in self.running.items() if pid == p.pid]:
+                self.running.pop(jid, None)
+                self._finish(jid, "error", f"worker pid={p.pid} died with exit code {p.exitcode}")
+            if p.pid not in self._ready_pids:
+                # died before its first "ready": respawning would just crash-loop
+                print(f"[POOL] worker pid={p.pid} failed to start (exit code {p.exitcode})")
+                self._procs[i] = None; continue
+            print(f"[POOL] worker pid={p.pid} died (exit code {p.exitcode}); respawning")
+            self._procs[i] = self._new_worker(i)
+            self._procs[i].start()
+        # a "started" read after its worker was reaped names a pid no live worker has
+        live = {p.pid for p in self._procs if p is not None and p.exitcode is None}
+        for jid, pid in list(self.running.items()):
+            if pid not in live:
+                self.running.pop(jid, None)
+                self._finish(jid, "error", f"worker pid={pid} is gone")
+        if not any(self._procs):
+            for jid in list(self._futures): self._finish(jid, "error", "no live workers")
+
+    def _finish(self, jid: int, kind: str, payload: Any) -> None:
+        entry = self._futures.pop(jid, None)
+        if entry:
+            loop, fut = entry
+            loop.call_soon_threadsafe(_resolve, fut, kind, payload)
+
+    def _read(self) -> None:
+        last_check = time.monotonic()
+        while True:
+            if time.monotonic() - last_check >= 1.0:
+                # take what dead workers managed to send before judging their jobs
+                while True:
+                    try: msg = self._results.get_nowait()
+                    except queue.Empty: break
+                    except (EOFError, OSError): return
+                    if not self._handle(msg): return
+                self._check_workers(); last_check = time.monotonic()
+            try: msg = self._results.get(timeout=1.0)
+            except queue.Empty: continue
+            except (EOFError, OSError): return
+            if not self._handle(msg): return
+
+    def _handle(self, msg) -> bool:
+        """Apply one worker message; False on the shutdown sentinel."""
+        if msg is None: return False
+        kind, key, payload = msg
+        if kind == "ready":
+            self._ready += 1; self._ready_pids.add(key)
+            if self._ready >= self.workers: self._all_ready.set()
+        elif kind == "started":
+            self.running[key] = payload
+        else:
+            self.running.pop(key, None)
+            self._finish(key, kind, payload)
+        return True
+
+    async def submit(self, cfg: Dict[str, Any], duration_sec: Optional[float] = None) -> Dict[str, Any]:
+        """Run one variant config in a worker; duration None runs until shutdown()."""
+        if self.broken: raise RuntimeError(self.broken)
+        loop = asyncio.get_running_loop()
+        jid = next(self._ids)
+        fut = loop.create_future()
+        self._futures[jid] = (loop, fut)
+        self._jobs.put((jid, cfg, duration_sec))
+        return await fut
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        self._stopping = True
+        procs = [p for p in self._procs if p is not None]
+        for _ in procs: self._jobs.put(None)
+        for p in procs:
+            p.join(timeout)
+            if p.is_alive(): p.terminate()
+        self._results.put(None)
+        if self._reader: self._reader.join(timeout)
+        for loop, fut in self._futures.values():
+            loop.call_soon_threadsafe(_resolve, fut, "error", "pool shut down")
+        self._futures.clear()
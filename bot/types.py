@@ -8,6 +8,11 @@ class TopOfBook:
     ts: float
     bid: Optional[float]
     ask: Optional[float]
+    # freshness: exchange-side snapshot time (epoch sec) and the clock's
+    # monotonic time when the request went out / the response came back
+    exchange_ts: Optional[float] = None
+    sent_mono: Optional[float] = None
+    recv_mono: Optional[float] = None
     @property
     def midpoint(self) -> Optional[float]:
         if self.bid is None or self.ask is None:
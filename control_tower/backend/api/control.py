@@ -1,57 +1,69 @@
 from __future__ import annotations
-from fastapi import APIRouter
-import subprocess, os, signal, sys
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+from typing import List, Optional
+from supervisor import SUPERVISOR, BotSpec
 
 router = APIRouter()
-PID_FILE = os.environ.get("BOT_PID_FILE", "./control_tower_bot.pid")
+DEFAULT_BOT = "default"
 
+class StartRequest(BaseModel):
+    args: List[str] = []
+    restart: str = "on-failure"
+    max_restarts: int = 10
+    backoff_sec: float = 1.0
+    max_backoff_sec: float = 60.0
+    stable_sec: float = 60.0
+
+def _start(name: str, req: Optional[StartRequest]):
+    try: return SUPERVISOR.start(BotSpec(name=name, **dict(req or StartRequest())))
+    except ValueError as e: raise HTTPException(status_code=400, detail=str(e))
+
+def _found(x, name: str):
+    if x is None: raise HTTPException(status_code=404, detail=f"unknown bot {name!r}")
+    return x
+
+# single-bot endpoints used by the UI: they drive the bot named "default"
 @router.post("/control/start")
 def start_bot():
-    if os.path.exists(PID_FILE):
-        return {"ok": False, "error": "bot already running"}
-
-    # Get the project root directory (two levels up from control_tower/backend)
-    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../"))
-
-    env = os.environ.copy()
-    env["PYTHONUNBUFFERED"] = "1"
-    p = subprocess.Popen(
-        [sys.executable, "run.py"],
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL,
-        env=env,
-        cwd=project_root
-    )
-    with open(PID_FILE, "w", encoding="utf-8") as f:
-        f.write(str(p.pid))
-    return {"ok": True, "pid": p.pid}
+    return _start(DEFAULT_BOT, None)
 
 @router.post("/control/stop")
 def stop_bot():
-    if not os.path.exists(PID_FILE):
-        return {"ok": False, "error": "no pid file"}
-    pid = int(open(PID_FILE, "r", encoding="utf-8").read().strip())
-    try:
-        os.kill(pid, signal.SIGTERM)
-    except Exception as e:
-        return {"ok": False, "error": str(e)}
-    try:
-        os.remove(PID_FILE)
-    except Exception:
-        pass
-    return {"ok": True, "pid": pid}
+    return SUPERVISOR.stop(DEFAULT_BOT)
 
 @router.get("/control/status")
 def bot_status():
-    if not os.path.exists(PID_FILE):
-        return {"running": False, "pid": None}
-    pid = int(open(PID_FILE, "r", encoding="utf-8").read().strip())
-    try:
-        os.kill(pid, 0)
-        return {"running": True, "pid": pid}
-    except OSError:
-        try:
-            os.remove(PID_FILE)
-        except Exception:
-            pass
-        return {"running": False, "pid": None}
+    st = SUPERVISOR.status(DEFAULT_BOT)
+    if st is None: return {"running": False, "pid": None}
+    return {**st, "pid": st["pid"] if st["running"] else None}
+
+@router.get("/control/bots")
+def list_bots():
+    return {"bots": SUPERVISOR.status()}
+
+@router.post("/control/bots/{name}/start")
+def start_named(name: str, req: Optional[StartRequest] = None):
+    return _start(name, req)
+
+@router.post("/control/bots/{name}/stop")
+def stop_named(name: str):
+    return SUPERVISOR.stop(name)
+
+@router.post("/control/bots/{name}/restart")
+def restart_named(name: str):
+    st = _found(SUPERVISOR.status(name), name)
+    SUPERVISOR.stop(name)
+    return _start(name, StartRequest(**{k: v for k, v in st["spec"].items() if k != "name"}))
+
+@router.get("/control/bots/{name}/status")
+def status_named(name: str):
+    return _found(SUPERVISOR.status(name), name)
+
+@router.get("/control/bots/{name}/history")
+def history_named(name: str, limit: int = 300):
+    return {"name": name, "samples": _found(SUPERVISOR.history(name, limit), name)}
+
+@router.get("/control/bots/{name}/logs")
+def logs_named(name: str, lines: int = 200):
+    return {"name": name, "lines": _found(SUPERVISOR.tail(name, lines), name)}
@@ -0,0 +1,69 @@
+from __future__ import annotations
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+import os, json, time
+from api.runs import RUNS_DIR
+
+router = APIRouter()
+# only runs whose metrics snapshot was refreshed recently are considered live
+MAX_AGE_SEC = float(os.environ.get("METRICS_MAX_AGE_SEC", "300"))
+
+def _load(path: str):
+    try: return json.loads(open(path, "r", encoding="utf-8").read())
+    except Exception: return None
+
+def _live_snapshots():
+    if not os.path.exists(RUNS_DIR):
+        return []
+    now = time.time()
+    out = []
+    for d in sorted(os.listdir(RUNS_DIR)):
+        p = os.path.join(RUNS_DIR, d, "metrics.json")
+        if not os.path.exists(p) or now - os.path.getmtime(p) > MAX_AGE_SEC:
+            continue
+        snap = _load(p)
+        if snap: out.append((d, snap))
+    return out
+
+def _escape(v) -> str:
+    # exposition format: backslash, double quote and newline are escaped in label values
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(labels: dict) -> str:
+    if not labels: return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+def render_prometheus(snapshots: list) -> str:
+    # group samples by metric family so each family has one TYPE line
+    families = {}
+    for run_id, snap in snapshots:
+        for c in snap.get("counters", []):
+            fam = families.setdefault(c["name"], ("counter", []))
+            fam[1].append(f"{c['name']}{_labels({**c['labels'], 'run_id': run_id})} {c['value']}")
+        for g in snap.get("gauges", []):
+            fam = families.setdefault(g["name"], ("gauge", []))
+            fam[1].append(f"{g['name']}{_labels({**g['labels'], 'run_id': run_id})} {g['value']}")
+        for h in snap.get("histograms", []):
+            name, labels = h["name"], {**h["labels"], "run_id": run_id}
+            fam = families.setdefault(name, ("summary", []))
+            for q, k in (("0.5", "p50"), ("0.9", "p90"), ("0.99", "p99"), ("0.999", "p999")):
+                fam[1].append(f"{name}{_labels({**labels, 'quantile': q})} {h[k]}")
+            fam[1].append(f"{name}_sum{_labels(labels)} {h['sum']}")
+            fam[1].append(f"{name}_count{_labels(labels)} {h['count']}")
+    lines = []
+    for name in sorted(families):
+        typ, samples = families[name]
+        lines.append(f"# TYPE {name} {typ}")
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(render_prometheus(_live_snapshots()), media_type="text/plain; version=0.0.4")
+
+@router.get("/api/runs/{run_id}/metrics")
+def run_metrics(run_id: str):
+    p = os.path.join(RUNS_DIR, run_id, "metrics.json")
+    if not os.path.exists(p):
+        return {"error": "not found"}
+    return _load(p) or {"error": "unreadable"}
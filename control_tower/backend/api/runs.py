@@ -56,14 +56,29 @@ def _read_csv(filepath: str) -> list:
             rows.append(parsed)
         return rows
 
+def _series(p: str, name: str, res: int) -> list:
+    # res > 0 serves the write-time OHLC rollup instead of the raw rows
+    return _read_csv(os.path.join(p, f"{name}.{res}s.csv" if res > 0 else f"{name}.csv"))
+
+def _shared_market_mid(p: str, res: int, equity: list) -> list:
+    # runs that logged into a per-pair shared series get its slice over their own span
+    try: shared = json.loads(open(os.path.join(p, "run_meta.json"), "r", encoding="utf-8").read()).get("market_mid_csv")
+    except (OSError, ValueError): return []
+    if not shared or not equity: return []
+    root, ext = os.path.splitext(shared)
+    k = "ts" if res <= 0 else "start"
+    t0, t1 = equity[0][k], equity[-1][k]
+    return [r for r in _read_csv(f"{root}.{res}s{ext}" if res > 0 else shared) if t0 <= r.get(k, -1) <= t1]
+
 @router.get("/runs/{run_id}/timeseries")
-def get_timeseries(run_id: str):
+def get_timeseries(run_id: str, res: int = 0):
     p = os.path.join(RUNS_DIR, run_id)
     if not os.path.exists(p):
         return {"error": "not found"}
+    equity = _series(p, "equity_timeseries", res)
     return {
-        "equity": _read_csv(os.path.join(p, "equity_timeseries.csv")),
-        "market_mid": _read_csv(os.path.join(p, "market_mid_timeseries.csv")),
+        "equity": equity,
+        "market_mid": _series(p, "market_mid_timeseries", res) or _shared_market_mid(p, res, equity),
         "fills": _read_csv(os.path.join(p, "paper_fills.csv")),
         "orders": _read_csv(os.path.join(p, "order_attempts.csv")),
     }
@@ -3,6 +3,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from api.runs import router as runs_router
 from api.control import router as control_router
+from api.metrics import router as metrics_router
 
 app = FastAPI(title="Control Tower Backend")
 app.add_middleware(
@@ -12,3 +13,4 @@ app.add_middleware(
 )
 app.include_router(runs_router, prefix="/api")
 app.include_router(control_router, prefix="/api")
+app.include_router(metrics_router)
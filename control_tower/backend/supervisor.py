@@ -0,0 +1,311 @@
+from __future__ import annotations
+import json, os, re, shutil, signal, subprocess, sys, threading, time
+from collections import deque
+from dataclasses import dataclass, field, asdict
+from typing import Any, Deque, Dict, List, Optional
+
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+LOG_DIR = os.environ.get("BOT_LOG_DIR", os.path.join(_PROJECT_ROOT, "control_tower_logs"))
+LOG_MAX_BYTES = int(os.environ.get("BOT_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUPS = int(os.environ.get("BOT_LOG_BACKUPS", "5"))
+SAMPLE_SEC = float(os.environ.get("BOT_SAMPLE_SEC", "1.0"))
+HISTORY = int(os.environ.get("BOT_HISTORY", "3600"))
+
+_TICK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+POLICIES = ("never", "on-failure", "always")
+_NAME = re.compile(r"[A-Za-z0-9_.-]+")
+
+@dataclass
+class BotSpec:
+    name: str
+    args: List[str] = field(default_factory=list)  # extra run.py arguments
+    restart: str = "on-failure"
+    max_restarts: int = 10
+    backoff_sec: float = 1.0
+    max_backoff_sec: float = 60.0
+    stable_sec: float = 60.0  # a run this long resets the restart count
+
+@dataclass
+class ProcSample:
+    ts: float
+    cpu_pct: float
+    rss_bytes: int
+    fds: int
+    procs: int
+    loop_lag_sec: Optional[float]
+
+def _proc_table() -> Dict[int, tuple]:
+    """pid -> (ppid, cpu ticks, rss bytes) for every readable /proc entry."""
+    out = {}
+    for d in os.listdir("/proc"):
+        if not d.isdigit(): continue
+        try:
+            with open(f"/proc/{d}/stat", "rb") as f: raw = f.read()
+        except OSError:
+            continue
+        # comm may contain spaces or parens: fields resume after the last ')'
+        rest = raw[raw.rindex(b")") + 2:].split()
+        out[int(d)] = (int(rest[1]), int(rest[11]) + int(rest[12]), int(rest[21]) * _PAGE)
+    return out
+
+def _tree(pid: int, table: Dict[int, tuple]) -> List[int]:
+    kids: Dict[int, List[int]] = {}
+    for p, (ppid, _, _) in table.items(): kids.setdefault(ppid, []).append(p)
+    out, todo = [], [pid]
+    while todo:
+        p = todo.pop()
+        if p not in table: continue
+        out.append(p)
+        todo.extend(kids.get(p, ()))
+    return out
+
+def _fd_count(pid: int) -> int:
+    try: return len(os.listdir(f"/proc/{pid}/fd"))
+    except OSError: return 0
+
+def _alive(pid: int) -> bool:
+    try: os.kill(pid, 0); return True
+    except OSError: return False
+
+def _is_bot(pid: int) -> bool:
+    """A live pid from a pid file may have been reused by an unrelated process."""
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f: argv = f.read().split(b"\0")
+    except OSError:
+        return False
+    return any(os.path.basename(a) == b"run.py" for a in argv)
+
+def _rotate(path: str, max_bytes: int, backups: int) -> None:
+    """
+    copytruncate rotation: the bot keeps its O_APPEND descriptor on `path`,
+    so the file is copied to .1 (older ones shifted) and truncated in place
+    instead of renamed; the next write lands at the new end.
+    """
+    try:
+        if os.path.getsize(path) < max_bytes: return
+    except OSError:
+        return
+    for i in range(backups - 1, 0, -1):
+        if os.path.exists(f"{path}.{i}"): os.replace(f"{path}.{i}", f"{path}.{i + 1}")
+    if backups > 0: shutil.copyfile(path, f"{path}.1")
+    with open(path, "r+b") as f: f.truncate(0)
+
+def _read_lag(path: str, max_age_sec: float = 10.0) -> Optional[float]:
+    try:
+        ts, lag = open(path, "r", encoding="utf-8").read().split()[:2]
+    except (OSError, ValueError):
+        return None
+    return float(lag) if time.time() - float(ts) <= max_age_sec else None
+
+class _Bot:
+    def __init__(self, spec: BotSpec):
+        self.spec = spec
+        self.proc: Optional[subprocess.Popen] = None
+        self.pid: Optional[int] = None  # set for adopted processes too
+        self.started_at = 0.0
+        self.exit_code: Optional[int] = None
+        self.restarts = 0
+        self.next_start: Optional[float] = None
+        self.wanted = False
+        self.history: Deque[ProcSample] = deque(maxlen=HISTORY)
+        self._ticks: Optional[tuple] = None  # (ts, total ticks)
+
+    def note(self, msg: str) -> None:
+        with open(self.log_path, "a", encoding="utf-8") as f: f.write(f"--- supervisor: {msg}\n")
+
+    @property
+    def log_path(self) -> str: return os.path.join(LOG_DIR, f"{self.spec.name}.log")
+    @property
+    def pid_path(self) -> str: return os.path.join(LOG_DIR, f"{self.spec.name}.pid")
+    @property
+    def lag_path(self) -> str: return os.path.join(LOG_DIR, f"{self.spec.name}.lag")
+    @property
+    def spec_path(self) -> str: return os.path.join(LOG_DIR, f"{self.spec.name}.spec.json")
+
+    @property
+    def running(self) -> bool:
+        if self.proc is not None: return self.proc.poll() is None
+        return self.pid is not None and _alive(self.pid)
+
+    def status(self) -> Dict[str, Any]:
+        last = self.history[-1] if self.history else None
+        return {
+            "name": self.spec.name, "running": self.running, "pid": self.pid, "wanted": self.wanted,
+            "started_at": self.started_at or None, "uptime_sec": (time.time() - self.started_at) if self.running else 0.0,
+            "exit_code": self.exit_code, "restarts": self.restarts, "next_start": self.next_start,
+            "spec": asdict(self.spec), "last": asdict(last) if last else None, "log": self.log_path,
+        }
+
+class Supervisor:
+    """
+    Runs named `run.py` processes with restart policies. A background thread
+    samples CPU%, RSS and open FDs of each bot's process tree from /proc,
+    plus the loop lag the bot reports through BOT_LOOP_LAG_FILE, into a ring
+    buffer per bot. Each bot writes stdout/stderr straight into its own log
+    file under LOG_DIR (rotated by copytruncate), so bots outlive a backend
+    reload, which re-adopts them from their pid and spec files.
+    """
+
+    def __init__(self):
+        os.makedirs(LOG_DIR, exist_ok=True)
+        self.bots: Dict[str, _Bot] = {}
+        self._lock = threading.RLock()
+        self._thread: Optional[threading.Thread] = None
+        self._adopt()
+        if self.bots: self._ensure_thread()
+
+    def _adopt(self) -> None:
+        # a backend reload keeps its bots: re-attach to live pids from the pid files
+        for fn in os.listdir(LOG_DIR):
+            if not fn.endswith(".pid"): continue
+            try: pid = int(open(os.path.join(LOG_DIR, fn), "r", encoding="utf-8").read().strip())
+            except (OSError, ValueError): continue
+            if not _alive(pid) or not _is_bot(pid): continue
+            name = fn[:-4]
+            try:
+                with open(os.path.join(LOG_DIR, f"{name}.spec.json"), "r", encoding="utf-8") as f: spec = BotSpec(**json.load(f))
+            except (OSError, ValueError, TypeError):
+                spec = BotSpec(name=name, restart="never")
+            bot = _Bot(spec)
+            bot.pid, bot.wanted, bot.started_at = pid, True, os.path.getmtime(os.path.join(LOG_DIR, fn))
+            self.bots[bot.spec.name] = bot
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._loop, name="bot-supervisor", daemon=True)
+            self._thread.start()
+
+    def start(self, spec: BotSpec) -> Dict[str, Any]:
+        if not _NAME.fullmatch(spec.name):
+            raise ValueError("bot name must match [A-Za-z0-9_.-]+")
+        if spec.restart not in POLICIES:
+            raise ValueError(f"restart must be one of {POLICIES}")
+        with self._lock:
+            bot = self.bots.get(spec.name)
+            if bot and bot.running:
+                return {"ok": False, "error": "bot already running", "pid": bot.pid}
+            if bot is None:
+                bot = self.bots[spec.name] = _Bot(spec)
+            bot.spec, bot.restarts, bot.wanted = spec, 0, True
+            self._spawn(bot)
+            self._ensure_thread()
+            return {"ok": True, "pid": bot.pid}
+
+    def _spawn(self, bot: _Bot) -> None:
+        env = os.environ.copy()
+        env["PYTHONUNBUFFERED"] = "1"
+        env["BOT_LOOP_LAG_FILE"] = bot.lag_path
+        # own session: stop() signals the whole tree, worker pools included; the log
+        # file (not a pipe) is the bot's own, so it survives the backend going away
+        with open(bot.log_path, "ab") as log:
+            bot.proc = subprocess.Popen([sys.executable, "run.py", *bot.spec.args], stdout=log, stderr=subprocess.STDOUT,
+                                        stdin=subprocess.DEVNULL, env=env, cwd=_PROJECT_ROOT, start_new_session=True)
+        bot.pid, bot.started_at, bot.exit_code, bot.next_start, bot._ticks = bot.proc.pid, time.time(), None, None, None
+        with open(bot.pid_path, "w", encoding="utf-8") as f: f.write(str(bot.pid))
+        with open(bot.spec_path, "w", encoding="utf-8") as f: json.dump(asdict(bot.spec), f)
+        bot.note(f"started pid={bot.pid} args={bot.spec.args} restarts={bot.restarts}")
+
+    def stop(self, name: str, timeout_sec: float = 10.0) -> Dict[str, Any]:
+        with self._lock:
+            bot = self.bots.get(name)
+            if bot is None: return {"ok": False, "error": "unknown bot"}
+            bot.wanted, bot.next_start = False, None
+            pid = bot.pid
+            if not bot.running: return {"ok": False, "error": "not running", "pid": pid}
+        try: os.killpg(pid, signal.SIGTERM)
+        except OSError:
+            try: os.kill(pid, signal.SIGTERM)
+            except OSError as e: return {"ok": False, "error": str(e)}
+        deadline = time.time() + timeout_sec
+        while bot.running and time.time() < deadline: time.sleep(0.1)
+        if bot.running:
+            try: os.killpg(pid, signal.SIGKILL)
+            except OSError: pass
+        with self._lock:
+            self._reap(bot)
+        return {"ok": True, "pid": pid}
+
+    def _reap(self, bot: _Bot) -> None:
+        if bot.proc is not None and bot.proc.poll() is not None:
+            bot.exit_code = bot.proc.returncode
+            bot.proc = None
+            bot.note(f"pid={bot.pid} exited code={bot.exit_code}")
+        elif bot.proc is None and bot.pid is not None and not _alive(bot.pid):
+            bot.exit_code = None  # adopted: exit status is unknowable
+        else:
+            return
+        bot.pid = None
+        try: os.remove(bot.pid_path)
+        except OSError: pass
+
+    def status(self, name: Optional[str] = None):
+        with self._lock:
+            if name is not None:
+                bot = self.bots.get(name)
+                return bot.status() if bot else None
+            return [b.status() for b in self.bots.values()]
+
+    def history(self, name: str, limit: int = 300) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            bot = self.bots.get(name)
+            if bot is None: return None
+            return [asdict(s) for s in list(bot.history)[-max(1, int(limit)):]]
+
+    def tail(self, name: str, lines: int = 200) -> Optional[List[str]]:
+        bot = self.bots.get(name)
+        if bot is None: return None
+        try:
+            with open(bot.log_path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                f.seek(max(0, f.tell() - 256 * max(1, int(lines))))
+                return f.read().decode("utf-8", "replace").splitlines()[-int(lines):]
+        except OSError:
+            return []
+
+    def _loop(self) -> None:
+        while True:
+            try: self.tick()
+            except Exception as e: print(f"[SUPERVISOR] tick failed: {e}")
+            time.sleep(SAMPLE_SEC)
+
+    def tick(self) -> None:
+        table = _proc_table()
+        now = time.time()
+        with self._lock:
+            for bot in self.bots.values():
+                _rotate(bot.log_path, LOG_MAX_BYTES, LOG_BACKUPS)
+                if bot.running:
+                    self._sample(bot, table, now)
+                    continue
+                if bot.pid is not None:
+                    self._reap(bot)
+                    self._schedule_restart(bot, now)
+                if bot.next_start is not None and now >= bot.next_start:
+                    bot.restarts += 1
+                    self._spawn(bot)
+
+    def _schedule_restart(self, bot: _Bot, now: float) -> None:
+        s = bot.spec
+        failed = bot.exit_code != 0
+        if not bot.wanted or s.restart == "never" or (s.restart == "on-failure" and not failed):
+            bot.wanted = False; return
+        if now - bot.started_at >= s.stable_sec: bot.restarts = 0
+        if bot.restarts >= s.max_restarts:
+            bot.note(f"giving up after {bot.restarts} restarts")
+            bot.wanted = False; return
+        bot.next_start = now + min(s.max_backoff_sec, s.backoff_sec * 2 ** bot.restarts)
+
+    def _sample(self, bot: _Bot, table: Dict[int, tuple], now: float) -> None:
+        pids = _tree(bot.pid, table)
+        ticks = sum(table[p][1] for p in pids)
+        cpu = 0.0
+        if bot._ticks is not None and now > bot._ticks[0]:
+            # a child that exited between samples takes its ticks along; never report negative
+            cpu = max(0.0, 100.0 * (ticks - bot._ticks[1]) / _TICK / (now - bot._ticks[0]))
+        bot._ticks = (now, ticks)
+        bot.history.append(ProcSample(ts=now, cpu_pct=cpu, rss_bytes=sum(table[p][2] for p in pids),
+                                      fds=sum(_fd_count(p) for p in pids), procs=len(pids), loop_lag_sec=_read_lag(bot.lag_path)))
+
+SUPERVISOR = Supervisor()
@@ -1,5 +1,5 @@
 from __future__ import annotations
-import asyncio
+import argparse, asyncio
 import yaml
 from pathlib import Path
 
@@ -9,21 +9,49 @@ def load_config(path: str = "config.yaml") -> dict:
         raise FileNotFoundError("config.yaml not found. Copy config.example.yaml to config.yaml")
     return yaml.safe_load(p.read_text(encoding="utf-8"))
 
-async def main():
-    cfg = load_config()
-
+async def _run(cfg: dict, clock=None, duration_sec=None):
     if cfg.get("evolution", {}).get("enabled", False):
         from bot.tournament.evolution_manager import EvolutionManager
-        await EvolutionManager(cfg).run()
+        await EvolutionManager(cfg, clock=clock).run()
         return
 
     if cfg.get("tournament", {}).get("enabled", False):
         from bot.tournament.manager import TournamentManager
-        await TournamentManager(cfg).run()
+        await TournamentManager(cfg, clock=clock).run()
         return
 
     from bot.app import App
-    await App(cfg).run()
+    app = App(cfg, clock=clock)
+    if duration_sec:
+        # stop through the kill switch so run() closes out normally
+        clock.call_later(float(duration_sec), app.ks.trip, "duration")
+    await app.run()
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--resume", metavar="RUN_DIR", help="reattach to a paper run dir and restore its checkpoint")
+    ap.add_argument("--resume-evolution", action="store_true", help="continue the last evolution session from its lineage checkpoint")
+    args = ap.parse_args()
+    cfg = load_config()
+    if args.resume:
+        cfg.setdefault("paper", {}).setdefault("runs", {})["resume_dir"] = args.resume
+    if args.resume_evolution:
+        cfg.setdefault("evolution", {})["resume"] = True
+
+    ccfg = cfg.get("clock", {})
+    if str(ccfg.get("mode", "wall")) == "virtual":
+        # discrete-event time: sleeps and latency waits complete instantly
+        from bot.clock import VirtualClock
+        clock = VirtualClock()
+        duration = ccfg.get("duration_sec")
+        managed = cfg.get("evolution", {}).get("enabled", False) or cfg.get("tournament", {}).get("enabled", False)
+        # a single App stops itself at duration_sec; managers are cancelled there and
+        # each App they run still closes out from its finally
+        until = clock.time() + float(duration) if duration and managed else None
+        await clock.run(_run(cfg, clock, None if managed else duration), until=until)
+        return
+
+    await _run(cfg)
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,161 @@
+from __future__ import annotations
+import argparse, csv, json, os, platform, random, sys, tempfile, time
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bot.types import OrderIntent, TopOfBook
+from bot.paper.ws_l2_book import WSL2BookStore
+from bot.paper.depth_fill import fok_fill_vwap_against_depth
+from bot.paper.microstructure import MicrostructureTracker
+from bot.paper.performance import PerformanceTracker
+from bot.tournament.market_vol_folds import select_market_vol_balanced_folds
+from bot.tournament.walkforward_stats import compute_slice_stats
+from bot.tournament.rolling_walkforward_score import rolling_walkforward_score
+
+DEFAULT_BASELINE = "./runs/bench_baseline.json"
+LEVELS = [10, 200, 2000]
+POINTS = [1_000, 100_000, 1_000_000]
+
+# A case is (name, setup) where setup() returns (fn, items_per_call).
+Case = Tuple[str, Callable[[], Tuple[Callable[[], object], int]]]
+
+def _book_msg(rng: random.Random, levels: int) -> dict:
+    bids = [[round(0.5 - i * 1e-4, 6), rng.uniform(10, 500)] for i in range(levels)]
+    asks = [[round(0.5001 + i * 1e-4, 6), rng.uniform(10, 500)] for i in range(levels)]
+    return {"token_id": "T", "payload": {"bids": bids, "asks": asks}}
+
+def _walk(rng: random.Random, n: int, start: float = 0.5, vol: float = 0.002) -> List[float]:
+    out, x = [], start
+    for _ in range(n):
+        x = min(0.99, max(0.01, x * (1.0 + rng.gauss(0, vol))))
+        out.append(x)
+    return out
+
+def _write_csv(path: str, header: List[str], rows) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f); w.writerow(header); w.writerows(rows)
+
+def _run_dir(tmp: str, n: int) -> str:
+    d = os.path.join(tmp, f"run-{n}")
+    if os.path.exists(d): return d
+    os.makedirs(d)
+    rng = random.Random(n)
+    mids = _walk(rng, n)
+    eq = [1000.0 * (1.0 + 0.05 * (m - 0.5)) for m in _walk(rng, n)]
+    _write_csv(os.path.join(d, "market_mid_timeseries.csv"), ["ts", "token_id", "mid"], ((i, "T", m) for i, m in enumerate(mids)))
+    _write_csv(os.path.join(d, "equity_timeseries.csv"), ["ts", "equity", "cash", "realized_pnl", "unrealized_pnl", "fills"], ((i, e, 1000.0, 0.0, e - 1000.0, 10) for i, e in enumerate(eq)))
+    return d
+
+def build_cases(tmp: str, levels: List[int], points: List[int]) -> List[Case]:
+    cases: List[Case] = []
+    for L in levels:
+        def on_message(L=L):
+            # alternate two books so every call is a real rebuild
+            store = WSL2BookStore(max_levels=L); rng = random.Random(L)
+            msgs = [_book_msg(rng, L), _book_msg(rng, L)]; i = [0]
+            def fn():
+                i[0] ^= 1; store.on_message(msgs[i[0]])
+            return fn, 1
+        def on_message_same(L=L):
+            store = WSL2BookStore(max_levels=L); msg = _book_msg(random.Random(L), L)
+            return (lambda: store.on_message(msg)), 1
+        def get_book(L=L):
+            store = WSL2BookStore(max_levels=L); store.on_message(_book_msg(random.Random(L), L))
+            return (lambda: store.get_book("T")), 1
+        def depth_fill(L=L):
+            store = WSL2BookStore(max_levels=L); store.on_message(_book_msg(random.Random(L), L))
+            book = store.get_book("T")
+            notional = sum(l.price * l.size for l in book.asks) * 0.5
+            intent = OrderIntent("T", "BUY", 1.0, notional)
+            return (lambda: fok_fill_vwap_against_depth(intent, book, fee_bps=1.0, slippage_bps=5.0)), 1
+        cases += [(f"ws_book.on_message[{L}]", on_message), (f"ws_book.on_message_same[{L}]", on_message_same), (f"ws_book.get_book[{L}]", get_book), (f"depth_fill[{L}]", depth_fill)]
+    wf_cfg = {"folds": 4, "min_fold_minutes": 1}
+    for N in points:
+        def stats_over(N=N):
+            tr = MicrostructureTracker(maxlen=N)
+            for i, m in enumerate(_walk(random.Random(N), N)): tr.on_tob(TopOfBook("T", i * 0.5, m - 0.001, m + 0.001))
+            return (lambda: tr.stats_over(0.3)), 1
+        def perf_update(N=N):
+            eq = [1000.0 + 10.0 * (m - 0.5) for m in _walk(random.Random(N), N)]
+            def fn():
+                p = PerformanceTracker(equity_csv_path=os.path.join(tmp, f"eq-{N}.csv"), summary_json_path=os.path.join(tmp, f"sum-{N}.json"), log_interval_sec=10**12, print_interval_sec=10**12)
+                for i, e in enumerate(eq): p.update(ts=float(i), equity=e, cash=1000.0, realized_pnl=0.0, unrealized_pnl=e - 1000.0, fills=0)
+            return fn, N
+        def folds(N=N):
+            d = _run_dir(tmp, N)
+            return (lambda: select_market_vol_balanced_folds(os.path.join(d, "market_mid_timeseries.csv"), folds=4, min_fold_points=max(30, N // 10), min_high_frac=0.2, max_overlap_frac=0.35, candidate_stride_points=10, candidates_per_fold=200, vol_window_points=60, high_vol_threshold=0.0015)), N
+        def slice_stats(N=N):
+            d = _run_dir(tmp, N)
+            return (lambda: compute_slice_stats(os.path.join(d, "equity_timeseries.csv"), start_idx=0, end_idx=N)), N
+        def rolling_wf(N=N):
+            d = _run_dir(tmp, N)
+            return (lambda: rolling_walkforward_score(run_dir=d, summary={"fills": 10}, objective={}, constraints={}, wf_cfg=wf_cfg, perf_regime_cfg={})), N
+        cases += [(f"micro.stats_over[{N}]", stats_over), (f"perf.update[{N}]", perf_update), (f"folds[{N}]", folds), (f"slice_stats[{N}]", slice_stats), (f"rolling_wf[{N}]", rolling_wf)]
+    return cases
+
+def measure(fn: Callable[[], object], items: int, *, min_time: float, repeats: int) -> float:
+    """Best-of-`repeats` throughput in items/sec; each repeat loops for at least min_time."""
+    best = 0.0
+    for _ in range(repeats):
+        calls = 0
+        t0 = time.perf_counter()
+        while True:
+            fn(); calls += 1
+            dt = time.perf_counter() - t0
+            if dt >= min_time: break
+        best = max(best, calls * items / dt)
+    return best
+
+def compare(baseline: Dict[str, dict], current: Dict[str, dict], tolerance: float) -> List[str]:
+    failures = []
+    for name, cur in current.items():
+        base = baseline.get(name)
+        if not base: continue
+        ratio = cur["items_per_sec"] / max(base["items_per_sec"], 1e-12)
+        flag = "REGRESSION" if ratio < 1.0 - tolerance else ""
+        print(f"  {name:32s} {ratio:6.2f}x {flag}")
+        if flag: failures.append(name)
+    return failures
+
+def main():
+    ap = argparse.ArgumentParser(description="Simulator hot-path microbenchmarks")
+    ap.add_argument("--quick", action="store_true", help="skip the largest scale of each family")
+    ap.add_argument("--filter", default="", help="only run cases whose name contains this")
+    ap.add_argument("--min-time", type=float, default=0.2)
+    ap.add_argument("--repeats", type=int, default=3)
+    ap.add_argument("--save", nargs="?", const=DEFAULT_BASELINE, help="write results as the new baseline")
+    ap.add_argument("--check", nargs="?", const=DEFAULT_BASELINE, help="compare against a baseline, exit 1 on regression")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed throughput drop (fraction)")
+    args = ap.parse_args()
+
+    levels = LEVELS[:-1] if args.quick else LEVELS
+    points = POINTS[:-1] if args.quick else POINTS
+    results: Dict[str, dict] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, setup in build_cases(tmp, levels, points):
+            if args.filter and args.filter not in name: continue
+            fn, items = setup()
+            ips = measure(fn, items, min_time=args.min_time, repeats=args.repeats)
+            results[name] = {"items_per_sec": ips, "items_per_call": items}
+            print(f"{name:34s} {ips:14,.0f} items/s")
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.save) or ".", exist_ok=True)
+        meta = {"ts": time.time(), "python": platform.python_version(), "machine": platform.machine(), "quick": args.quick}
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+        print("Wrote:", args.save)
+
+    if args.check:
+        if not os.path.exists(args.check):
+            print("No baseline at", args.check); sys.exit(2)
+        baseline = json.loads(open(args.check, "r", encoding="utf-8").read()).get("results", {})
+        print(f"vs {args.check} (tolerance {args.tolerance:.0%}):")
+        failures = compare(baseline, results, args.tolerance)
+        if failures:
+            print(f"{len(failures)} regression(s):", ", ".join(failures)); sys.exit(1)
+        print("OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+from __future__ import annotations
+import argparse, os, sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from bot.tournament.lineage import LineageStore
+
+DEFAULT_PATH = "./runs/evolution/lineage.jsonl"
+
+def main():
+    ap = argparse.ArgumentParser(description="Query the evolution lineage store")
+    ap.add_argument("--path", default=DEFAULT_PATH)
+    ap.add_argument("--session", type=int, default=None, help="restrict to one session (default: all)")
+    ap.add_argument("--gen", type=int, default=None)
+    ap.add_argument("--top", type=int, default=10)
+    ap.add_argument("--ancestry", metavar="GENOME_ID", help="print a genome's ancestors instead")
+    args = ap.parse_args()
+
+    store = LineageStore(args.path)
+    if args.ancestry:
+        for g in store.ancestry(args.ancestry):
+            print(g["id"], "born", g.get("born"), "parents", ",".join(g.get("parents") or []) or "-", g["genome"])
+        return
+    for i, r in enumerate(store.best(args.top, session=args.session, gen=args.gen), 1):
+        print(i, r["id"], "session", r.get("session"), "gen", r.get("gen"), "rung", r.get("rung"),
+              "score", round(r["score"], 4), r.get("reason"), r.get("run_id"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+from __future__ import annotations
+import argparse, asyncio, os, resource, sys, time
+from copy import deepcopy
+from typing import Optional
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import yaml
+from bot.sim.synthetic import SyntheticConfig, SyntheticMarket
+from bot.sim.exchange import StandInExchange
+from bot.metrics import Histogram
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"): return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+def soak_config(base: dict, market: SyntheticMarket, url: str, mode: str, *, feed: str = "ws", trigger_move_pct: float = 0.001, min_gap_pct: float = 0.002) -> dict:
+    cfg = deepcopy(base)
+    leader, followers = market.token_ids[0], market.token_ids[1:]
+    # ws: every generated update is pushed into the bot, so its load follows the rate;
+    # rest: polling at the scheduler's pace, whatever the rate
+    cfg["feed"] = {"host": url, "ws_url": "ws" + url[len("http"):] + "/ws/market" if feed == "ws" else ""}
+    cfg["markets"] = {"token_a": leader, "token_b": followers[0]}
+    dep = cfg.setdefault("dependency", {})
+    # the synthetic leader moves ~0.1-0.4% per update and followers lag it by a few steps
+    dep["trigger_move_pct"] = trigger_move_pct
+    dep["min_gap_pct"] = min_gap_pct
+    dep["linear"] = {"beta": market.cfg.beta, "intercept": market.cfg.intercept}
+    if len(followers) > 1:
+        dep["graph"] = {"enabled": True, "relations": [{"leader": leader, "follower": f, "beta": market.cfg.beta, "intercept": market.cfg.intercept, "kind": "clamped"} for f in followers]}
+    runs = cfg.setdefault("paper", {}).setdefault("runs", {})
+    runs["base_dir"] = os.path.join(str(runs.get("base_dir", "./runs")), "soak")
+    runs["tag"] = "soak"
+    cfg["tournament"] = {**cfg.get("tournament", {}), "enabled": mode == "tournament"}
+    cfg["evolution"] = {**cfg.get("evolution", {}), "enabled": False}
+    return cfg
+
+def _ms(h: Histogram, q: float) -> Optional[float]:
+    return h.percentile(q) * 1e3 if h.count else None
+
+def _fmt(v: Optional[float], spec: str = ".2f") -> str:
+    return "n/a" if v is None else format(v, spec) + "ms"
+
+def merged(apps, name: str) -> Histogram:
+    h = Histogram()
+    for a in apps: h.merge(a.metrics.histogram(name))
+    return h
+
+async def drive(cfg: dict, exch: StandInExchange, rates, step_sec: float, mode: str):
+    if mode == "tournament":
+        from bot.tournament.manager import TournamentManager
+        manager = TournamentManager(cfg)
+        task = asyncio.create_task(manager.run())
+        apps = lambda: [v.app for v in manager.variants if v.app is not None]
+    else:
+        from bot.app import App
+        app = App(cfg)
+        task = asyncio.create_task(app.run())
+        apps = lambda: [app]
+    await asyncio.sleep(3.0)  # warm up: first polls + books
+    rss0 = rss_mb()
+    rows = []
+    for rate in rates:
+        exch.set_rate(rate)
+        for a in apps(): a.metrics.reset()
+        gen0, req0, ws0 = exch.market.updates, exch.requests, exch.ws_sent
+        t0 = time.perf_counter()
+        await asyncio.sleep(step_sec)
+        dt = time.perf_counter() - t0
+        ticks = sum(a.metrics.counter("app_ticks_total").value for a in apps())
+        dec, tick, lag = merged(apps(), "tick_to_decision_seconds"), merged(apps(), "app_tick_seconds"), merged(apps(), "event_loop_lag_seconds")
+        rows.append({
+            "rate": rate,
+            "book_updates_per_sec": (exch.market.updates - gen0) / dt,
+            "polls_per_sec": (exch.requests - req0) / dt,
+            "ws_msgs_per_sec": (exch.ws_sent - ws0) / dt,
+            "ticks_per_sec": ticks / dt,
+            "decisions": dec.count,
+            "tick_p50_ms": _ms(tick, 0.5), "tick_p99_ms": _ms(tick, 0.99),
+            "decision_p50_ms": _ms(dec, 0.5), "decision_p99_ms": _ms(dec, 0.99),
+            "loop_lag_p99_ms": _ms(lag, 0.99),
+            "rss_mb": rss_mb(), "rss_growth_mb": rss_mb() - rss0,
+        })
+        r = rows[-1]
+        print(f"[SOAK] rate={rate:>7} gen/s={r['book_updates_per_sec']:8.0f} ws/s={r['ws_msgs_per_sec']:8.0f} polls/s={r['polls_per_sec']:6.1f} ticks/s={r['ticks_per_sec']:5.2f} "
+              f"tick p50={_fmt(r['tick_p50_ms'])} p99={_fmt(r['tick_p99_ms'])} decisions={r['decisions']} p50={_fmt(r['decision_p50_ms'])} p99={_fmt(r['decision_p99_ms'])} "
+              f"lag p99={_fmt(r['loop_lag_p99_ms'], '.1f')} rss={r['rss_mb']:.0f}MB (+{r['rss_growth_mb']:.1f})")
+    if mode == "tournament":
+        task.cancel()
+    else:
+        await app.shutdown()
+    try: await task
+    except BaseException: pass
+    return rows
+
+def main():
+    ap = argparse.ArgumentParser(description="Soak App or the tournament against a synthetic stand-in exchange")
+    ap.add_argument("--mode", choices=["app", "tournament"], default="app")
+    ap.add_argument("--config", default="config.yaml")
+    ap.add_argument("--tokens", type=int, default=2)
+    ap.add_argument("--levels", type=int, default=20)
+    ap.add_argument("--rates", default="10,100,1000,5000", help="comma-separated book updates/sec per step")
+    ap.add_argument("--step-sec", type=float, default=30.0)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--feed", choices=["ws", "rest"], default="ws", help="how the bot gets books from the stand-in")
+    ap.add_argument("--trigger-move-pct", type=float, default=0.001)
+    ap.add_argument("--min-gap-pct", type=float, default=0.002)
+    args = ap.parse_args()
+
+    base = yaml.safe_load(open(args.config, "r", encoding="utf-8").read()) if os.path.exists(args.config) else {}
+    rates = [float(x) for x in args.rates.split(",") if x.strip()]
+    market = SyntheticMarket(SyntheticConfig(tokens=args.tokens, levels=args.levels, msg_rate=rates[0], seed=args.seed))
+    exch = StandInExchange(market)
+    url = exch.start()
+    print(f"[SOAK] stand-in exchange at {url} ({len(market.token_ids)} tokens, {args.levels} levels)")
+    try:
+        asyncio.run(drive(soak_config(base, market, url, args.mode, feed=args.feed, trigger_move_pct=args.trigger_move_pct, min_gap_pct=args.min_gap_pct), exch, rates, args.step_sec, args.mode))
+    finally:
+        exch.stop()
+
+if __name__ == "__main__":
+    main()